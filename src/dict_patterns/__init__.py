@@ -1,29 +1,77 @@
 """A package for matching dictionary objects using pattern-based templates."""
 
-from .dict_matcher import DictMatcher
+from .adaptive import AdaptiveDictMatcher
+from .batch import CaptureColumns, MatchResult, extract_columns, match_batch
+from .columnar import ColumnarDictMatcher
+from .compiled import CompiledTemplate, compile_plan
+from .dict_matcher import DictMatcher, MatchBudget
+from .diff import DiffEntry, ValueDiff
 from .exceptions import (
+    DictKeyAmbiguityError,
     DictKeyMismatchError,
     DictListLengthMismatchError,
+    DictPatternBudgetError,
     DictPatternError,
     DictPatternMatchError,
     DictPatternTypeError,
+    DictPatternValueDuplicateError,
     DictPatternValueInconsistencyError,
     DictStructureError,
     DictValueMismatchError,
 )
+from .explain import TemplateExplanation
+from .loader import TemplateLoader
 from .patterns import compile_template
+from .registry import RegisteredTemplate, TemplateRegistry
+from .render import TemplateRenderer
+from .sampling import ListSample, SamplingDictMatcher
+from .scanner import scan_jsonl
+from .sentinels import ANY, AnyValue, Unique
+from .session import MatchSession, SessionBinding, SessionCheckpoint
+from .sharding import ShardedDictMatcher
+from .signature import TemplateSignature
 
 __version__ = "0.3.0"
 
 __all__ = [
     "DictMatcher",
+    "MatchBudget",
+    "ShardedDictMatcher",
+    "AdaptiveDictMatcher",
+    "ColumnarDictMatcher",
+    "SamplingDictMatcher",
+    "ListSample",
+    "MatchSession",
+    "SessionBinding",
+    "SessionCheckpoint",
     "compile_template",
+    "ANY",
+    "AnyValue",
+    "Unique",
+    "match_batch",
+    "MatchResult",
+    "scan_jsonl",
+    "extract_columns",
+    "CaptureColumns",
+    "compile_plan",
+    "CompiledTemplate",
+    "TemplateExplanation",
+    "TemplateLoader",
+    "TemplateRegistry",
+    "RegisteredTemplate",
+    "TemplateSignature",
+    "TemplateRenderer",
+    "ValueDiff",
+    "DiffEntry",
     "DictPatternError",
     "DictStructureError",
     "DictKeyMismatchError",
+    "DictKeyAmbiguityError",
     "DictListLengthMismatchError",
     "DictValueMismatchError",
     "DictPatternMatchError",
     "DictPatternValueInconsistencyError",
+    "DictPatternValueDuplicateError",
+    "DictPatternBudgetError",
     "DictPatternTypeError",
 ]
@@ -0,0 +1,248 @@
+"""
+Adaptive ordering of the checks of compiled templates.
+
+An AdaptiveDictMatcher records, for every dictionary of a compiled template,
+how often each of its values fails and how long it takes to check. Every few
+matches the values of the dictionary are reordered so that the checks most
+likely to fail for the least time run first, and failing documents are
+rejected sooner. Documents matching the template capture the same values in
+any order, so their outcome does not change.
+"""
+
+import time
+import weakref
+
+from .compiled import CompiledTemplate, DictNode
+from .dict_matcher import DictMatcher, MatchState
+from .exceptions import DictKeyMismatchError, DictPatternError
+
+
+def _dict_nodes(node, path: str = "$", seen: set = None):
+    """
+    Yield every dictionary node of a plan without key patterns, with its template path.
+
+    Nodes shared by several occurrences in the plan are only yielded once, with
+    the path of their first occurrence.
+    """
+    if seen is None:
+        seen = set()
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    if node.kind == "dict":
+        if not node.pattern_children:
+            yield path, node
+        for key, child in node.children.items():
+            yield from _dict_nodes(child, f"{path}.{key}", seen)
+        for key_node, child in node.pattern_children:
+            yield from _dict_nodes(child, f"{path}.{key_node.template}", seen)
+    elif node.kind == "list":
+        for i, item in enumerate(node.items):
+            yield from _dict_nodes(item, f"{path}[{i}]", seen)
+    elif node.kind == "unique":
+        yield from _dict_nodes(node.node, path, seen)
+
+
+class _NodeStats:
+    """The check order of a dictionary node and the statistics it was learned from."""
+
+    __slots__ = ("order", "matches", "checks", "failures", "nanoseconds")
+
+    def __init__(self, node: DictNode):
+        # The node is not kept, so the statistics do not keep it alive as a weak key
+        self.order = tuple(node.children)
+        self.matches = 0
+        self.checks = dict.fromkeys(self.order, 0)
+        self.failures = dict.fromkeys(self.order, 0)
+        self.nanoseconds = dict.fromkeys(self.order, 0)
+
+    def rank(self, key: str) -> float:
+        """Return the failures detected per nanosecond spent checking a key, higher runs first."""
+        checks = self.checks[key]
+        if not checks:
+            return 0.0
+        return (self.failures[key] / checks) / (self.nanoseconds[key] / checks or 1)
+
+    def reorder(self) -> None:
+        """Sort the keys by decreasing rank, keeping the current order between equal ranks."""
+        self.order = tuple(sorted(self.order, key=self.rank, reverse=True))
+
+
+class AdaptiveDictMatcher(DictMatcher):
+    r"""
+    A DictMatcher reordering the checks of compiled templates from observed failures.
+
+    For the dictionaries of templates compiled with `compile` (or passed to
+    `match` already compiled), the matcher counts how often each value fails
+    and measures how long it takes to check. Every `reorder_every` matches of a
+    dictionary, its values are sorted by failure rate per unit of cost, so
+    cheap checks failing often run first. Raw templates are matched in
+    template order, and so are dictionaries with placeholders in their keys.
+
+    The order only changes which error a failing document reports first.
+    Matching documents capture the same values whatever the order, although
+    identifiers may be added to the values dictionary in a different order.
+
+    Parameters
+    ----------
+    pattern_handlers : dict
+        A dictionary mapping pattern names to their corresponding regex patterns.
+    reorder_every : int
+        The number of matches of a dictionary between two reorderings.
+    frozen : bool
+        Whether to start with learning disabled, see `freeze`.
+
+    Notes
+    -----
+    Learning is approximate when the matcher is shared by several threads: the
+    statistics may miss some updates, but orders are always replaced as a
+    whole, so every match sees a complete order.
+
+    Examples
+    --------
+    >>> matcher = AdaptiveDictMatcher({'id': r'\\d+'}, reorder_every=500)
+    >>> template = matcher.compile({'payload': {...}, 'status': 'ok', 'id': '{id:order_id}'})
+    >>> for document in documents:  # doctest: +SKIP
+    ...     matcher.match(template, document)
+    >>> orders = matcher.learned_order(template)  # {'$': ['status', 'id', 'payload'], ...}
+    >>> other = AdaptiveDictMatcher({'id': r'\\d+'}, frozen=True)
+    >>> other.load_order(template, orders)
+
+    """
+
+    def __init__(self, pattern_handlers: dict, reorder_every: int = 1000, frozen: bool = False):
+        """Initialize the matcher with pattern handlers and learning options."""
+        if reorder_every < 1:
+            raise ValueError("reorder_every must be a positive integer")
+        super().__init__(pattern_handlers)
+        self.reorder_every = reorder_every
+        self.frozen = frozen
+        # Both are keyed weakly, so the statistics of collected plans are dropped with them
+        self._plans = weakref.WeakSet()
+        self._stats = weakref.WeakKeyDictionary()
+
+    def freeze(self) -> None:
+        """
+        Stop learning: the current orders are kept and no statistics are recorded.
+
+        A frozen matcher always checks the values of a dictionary in the same
+        order, so its errors are deterministic, and it has no learning overhead.
+        """
+        self.frozen = True
+
+    def unfreeze(self) -> None:
+        """Resume learning from the matched documents."""
+        self.frozen = False
+
+    def compile(self, template: dict, bindings: dict = None) -> CompiledTemplate:
+        """Compile a template, tracking the order of its dictionaries, see `DictMatcher.compile`."""
+        plan = super().compile(template, bindings)
+        self._track(plan)
+        return plan
+
+    def _plan(self, template) -> CompiledTemplate:
+        """Return the compiled plan for a template, tracking compiled templates."""
+        if not isinstance(template, CompiledTemplate):
+            # Raw templates get new nodes on every call, there is nothing to learn from
+            return super().compile(template)
+        plan = super()._plan(template)
+        if plan not in self._plans:
+            self._track(plan)
+        return plan
+
+    def _track(self, plan: CompiledTemplate) -> None:
+        """Start tracking the dictionaries of a compiled template."""
+        for _, node in _dict_nodes(plan.root):
+            if node not in self._stats:
+                self._stats[node] = _NodeStats(node)
+        self._plans.add(plan)
+
+    def learned_order(self, template: CompiledTemplate) -> dict[str, list[str]]:
+        """
+        Return the current check order of the dictionaries of a compiled template.
+
+        Parameters
+        ----------
+        template : CompiledTemplate
+            A template tracked by this matcher.
+
+        Returns
+        -------
+        dict[str, list[str]]
+            The keys of every dictionary in check order, by the template path of
+            the dictionary. The result can be saved as JSON and given to
+            `load_order`.
+
+        """
+        self._plan(template)
+        return {path: list(self._stats[node].order) for path, node in _dict_nodes(template.root)}
+
+    def load_order(self, template: CompiledTemplate, orders: dict) -> None:
+        """
+        Set the check order of the dictionaries of a compiled template.
+
+        Parameters
+        ----------
+        template : CompiledTemplate
+            The compiled template.
+        orders : dict
+            The keys of the dictionaries in check order, by template path, as
+            returned by `learned_order`. Dictionaries missing from `orders`
+            keep their current order.
+
+        Raises
+        ------
+        ValueError
+            If an order does not list exactly the keys of its dictionary.
+
+        """
+        self._plan(template)
+        for path, node in _dict_nodes(template.root):
+            if path not in orders:
+                continue
+            order = tuple(orders[path])
+            if sorted(order) != sorted(node.children) or len(set(order)) != len(order):
+                raise ValueError(f"The order for {path} does not list the keys of the dictionary")
+            self._stats[node].order = order
+
+    def _match(self, template: DictNode, actual: dict, path: str, state: MatchState) -> None:
+        """Match a dictionary, checking its values in the learned order when it is tracked."""
+        stats = self._stats.get(template)
+        if stats is None:
+            super()._match(template, actual, path, state)
+            return
+
+        children = template.children
+        if children.keys() != actual.keys() and not state.partial_match:
+            raise DictKeyMismatchError(path, actual_value=actual, template_node=template)
+
+        if self.frozen:
+            for key in stats.order:
+                if key not in actual:
+                    raise DictKeyMismatchError(f"{path}.{key}")
+                self._match_value(children[key], actual[key], f"{path}.{key}", state)
+            return
+
+        try:
+            self._match_learning(stats, children, actual, path, state)
+        finally:
+            stats.matches += 1
+            if stats.matches % self.reorder_every == 0:
+                stats.reorder()
+
+    def _match_learning(self, stats: _NodeStats, children: dict, actual: dict, path: str, state: MatchState) -> None:
+        """Match the values of a dictionary in order, recording the cost and the failures of each check."""
+        for key in stats.order:
+            stats.checks[key] += 1
+            if key not in actual:
+                stats.failures[key] += 1
+                raise DictKeyMismatchError(f"{path}.{key}")
+
+            start = time.perf_counter_ns()
+            try:
+                self._match_value(children[key], actual[key], f"{path}.{key}", state)
+            except DictPatternError:
+                stats.failures[key] += 1
+                raise
+            finally:
+                stats.nanoseconds[key] += time.perf_counter_ns() - start
@@ -0,0 +1,124 @@
+"""
+NumPy arrays and `array.array` buffers as actual list values.
+
+Producers sometimes hand over in-memory results holding typed arrays instead
+of Python lists. They are matched like the lists their `tolist()` would
+return: a template list of literals is compared with the whole array at once,
+and a template list of one shared AnyValue is checked against the element type
+of the array, without building that list. Other templates are matched element
+by element against the list `tolist()` returns.
+
+NumPy is never imported by this package: arrays can only be NumPy arrays when
+the caller has imported NumPy already, so it is looked up in `sys.modules`.
+"""
+
+import array
+import sys
+
+# array.array typecodes whose elements convert exactly to and from the Python values they compare equal to
+EXACT_TYPECODES = frozenset("bBhHiIlLqQd")
+
+# Python type of the elements of array.array typecodes and of NumPy dtype kinds, as returned by `tolist()`
+TYPECODE_TYPES = {**dict.fromkeys("bBhHiIlLqQ", int), "f": float, "d": float, "u": str}
+DTYPE_KIND_TYPES = {"b": bool, "i": int, "u": int, "f": float, "U": str, "S": bytes}
+
+# NumPy dtype kinds compared with literal lists in a single vectorized operation
+NUMERIC_KINDS = frozenset("biuf")
+
+
+def _numpy():
+    """Return the NumPy module if it was imported, None otherwise."""
+    return sys.modules.get("numpy")
+
+
+def is_array(value) -> bool:
+    """Return whether a value is an `array.array` or a NumPy array of at least one dimension."""
+    if isinstance(value, array.array):
+        return True
+    numpy = _numpy()
+    return numpy is not None and isinstance(value, numpy.ndarray) and value.ndim > 0
+
+
+def element_type(actual) -> type | None:
+    """
+    Return the Python type of the elements of an array, or None if they do not share one.
+
+    Multi-dimensional NumPy arrays have arrays as elements, and NumPy arrays
+    of objects elements of any type, so both return None.
+    """
+    if isinstance(actual, array.array):
+        return TYPECODE_TYPES.get(actual.typecode)
+    if actual.ndim != 1:
+        return None
+    return DTYPE_KIND_TYPES.get(actual.dtype.kind)
+
+
+def array_item(actual, index: int):
+    """Return an element of an array, converting NumPy scalars to the Python value `tolist()` returns."""
+    item = actual[index]
+    numpy = _numpy()
+    if numpy is not None and isinstance(item, numpy.generic):
+        return item.item()
+    return item
+
+
+def iter_array(actual):
+    """Iterate over the elements of an array, converted like `array_item` does, without copying the array."""
+    numpy = _numpy()
+    if numpy is None or isinstance(actual, array.array):
+        return iter(actual)
+    return (item.item() if isinstance(item, numpy.generic) else item for item in actual)
+
+
+def first_difference(actual, values: list) -> int | None:
+    """
+    Return the index of the first element of an array different from a list of literals.
+
+    Numeric NumPy arrays are compared in a single vectorized operation, and
+    `array.array` buffers with a single comparison of two buffers. Arrays of
+    other types, and literals which do not convert exactly to the element type
+    of the array, are compared element by element.
+
+    Parameters
+    ----------
+    actual : numpy.ndarray or array.array
+        The array, as long as `values`.
+    values : list
+        The literal values of the template list.
+
+    Returns
+    -------
+    int or None
+        The index of the first difference, or None if the array equals the values.
+
+    """
+    expected = _exact_array(actual, values)
+    if expected is None:
+        return next((i for i, item in enumerate(iter_array(actual)) if item != values[i]), None)
+    if isinstance(actual, array.array):
+        if actual == expected:
+            return None
+        # Only the failing path looks for the index, one element at a time
+        return next(i for i, (item, value) in enumerate(zip(actual, expected, strict=True)) if item != value)
+    different = _numpy().flatnonzero(actual != expected)
+    return int(different[0]) if len(different) else None
+
+
+def _exact_array(actual, values: list):
+    """Return the values as an array comparable with `actual`, or None if they do not convert exactly."""
+    if isinstance(actual, array.array):
+        if actual.typecode not in EXACT_TYPECODES:
+            return None
+        try:
+            expected = array.array(actual.typecode, values)
+        except (TypeError, OverflowError):
+            return None
+    else:
+        if actual.ndim != 1 or actual.dtype.kind not in NUMERIC_KINDS:
+            return None
+        try:
+            expected = _numpy().asarray(values, dtype=actual.dtype)
+        except (TypeError, ValueError, OverflowError):
+            return None
+    # Values changed by the conversion, such as large integers made floats, must not be compared as converted
+    return expected if expected.tolist() == values else None
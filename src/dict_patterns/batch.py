@@ -0,0 +1,261 @@
+"""
+Batch matching of many documents against one template on a thread pool.
+
+A DictMatcher can be shared by several threads, so a batch only compiles its
+template once and every worker thread matches documents with the same matcher.
+On free-threaded CPython builds the documents are matched in parallel.
+
+Batches can either return one MatchResult per document, with `match_batch`,
+or the captured values stored column-wise, with `extract_columns`.
+"""
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import NamedTuple
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import DictPatternError
+from dict_patterns.signature import TemplateSignature
+
+BATCH_CHUNK_SIZE = 64
+
+
+class MatchResult(NamedTuple):
+    """
+    The outcome of matching one document of a batch.
+
+    Attributes
+    ----------
+    values : dict
+        The captured values. For failed documents, the values captured before
+        the error was raised.
+    error : DictPatternError or None
+        The error raised while matching the document, if any.
+
+    """
+
+    values: dict
+    error: DictPatternError | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the document matched the template."""
+        return self.error is None
+
+
+def _match_chunk(
+    matcher: DictMatcher, template, partial_match: bool, signature: TemplateSignature | None, documents: list
+) -> list[MatchResult]:
+    """Match a chunk of documents, collecting one result per document."""
+    results = []
+    for document in documents:
+        state = matcher._new_state(partial_match)
+        if signature is not None:
+            index, error = signature._first_failure(document)
+            if index < signature.exact:
+                # The first failing check is the first failure of the walk, otherwise the walk reports its own error
+                results.append(MatchResult(state.values, error))
+                continue
+        try:
+            matcher._match_root(template, document, state)
+        except DictPatternError as error:
+            results.append(MatchResult(state.values, error))
+        else:
+            results.append(MatchResult(state.values))
+    return results
+
+
+def match_batch(  # noqa: PLR0913
+    matcher: DictMatcher,
+    template,
+    documents,
+    partial_match: bool = False,
+    *,
+    executor: Executor = None,
+    quick_reject: bool = False,
+) -> list[MatchResult]:
+    r"""
+    Match many documents against the same template on a thread pool.
+
+    Parameters
+    ----------
+    matcher : DictMatcher
+        The matcher shared by every worker thread.
+    template : dict or CompiledTemplate
+        The template to match, compiled once for the whole batch.
+    documents : iterable
+        The documents to match.
+    partial_match : bool
+        Whether to allow partial matching of the template.
+    executor : concurrent.futures.Executor, optional
+        The executor matching the documents, in chunks of `BATCH_CHUNK_SIZE`.
+        When omitted, a thread pool with the default number of workers is used.
+    quick_reject : bool
+        Whether to check each document against the template's `TemplateSignature`
+        before the full walk. Documents failing a cheap check (a missing key, a
+        wrong literal, a list length) walked before any regex, Unique
+        constraint or key placeholder are then rejected without running any
+        regex, with the error the full walk raises for that check and no values.
+        Other documents are matched in full, so every document gets the error
+        of the full walk. Only plain DictMatchers without a budget walk the
+        template in the order of the signature, other matchers ignore it.
+
+    Returns
+    -------
+    list[MatchResult]
+        One result per document, in the order of `documents`.
+
+    Raises
+    ------
+    DictPatternTypeError
+        If the template uses a pattern not present in the pattern handlers.
+
+    Examples
+    --------
+    >>> results = match_batch(DictMatcher({'id': r'\\d+'}), {'id': '{id:user_id}'}, [{'id': '1'}, {'id': 'x'}])
+    >>> [result.ok for result in results]
+    [True, False]
+
+    """
+    plan = matcher._plan(template)
+    signature = None
+    if quick_reject and type(matcher) is DictMatcher and matcher.budget is None:
+        signature = TemplateSignature(plan, partial_match)
+    match_chunk = partial(_match_chunk, matcher, plan, partial_match, signature)
+
+    documents = list(documents)
+    chunks = [documents[start : start + BATCH_CHUNK_SIZE] for start in range(0, len(documents), BATCH_CHUNK_SIZE)]
+
+    if executor is None:
+        with ThreadPoolExecutor() as pool:
+            return _run_chunks(pool, match_chunk, chunks)
+    return _run_chunks(executor, match_chunk, chunks)
+
+
+def _run_chunks(executor: Executor, match_chunk, chunks: list) -> list:
+    """Submit every chunk to the executor and flatten the results in order."""
+    futures = [executor.submit(match_chunk, chunk) for chunk in chunks]
+    return [result for future in futures for result in future.result()]
+
+
+class CaptureColumns:
+    """
+    Values captured from a batch of documents, stored column-wise.
+
+    Attributes
+    ----------
+    fields : list[tuple[str, str]]
+        The `(pattern, identifier)` pair of every column, in template order.
+    columns : dict[tuple[str, str], list]
+        One list per field, with one value per document. Rows of failed
+        documents hold None.
+    valid : bytearray
+        The validity mask: 1 for documents that matched the template, 0 for
+        documents that failed.
+    errors : dict[int, DictPatternError]
+        The error raised for every failed row, by row index.
+
+    """
+
+    def __init__(self, fields: list, rows: int):
+        """Initialize pre-sized columns for a number of rows."""
+        self.fields = fields
+        self.columns = {field: [None] * rows for field in fields}
+        self.valid = bytearray(rows)
+        self.errors = {}
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.valid)
+
+    def to_dict(self, separator: str = ":") -> dict[str, list]:
+        """
+        Return the columns keyed by name, ready to build a dataframe.
+
+        Parameters
+        ----------
+        separator : str
+            The separator between the pattern and the identifier in the names.
+
+        Returns
+        -------
+        dict[str, list]
+            The columns keyed by `pattern{separator}identifier`. The lists are
+            the columns themselves, not copies.
+
+        """
+        return {f"{pattern}{separator}{identifier}": column for (pattern, identifier), column in self.columns.items()}
+
+
+def _extract_chunk(matcher: DictMatcher, template, partial_match: bool, columns: CaptureColumns, chunk: tuple) -> None:
+    """Match a chunk of documents, writing the captures of each row straight into the columns."""
+    start, documents = chunk
+    for row, document in enumerate(documents, start=start):
+        state = matcher._new_state(partial_match)
+        try:
+            matcher._match_root(template, document, state)
+        except DictPatternError as error:
+            columns.errors[row] = error
+            continue
+        values = state.values
+        for (pattern, identifier), column in columns.columns.items():
+            column[row] = values[pattern].get(identifier)
+        columns.valid[row] = 1
+
+
+def extract_columns(
+    matcher: DictMatcher, template, documents, partial_match: bool = False, *, executor: Executor = None
+) -> CaptureColumns:
+    r"""
+    Match many documents against a template, returning the captures column-wise.
+
+    The columns are allocated once for the whole batch, and the captures of
+    every document are written straight into them, without building a list of
+    per-document values dictionaries.
+
+    Parameters
+    ----------
+    matcher : DictMatcher
+        The matcher shared by every worker thread.
+    template : dict or CompiledTemplate
+        The template to match, compiled once for the whole batch.
+    documents : iterable
+        The documents to match.
+    partial_match : bool
+        Whether to allow partial matching of the template.
+    executor : concurrent.futures.Executor, optional
+        A thread pool executor matching the documents, in chunks of
+        `BATCH_CHUNK_SIZE`. When omitted, the documents are matched in the
+        calling thread.
+
+    Returns
+    -------
+    CaptureColumns
+        One column per identified placeholder of the template, and a
+        validity mask for the rows.
+
+    Examples
+    --------
+    >>> columns = extract_columns(
+    ...     DictMatcher({'id': r'\\d+'}), {'id': '{id:order_id}'}, [{'id': '1'}, {'id': 'x'}, {'id': '3'}]
+    ... )
+    >>> columns.columns[('id', 'order_id')], list(columns.valid)
+    (['1', None, '3'], [1, 0, 1])
+    >>> pandas.DataFrame(columns.to_dict())  # doctest: +SKIP
+
+    """
+    plan = matcher._plan(template)
+    documents = documents if isinstance(documents, list) else list(documents)
+    columns = CaptureColumns(plan.fields(), len(documents))
+    extract_chunk = partial(_extract_chunk, matcher, plan, partial_match, columns)
+
+    chunks = [
+        (start, documents[start : start + BATCH_CHUNK_SIZE]) for start in range(0, len(documents), BATCH_CHUNK_SIZE)
+    ]
+    if executor is None:
+        for chunk in chunks:
+            extract_chunk(chunk)
+    else:
+        for future in [executor.submit(extract_chunk, chunk) for chunk in chunks]:
+            future.result()
+    return columns
@@ -0,0 +1,165 @@
+"""
+Lazy references to the substrings captured by pattern placeholders.
+
+A placeholder can capture a very large substring, such as a base64 payload of
+several megabytes. Instead of copying it with `match.group`, the matcher
+stores a Capture referencing the matched string and the span of the capture,
+and the values dictionaries of a match create the substring only when it is
+read. Consistency checks compare captures without creating substrings.
+"""
+
+# Captures shorter than this are copied right away, a reference costs about as much as a short string
+LAZY_CAPTURE_LENGTH = 256
+
+# Number of characters compared at once when two captures are compared
+COMPARE_CHUNK_LENGTH = 65536
+
+
+class Capture:
+    """
+    A substring of a matched string, created only when read.
+
+    Captures compare equal to the strings and captures with the same text. The
+    lengths are compared first, and the contents are compared in place with
+    `str.startswith`, so no copy of the captured text is made (two captures
+    are compared by chunks of `COMPARE_CHUNK_LENGTH` characters).
+
+    Parameters
+    ----------
+    source : str
+        The matched string.
+    start : int
+        The start of the capture in `source`.
+    end : int
+        The end of the capture in `source`.
+
+    """
+
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: str, start: int, end: int):
+        """Initialize the capture with its source string and span."""
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self) -> str:
+        """The captured text, created on every read."""
+        return self.source[self.start : self.end]
+
+    def __len__(self) -> int:
+        """Return the length of the captured text."""
+        return self.end - self.start
+
+    def __eq__(self, other) -> bool:
+        """Compare the captured text with a string or another capture, without copying it."""
+        if isinstance(other, str):
+            return len(other) == self.end - self.start and self.source.startswith(other, self.start, self.end)
+        if not isinstance(other, Capture):
+            return NotImplemented
+        length = self.end - self.start
+        if length != other.end - other.start:
+            return False
+        if self.source is other.source and self.start == other.start:
+            return True
+        for offset in range(0, length, COMPARE_CHUNK_LENGTH):
+            chunk = other.source[other.start + offset : other.start + min(length, offset + COMPARE_CHUNK_LENGTH)]
+            if not self.source.startswith(chunk, self.start + offset):
+                return False
+        return True
+
+    def __hash__(self) -> int:
+        """Return the hash of the captured text."""
+        return hash(self.text)
+
+    def __str__(self) -> str:
+        """Return the captured text."""
+        return self.text
+
+    def __repr__(self) -> str:
+        """Return the representation of the captured text."""
+        return repr(self.text)
+
+
+def capture_value(value):
+    """Return the value of a capture, or the value itself when it is not a Capture."""
+    return value.text if isinstance(value, Capture) else value
+
+
+class CaptureValues(dict):
+    """
+    The values captured for the identifiers of one pattern.
+
+    Values may be stored as Captures. Reading them, by key or through `get`,
+    `items`, `values`, copies or iteration over items, replaces them with
+    their text, so the substrings of the values never read are never created.
+    Matchers read the stored values with `dict.__getitem__`, which does not
+    create them.
+    """
+
+    __slots__ = ()
+
+    def _materialize(self) -> None:
+        """Replace every Capture by its text."""
+        for key, value in dict.items(self):
+            if isinstance(value, Capture):
+                dict.__setitem__(self, key, value.text)
+
+    def __getitem__(self, identifier):
+        """Return the value of an identifier, creating its text if it is a Capture."""
+        value = dict.__getitem__(self, identifier)
+        if isinstance(value, Capture):
+            value = value.text
+            dict.__setitem__(self, identifier, value)
+        return value
+
+    def get(self, identifier, default=None):
+        """Return the value of an identifier, or `default` if it is not bound."""
+        if identifier not in self:
+            return default
+        return self[identifier]
+
+    def __iter__(self):
+        """Iterate over the identifiers."""
+        # Overriding iteration makes `dict(values)` and `{**values}` read the values through `__getitem__`
+        return dict.__iter__(self)
+
+    def items(self):
+        """Return the identifiers and their values."""
+        self._materialize()
+        return dict.items(self)
+
+    def values(self):
+        """Return the values."""
+        self._materialize()
+        return dict.values(self)
+
+    def copy(self) -> dict:
+        """Return a plain dictionary of the identifiers and their values."""
+        self._materialize()
+        return dict(dict.items(self))
+
+    def pop(self, identifier, *default):
+        """Remove an identifier and return its value."""
+        return capture_value(dict.pop(self, identifier, *default))
+
+    def popitem(self) -> tuple:
+        """Remove the last bound identifier and return it with its value."""
+        identifier, value = dict.popitem(self)
+        return identifier, capture_value(value)
+
+    def setdefault(self, identifier, default=None):
+        """Return the value of an identifier, binding it to `default` first if it is not bound."""
+        if identifier not in self:
+            dict.__setitem__(self, identifier, default)
+        return self[identifier]
+
+    def __repr__(self) -> str:
+        """Return the representation of the identifiers and their values."""
+        self._materialize()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        """Pickle the values with their text."""
+        return CaptureValues, (self.copy(),)
@@ -0,0 +1,346 @@
+"""
+Command-line entry point: match JSON documents against a template file.
+
+Documents are read lazily from JSON or JSONL files (or stdin), matched in
+chunks, optionally by several worker processes, and reported one by one. The
+run ends with a summary of the throughput, the failures by exception class and,
+on request, the template paths where most of the matching time was spent.
+Timing every template path costs about as much as the matching itself, so it
+is disabled by default and the summary tells when the throughput includes it.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .dict_matcher import DictMatcher, MatchState
+from .exceptions import DictPatternError
+from .loader import TemplateLoader
+from .scanner import scan_jsonl
+
+CLI_CHUNK_SIZE = 256
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+LIST_INDEX_REGEX = re.compile(r"\[\d+\]")
+
+
+class _ProfilingMatcher(DictMatcher):
+    """
+    Matcher recording the time spent matching each template path.
+
+    Times are exclusive of the nested values, and list indices are folded into
+    `[*]`. The timings are kept on the matcher, so it must not be shared by
+    threads; the CLI uses one matcher per process.
+    """
+
+    def __init__(self, pattern_handlers: dict):
+        super().__init__(pattern_handlers)
+        self.path_times = defaultdict(float)
+        self._nested_times = [0.0]
+
+    def _match_value(self, template_value, actual_value, path: str, state: MatchState) -> None:
+        start = time.perf_counter()
+        self._nested_times.append(0.0)
+        try:
+            super()._match_value(template_value, actual_value, path, state)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested_times.pop()
+            self._nested_times[-1] += elapsed
+            self.path_times[LIST_INDEX_REGEX.sub("[*]", path)] += elapsed - nested
+
+
+_worker = {}
+
+
+def _init_worker(pattern_handlers: dict, template, partial_match: bool, profile: bool) -> None:
+    """Create the matcher used by the current process."""
+    _worker["matcher"] = (_ProfilingMatcher if profile else DictMatcher)(pattern_handlers)
+    _worker["template"] = template
+    _worker["partial_match"] = partial_match
+
+
+def _check_chunk(chunk: list) -> tuple[list, dict]:
+    """
+    Parse and match a chunk of `(source, text)` documents.
+
+    Returns one `(source, values, error)` result per document, where `error`
+    is None or an `(exception class, message, path)` tuple, and the path
+    timings recorded while matching the chunk.
+    """
+    matcher = _worker["matcher"]
+    results = []
+    for source, text in chunk:
+        try:
+            values = matcher.match(_worker["template"], json.loads(text), _worker["partial_match"])
+        except (DictPatternError, ValueError) as error:
+            results.append((source, None, _error_details(error)))
+        else:
+            results.append((source, values, None))
+    path_times = getattr(matcher, "path_times", {})
+    timings = dict(path_times)
+    path_times.clear()
+    return results, timings
+
+
+def _read_documents(inputs: list, input_format: str):
+    """Yield `(source, text)` for every document of the inputs, reading files lazily."""
+    for name in inputs or ["-"]:
+        is_stdin = name == "-"
+        jsonl = input_format == "jsonl" or (
+            input_format == "auto" and (is_stdin or Path(name).suffix.lower() in JSONL_SUFFIXES)
+        )
+        label = "<stdin>" if is_stdin else name
+        stream = sys.stdin if is_stdin else open(name, encoding="utf-8")  # noqa: SIM115
+        try:
+            if not jsonl:
+                yield label, stream.read()
+                continue
+            for line_number, line in enumerate(stream, start=1):
+                if line.strip():
+                    yield f"{label}:{line_number}", line
+        finally:
+            if not is_stdin:
+                stream.close()
+
+
+def _chunked(items, size: int):
+    """Group an iterable into lists of at most `size` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _run_chunks(chunks, jobs: int, initargs: tuple):
+    """Yield the results of every chunk in order, on `jobs` processes."""
+    if jobs == 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            yield _check_chunk(chunk)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs)
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(_check_chunk, chunk))
+            # Keep a bounded number of chunks in flight, so inputs are never read entirely
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _scan_files(args: argparse.Namespace, pattern_handlers: dict, template):
+    """Yield the results of memory-mapped scans of the input files, in chunks, without path timings."""
+    matcher = DictMatcher(pattern_handlers)
+    for name in args.inputs:
+        scan = scan_jsonl(matcher, template, name, args.partial, stop_on_error=args.fail_fast, max_workers=args.jobs)
+        results = (
+            (f"{name}:{line_number}", result.values if result.ok else None, _error_details(result.error))
+            for line_number, result in scan
+        )
+        for chunk in _chunked(results, CLI_CHUNK_SIZE):
+            yield chunk, {}
+
+
+def _file_error(name: str, error: Exception | str) -> str:
+    """Return the one-line message reporting a file that cannot be used."""
+    reason = error.strerror if isinstance(error, OSError) and error.strerror else error
+    return f"dict-patterns: error: {name}: {reason}\n"
+
+
+def _load_handlers(parser: argparse.ArgumentParser, name: str) -> dict:
+    """Read the pattern handlers file, exiting with a one-line message when it cannot be used."""
+    try:
+        pattern_handlers = json.loads(Path(name).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as error:
+        parser.exit(2, _file_error(name, error))
+    if not isinstance(pattern_handlers, dict):
+        parser.exit(2, _file_error(name, "expected a JSON object mapping pattern names to regexes"))
+    return pattern_handlers
+
+
+def _error_details(error: Exception | None) -> tuple | None:
+    """Return the `(exception class, message, path)` reported for an error."""
+    if error is None:
+        return None
+    return type(error).__name__, str(error), getattr(error, "path", None)
+
+
+def _until_first_failure(results: list) -> list:
+    """Return the results up to and including the first failure."""
+    for index, (_, _, error) in enumerate(results):
+        if error is not None:
+            return results[: index + 1]
+    return results
+
+
+class _Summary:
+    """Counters reported at the end of a run."""
+
+    def __init__(self):
+        self.documents = 0
+        self.failures = Counter()
+        self.path_times = defaultdict(float)
+        self.start = time.perf_counter()
+        # Whether the matching was timed per template path, which the throughput includes
+        self.profiled = False
+
+    def add(self, results: list, timings: dict) -> None:
+        self.documents += len(results)
+        self.failures.update(error[0] for _, _, error in results if error is not None)
+        self.profiled = self.profiled or bool(timings)
+        for path, seconds in timings.items():
+            self.path_times[path] += seconds
+
+    def to_data(self, slowest: int) -> dict:
+        elapsed = time.perf_counter() - self.start
+        paths = sorted(self.path_times.items(), key=lambda item: item[1], reverse=True)[:slowest]
+        return {
+            "documents": self.documents,
+            "failed": sum(self.failures.values()),
+            "seconds": elapsed,
+            "documents_per_second": self.documents / elapsed if elapsed else 0.0,
+            "profiled": self.profiled,
+            "failures": dict(self.failures.most_common()),
+            "slowest_paths": [{"path": path, "seconds": seconds} for path, seconds in paths],
+        }
+
+
+def _print_result(result: tuple, output_json: bool, verbose: bool) -> None:
+    source, values, error = result
+    if output_json:
+        record = {"source": source, "ok": error is None}
+        if error is None:
+            record["values"] = values
+        else:
+            record["error"] = {"type": error[0], "message": error[1], "path": error[2]}
+        print(json.dumps(record, ensure_ascii=False))
+    elif error is not None:
+        print(f"{source}: {error[0]}: {error[1]}")
+    elif verbose:
+        print(f"{source}: ok")
+
+
+def _print_summary(summary: dict, output_json: bool) -> None:
+    if output_json:
+        print(json.dumps({"summary": summary}))
+        return
+    profiled = ", timing template paths" if summary["profiled"] else ""
+    print(
+        f"Checked {summary['documents']} documents in {summary['seconds']:.3f}s "
+        f"({summary['documents_per_second']:.1f} documents/sec{profiled}), {summary['failed']} failed"
+    )
+    for error_type, count in summary["failures"].items():
+        print(f"  {error_type}: {count}")
+    if summary["slowest_paths"]:
+        print("Slowest template paths:")
+        for entry in summary["slowest_paths"]:
+            print(f"  {entry['path']}: {entry['seconds']:.6f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the `dict-patterns` command."""
+    parser = argparse.ArgumentParser(
+        prog="dict-patterns", description="Match JSON documents against a dict-patterns template."
+    )
+    parser.add_argument("template", help="JSON template file")
+    parser.add_argument("handlers", help="JSON file mapping pattern names to regexes")
+    parser.add_argument("inputs", nargs="*", help="JSON or JSONL files to check, '-' or nothing for stdin")
+    parser.add_argument(
+        "--format",
+        choices=["auto", "json", "jsonl"],
+        default="auto",
+        help="input format; auto reads .jsonl/.ndjson files and stdin as JSONL and other files as one document",
+    )
+    parser.add_argument("--partial", action="store_true", help="allow extra keys in the documents")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--fail-fast", action="store_true", help="stop at the first failing document")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per document and for the summary")
+    parser.add_argument("--verbose", "-v", action="store_true", help="also report documents that matched")
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=0,
+        help=(
+            "number of slowest template paths to report; timing them slows matching down, 0 (default) disables it, "
+            "not available with --mmap"
+        ),
+    )
+    parser.add_argument("--cache-dir", help="directory caching the compiled template")
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="memory-map the JSONL input files and scan byte ranges of each file on the worker processes",
+    )
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """
+    Run the `dict-patterns` command.
+
+    Parameters
+    ----------
+    argv : list, optional
+        The command-line arguments, `sys.argv[1:]` by default.
+
+    Returns
+    -------
+    int
+        The exit status: 0 when every document matched, 1 when any failed.
+        Unusable arguments or files exit with status 2 and a one-line message.
+
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be a positive integer")
+    if args.mmap and (not args.inputs or "-" in args.inputs):
+        parser.error("--mmap needs input files")
+    if args.mmap and args.slowest > 0:
+        # Memory-mapped scans match on DictMatchers, which do not time template paths
+        parser.error("--slowest cannot be used with --mmap")
+
+    pattern_handlers = _load_handlers(parser, args.handlers)
+    try:
+        template = TemplateLoader(pattern_handlers, args.cache_dir).load(args.template)
+    except (DictPatternError, OSError, ValueError) as error:
+        parser.exit(2, _file_error(args.template, error))
+
+    summary = _Summary()
+    if args.mmap:
+        batches = _scan_files(args, pattern_handlers, template)
+    else:
+        initargs = (pattern_handlers, template, args.partial, args.slowest > 0)
+        batches = _run_chunks(_chunked(_read_documents(args.inputs, args.format), CLI_CHUNK_SIZE), args.jobs, initargs)
+
+    try:
+        for chunk_results, timings in batches:
+            results = _until_first_failure(chunk_results) if args.fail_fast else chunk_results
+            summary.add(results, timings)
+            for result in results:
+                _print_result(result, args.json, args.verbose)
+            if args.fail_fast and summary.failures:
+                break
+    except (OSError, UnicodeDecodeError) as error:
+        parser.exit(2, _file_error(getattr(error, "filename", None) or "input", error))
+
+    _print_summary(summary.to_data(args.slowest), args.json)
+    return 1 if summary.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
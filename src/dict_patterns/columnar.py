@@ -0,0 +1,215 @@
+r"""
+Column-batched matching of large lists.
+
+When every element of a list is checked by the same flat template, the values
+found at the same key of every element (a column) are checked together: the
+strings of a pattern column are joined into one buffer, separated by a
+character that none of them contains, and matched with a single `finditer`
+call, and literal columns are compared with a single `list.count`. Only when
+every column passes are the captured identifiers bound, once for the whole
+list. A list failing any column check is matched again element by element, so
+the error and its path are the ones a DictMatcher reports.
+"""
+
+import re
+from itertools import accumulate
+
+from dict_patterns.arrays import is_array
+from dict_patterns.compiled import ListNode, PatternNode
+from dict_patterns.dict_matcher import PLAIN_VALUE_TYPES, DictMatcher, MatchBudget, MatchState, _captures_equal
+
+# Separates the strings of a column in the joined buffer
+COLUMN_SEPARATOR = "\x00"
+
+# Plan node kinds a column can be checked for
+COLUMN_KINDS = {"literal", "pattern", "any"}
+
+
+def _has_array(column: list) -> bool:
+    """Return whether any value of a column is an array."""
+    return any(type(value) not in PLAIN_VALUE_TYPES and is_array(value) for value in column)
+
+
+def _same_check(node, expected) -> bool:
+    """Return whether two plan nodes check a value the same way."""
+    if node is expected or node.kind != expected.kind:
+        return node is expected
+    if node.kind == "literal":
+        return node.value == expected.value
+    return node.kind == "any" and node.types == expected.types
+
+
+def _column_nodes(template: ListNode) -> dict | None:
+    """
+    Return the nodes checking the columns of a list template, or None if its elements cannot be checked by column.
+
+    The elements must be dictionaries with the same literal keys, whose values
+    are the same literal, pattern or AnyValue nodes in every element, or they
+    must all be the same str pattern node, which is returned under the None key.
+    """
+    first = template.items[0]
+    # Plan nodes compare by identity, so this counts the elements sharing the node of the first one
+    shared = template.items.count(first) == len(template.items)
+    if first.kind == "pattern":
+        return {None: first} if shared and not first.binary else None
+    if (
+        first.kind != "dict"
+        or first.pattern_children
+        or any(child.kind not in COLUMN_KINDS or getattr(child, "binary", False) for child in first.children.values())
+    ):
+        return None
+    if shared:
+        return first.children
+
+    children = first.children
+    for item in template.items:
+        if item.kind != "dict" or item.pattern_children or item.children.keys() != children.keys():
+            return None
+        if not all(_same_check(child, children[key]) for key, child in item.children.items()):
+            return None
+    return children
+
+
+class ColumnarDictMatcher(DictMatcher):
+    r"""
+    A DictMatcher checking large lists of uniform elements column by column.
+
+    Lists with at least `min_length` elements whose elements are all checked
+    by the same flat template (a dictionary of literal keys whose values are
+    literals, pattern strings or AnyValue sentinels, or a single pattern
+    string) are checked by column. The distinct strings of every pattern
+    column are matched with a single `finditer` over a joined buffer, and
+    every identifier must capture the same value in all the elements. The
+    captured identifiers are then bound once for the whole list.
+
+    Lists with any failing column, and lists of other templates, are matched
+    element by element as usual, so errors, their paths and the captured
+    values are always the same as with a DictMatcher. Matches with a budget
+    are never checked by column. Pattern regexes using lookarounds or anchors
+    of their own may see the neighbouring strings of the buffer and should not
+    be used with this matcher.
+
+    Parameters
+    ----------
+    pattern_handlers : dict
+        A dictionary mapping pattern names to their corresponding regex patterns.
+    min_length : int
+        The minimum number of elements of the lists checked by column.
+    budget : MatchBudget, optional
+        The resource limits of every match.
+
+    Examples
+    --------
+    >>> matcher = ColumnarDictMatcher({'id': r'\\d+', 'name': r'[a-z]+'}, min_length=100)
+    >>> template = {'items': [{'id': '{id}', 'name': '{name}', 'type': 'item'}] * 100_000}
+    >>> matcher.match(template, document)  # doctest: +SKIP
+
+    """
+
+    def __init__(self, pattern_handlers: dict, min_length: int = 32, budget: MatchBudget = None):
+        """Initialize the matcher with pattern handlers and the minimum length of the lists checked by column."""
+        super().__init__(pattern_handlers, budget)
+        self.min_length = min_length
+        self._column_regexes = {}
+
+    def _match_items(self, template: ListNode, actual: list, path: str, state: MatchState) -> None:
+        """Match the elements of two lists of the same length, by column when possible."""
+        if len(actual) < self.min_length or state.budget is not None or not template.items:
+            super()._match_items(template, actual, path, state)
+            return
+        columns = _column_nodes(template)
+        if columns is None or not self._match_columns(columns, actual, path, state):
+            super()._match_items(template, actual, path, state)
+
+    def _match_columns(self, columns: dict, actual: list, path: str, state: MatchState) -> bool:
+        """Check a list by column, binding its identifiers and returning True only if every column passes."""
+        if None in columns:
+            captures = self._check_column(columns[None], actual)
+            return captures is not None and self._bind_captures([(f"{path}[0]", captures)], state)
+
+        keys = columns.keys()
+        if state.partial_match:
+            uniform = all(isinstance(element, dict) and element.keys() >= keys for element in actual)
+        else:
+            uniform = all(isinstance(element, dict) and element.keys() == keys for element in actual)
+        if not uniform:
+            return False
+
+        captured = []
+        for key, node in columns.items():
+            column = [element[key] for element in actual]
+            if node.kind == "literal":
+                # NumPy arrays compare element-wise, so a column holding one is matched element by element
+                if _has_array(column) or column.count(node.value) != len(column):
+                    return False
+            elif node.kind == "any":
+                if node.types and not all(isinstance(value, node.types) for value in column):
+                    return False
+            else:
+                captures = self._check_column(node, column)
+                if captures is None:
+                    return False
+                captured.append((f"{path}[0].{key}", captures))
+        return self._bind_captures(captured, state)
+
+    def _check_column(self, node: PatternNode, column: list) -> list | None:
+        """
+        Match the strings of a column in one pass.
+
+        Returns the `(pattern, identifier, value)` captured by the column,
+        where every identifier captured the same value in every string, or None
+        if any string does not match or identifiers captured different values.
+        """
+        if not all(isinstance(value, str) for value in column):
+            return None
+        strings = list(dict.fromkeys(column))
+        buffer = COLUMN_SEPARATOR.join(strings) + COLUMN_SEPARATOR
+        if buffer.count(COLUMN_SEPARATOR) != len(strings):
+            # Some string contains the separator, the column cannot be split reliably
+            return None
+
+        regex = self._column_regexes.get(node.source)
+        if regex is None:
+            # compile_template anchors the whole template, the batch regex ends at a separator instead
+            core = node.source.removeprefix("^").removesuffix("$")
+            regex = self._column_regexes[node.source] = re.compile(f"(?:{core})(?={COLUMN_SEPARATOR})")
+
+        starts = dict(zip(accumulate((len(value) + 1 for value in strings), initial=0), strings, strict=False))
+        matches = []
+        for match in regex.finditer(buffer):
+            # A match not covering exactly one string means some string cannot be matched alone
+            value = starts.get(match.start())
+            if value is None or match.end() - match.start() != len(value):
+                return None
+            matches.append(match)
+        if len(matches) != len(strings):
+            return None
+
+        captures = []
+        for group, (pattern, identifier) in enumerate(node.fields, start=1):
+            if identifier is None:
+                continue
+            values = {match.group(group) for match in matches}
+            if len(values) != 1:
+                return None
+            captures.append((pattern, identifier, values.pop()))
+        return captures
+
+    def _bind_captures(self, captured: list, state: MatchState) -> bool:
+        """Bind the `(path, captures)` of the columns of a list if they agree with the known values."""
+        bindings = {}
+        for path, captures in captured:
+            for pattern, identifier, value in captures:
+                known = state.values[pattern]
+                if identifier in known:
+                    previous = dict.__getitem__(known, identifier)
+                else:
+                    previous = bindings.get((pattern, identifier), (value,))[0]
+                if previous != value and not _captures_equal(previous, value):
+                    return False
+                bindings.setdefault((pattern, identifier), (value, path))
+        # Nothing is bound before every check passed, the list is matched again element by element otherwise
+        for (pattern, identifier), (value, path) in bindings.items():
+            if identifier not in state.values[pattern]:
+                self._bind(pattern, identifier, value, path, state)
+        return True
@@ -0,0 +1,740 @@
+"""
+Compiled template plans for dictionary pattern matching.
+
+A template is analysed once into a tree of plan nodes: dictionaries and lists
+become container nodes, and every string is classified either as a literal or
+as a placeholder pattern carrying its regex source and captured fields. The
+DictMatcher walks these nodes instead of re-analysing the template strings on
+every match.
+
+Plans only contain plain data, so they can be serialised with `to_data` and
+restored with `CompiledTemplate.from_data` without analysing the template again.
+"""
+
+import hashlib
+import json
+import re
+
+from .explain import TemplateExplanation, explain_node
+from .patterns import MASTER_PATTERN_BYTES_REGEX, MASTER_PATTERN_REGEX, bind_template, compile_template
+from .sentinels import AnyValue, Unique
+
+# Types an AnyValue can be restricted to and still be serialised with `to_data`
+SERIALISABLE_ANY_TYPES = {value_type.__name__: value_type for value_type in (dict, list, str, bytes, int, float, bool)}
+SERIALISABLE_ANY_TYPES["NoneType"] = type(None)
+
+PLAN_FORMAT_VERSION = 4
+
+# Types of template values that are always literals
+SCALAR_TYPES = frozenset((int, float, bool, type(None)))
+
+# Types of literals whose equal values can differ, e.g. 0.0 and -0.0, or (1,) and (True,)
+REPR_KEYED_TYPES = (float, complex, tuple, frozenset)
+
+# Finds a byte that is not ASCII, meaning a bytes-like value cannot be matched as is against a str regex
+NON_ASCII_BYTES_REGEX = re.compile(rb"[\x80-\xff]")
+
+
+def handlers_fingerprint(pattern_handlers: dict) -> str:
+    """
+    Return a stable fingerprint for a set of pattern handlers.
+
+    Two handler dictionaries with the same names and regexes produce the same
+    fingerprint regardless of their insertion order.
+
+    Parameters
+    ----------
+    pattern_handlers : dict
+        Dictionary mapping pattern names to regex patterns.
+
+    Returns
+    -------
+    str
+        A hexadecimal SHA-256 digest.
+
+    """
+    payload = json.dumps(sorted(pattern_handlers.items()), default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LiteralNode:
+    """Plan node for a value that is compared with plain equality."""
+
+    kind = "literal"
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        """Initialize the node with the literal template value."""
+        self.value = value
+
+    @property
+    def template(self):
+        """The template value this node was compiled from."""
+        return self.value
+
+
+class PatternNode:
+    """Plan node for a string (or bytes) template containing pattern placeholders."""
+
+    kind = "pattern"
+    __slots__ = ("template", "source", "fields", "binary", "_regex", "_bytes_regex")
+
+    def __init__(self, template: str | bytes, source: str | bytes, fields: list, regex: re.Pattern = None):
+        """Initialize the node with the template string, its regex source and its fields."""
+        self.template = template
+        self.source = source
+        self.fields = fields
+        # Whether the template itself is a bytes template
+        self.binary = isinstance(template, bytes)
+        self._regex = regex
+        self._bytes_regex = None
+
+    @property
+    def regex(self) -> re.Pattern:
+        """The compiled regex, compiled from `source` on first use."""
+        if self._regex is None:
+            self._regex = re.compile(self.source)
+        return self._regex
+
+    @property
+    def bytes_regex(self) -> re.Pattern:
+        """A bytes version of `regex`, used to match bytes-like values against str templates."""
+        if self.binary:
+            return self.regex
+        if self._bytes_regex is None:
+            self._bytes_regex = re.compile(self.source.encode("utf-8"))
+        return self._bytes_regex
+
+    def match_bytes(self, view: memoryview) -> tuple[re.Match | None, bool]:
+        r"""
+        Match a bytes-like value, returning the match and whether it was made on the decoded value.
+
+        ASCII values, and every value of bytes templates, are matched as they
+        are against `bytes_regex`. Other values are decoded as UTF-8 and
+        matched against `regex`, since the bytes regex would count bytes, not
+        characters, and classes like `\w` would not match their non-ASCII
+        characters. Values that are not valid UTF-8 do not match.
+        """
+        if self.binary or not NON_ASCII_BYTES_REGEX.search(view):
+            return self.bytes_regex.match(view), False
+        try:
+            text = str(view, "utf-8")
+        except UnicodeDecodeError:
+            return None, True
+        return self.regex.match(text), True
+
+
+class AnyNode:
+    """Plan node for an AnyValue, matching any value of the accepted types without inspecting it."""
+
+    kind = "any"
+    __slots__ = ("types",)
+
+    def __init__(self, types: tuple = ()):
+        """Initialize the node with the types the value must be an instance of, if any."""
+        self.types = types
+
+    @property
+    def template(self) -> AnyValue:
+        """The template value this node was compiled from."""
+        return AnyValue(*self.types)
+
+
+class UniqueNode:
+    """Plan node for a Unique constraint, matching its wrapped node and then checking the value is not a duplicate."""
+
+    kind = "unique"
+    __slots__ = ("node", "scope")
+
+    def __init__(self, node, scope: str = None):
+        """Initialize the node with the wrapped node and the optional scope name."""
+        self.node = node
+        self.scope = scope
+
+    @property
+    def template(self) -> Unique:
+        """The template value this node was compiled from."""
+        return Unique(self.node.template, self.scope)
+
+
+class DictNode:
+    """
+    Plan node for a dictionary template.
+
+    Keys without placeholders are kept in `children` and looked up by hash.
+    Keys with placeholders are kept apart in `pattern_children`, as pairs of
+    the key's PatternNode and the value's node, and are only tested against
+    the keys of the actual dictionary that are not literal template keys.
+    """
+
+    kind = "dict"
+    # Weak references let matchers keep per-node state without keeping the node alive
+    __slots__ = ("children", "pattern_children", "__weakref__")
+
+    def __init__(self, children: dict, pattern_children: list = ()):
+        """Initialize the node with its literal-key children and its pattern-key children."""
+        self.children = children
+        self.pattern_children = list(pattern_children)
+
+    @property
+    def template(self) -> dict:
+        """The template value this node was compiled from."""
+        template = {key: child.template for key, child in self.children.items()}
+        template.update((key.template, child.template) for key, child in self.pattern_children)
+        return template
+
+
+class ListNode:
+    """Plan node for a list template."""
+
+    kind = "list"
+    __slots__ = ("items",)
+
+    def __init__(self, items: list):
+        """Initialize the node with its element nodes."""
+        self.items = items
+
+    @property
+    def template(self) -> list:
+        """The template value this node was compiled from."""
+        return [item.template for item in self.items]
+
+
+def compile_node(template, pattern_handlers: dict, string_cache: dict = None):
+    """
+    Compile a template value into a plan node.
+
+    Identical subtrees of the template are compiled into a single node shared
+    by all of their occurrences, so the plan is a DAG rather than a tree: a
+    list of thousands of structurally identical elements holds one element
+    node. Nodes never record where they occur, the matcher builds the path of
+    every occurrence while walking the document.
+
+    Parameters
+    ----------
+    template
+        The template value: a dictionary, list, string, AnyValue, Unique or any other literal.
+    pattern_handlers : dict
+        Dictionary mapping pattern names to regex patterns.
+    string_cache : dict, optional
+        Cache of already compiled template strings. Strings found in the cache
+        are not analysed again, and newly compiled strings with placeholders
+        are added to it; literal strings are not, so that the cache of a
+        long-lived matcher only grows with the pattern strings it has seen.
+
+    Returns
+    -------
+    LiteralNode | PatternNode | AnyNode | UniqueNode | DictNode | ListNode
+        The compiled plan node.
+
+    Raises
+    ------
+    DictPatternTypeError
+        If a template string uses a pattern not present in `pattern_handlers`.
+
+    """
+    if string_cache is None:
+        string_cache = {}
+    return _compile_node(template, pattern_handlers, string_cache, {})
+
+
+def _compile_node(template, pattern_handlers: dict, string_cache: dict, node_cache: dict):
+    if type(template) in SCALAR_TYPES:
+        return _literal_node(template, node_cache)
+    # Strings are by far the most common template values, they are tested first
+    if isinstance(template, (str, bytes)) and pattern_handlers:
+        node = string_cache.get(template)
+        if node is not None:
+            return node
+        if _has_placeholder(template):
+            node = string_cache[template] = _compile_string(template, pattern_handlers)
+            return node
+    elif isinstance(template, (dict, list)):
+        # The same container object occurring several times is only compiled once
+        node = node_cache.get(id(template))
+        if node is None:
+            node = node_cache[id(template)] = _compile_container(template, pattern_handlers, string_cache, node_cache)
+        return node
+    elif isinstance(template, (AnyValue, Unique)):
+        return _compile_sentinel(template, pattern_handlers, string_cache, node_cache)
+    return _literal_node(template, node_cache)
+
+
+def _compile_sentinel(template: AnyValue | Unique, pattern_handlers: dict, string_cache: dict, node_cache: dict):
+    if isinstance(template, AnyValue):
+        return intern_node(AnyNode(template.types), node_cache)
+    inner = _compile_node(template.template, pattern_handlers, string_cache, node_cache)
+    return intern_node(UniqueNode(inner, template.scope), node_cache)
+
+
+def _literal_node(value, node_cache: dict) -> LiteralNode:
+    key = _literal_key(value)
+    try:
+        node = node_cache.get(key)
+    except TypeError:
+        # Unhashable literal values are not shared
+        return LiteralNode(value)
+    if node is None:
+        node = node_cache[key] = LiteralNode(value)
+    return node
+
+
+def _compile_container(template: dict | list, pattern_handlers: dict, string_cache: dict, node_cache: dict):
+    # Template strings already compiled are looked up inline, saving a call for the most common children
+    if isinstance(template, list):
+        items = [
+            string_cache.get(item) or _compile_node(item, pattern_handlers, string_cache, node_cache)
+            if type(item) is str
+            else _compile_node(item, pattern_handlers, string_cache, node_cache)
+            for item in template
+        ]
+        key = ("list", tuple(items))
+        node = node_cache.get(key)
+        if node is None:
+            node = node_cache[key] = ListNode(items)
+        return node
+    children = {}
+    pattern_children = []
+    for key, value in template.items():
+        node = string_cache.get(value) if type(value) is str else None
+        if node is None:
+            node = _compile_node(value, pattern_handlers, string_cache, node_cache)
+        if isinstance(key, str) and pattern_handlers and "{" in key:
+            key_node = _compile_node(key, pattern_handlers, string_cache, node_cache)
+            if key_node.kind == "pattern":
+                pattern_children.append((key_node, node))
+                continue
+        children[key] = node
+    # Equal keys of different types (1 and True) are distinct templates
+    key = ("dict", tuple(children), tuple(map(type, children)), tuple(children.values()))
+    if pattern_children:
+        key += tuple(pattern_children)
+    node = node_cache.get(key)
+    if node is None:
+        node = node_cache[key] = DictNode(children, pattern_children)
+    return node
+
+
+def _structure_key(node) -> tuple:
+    """
+    Return a key equal for nodes checking values the same way, given that their children are interned.
+
+    `_compile_node` builds the same keys inline, as it interns every node of a template.
+    Literal nodes are keyed by `_literal_key`.
+    """
+    kind = node.kind
+    if kind == "dict":
+        key = (kind, tuple(node.children), tuple(map(type, node.children)), tuple(node.children.values()))
+        return key + tuple(node.pattern_children)
+    if kind == "list":
+        return kind, tuple(node.items)
+    if kind == "unique":
+        return kind, node.node, node.scope
+    if kind == "any":
+        return kind, node.types
+    if kind == "literal":
+        return _literal_key(node.value)
+    return kind, node.template, node.source
+
+
+def _literal_key(value) -> tuple:
+    """
+    Return the intern key of a literal value.
+
+    Equal values of different types (1, 1.0 and True) are distinct templates,
+    and so are signed zeros (0.0 and -0.0), including within tuples, which
+    only their representation tells apart.
+    """
+    if type(value) in REPR_KEYED_TYPES:
+        return "literal", type(value), value, repr(value)
+    return "literal", type(value), value
+
+
+def intern_node(node, node_cache: dict):
+    """
+    Return the node of the cache identical to a new node, adding the node if there is none.
+
+    Nodes are identical when they have the same kind and the same values, and
+    their children are the very same nodes, so a cache only ever used with
+    interned children shares every repeated subtree. The children themselves
+    are part of the keys, compared by identity since nodes do not define
+    equality.
+
+    Parameters
+    ----------
+    node
+        A newly built plan node whose children are interned.
+    node_cache : dict
+        The nodes already interned, by structure.
+
+    Returns
+    -------
+    LiteralNode | PatternNode | AnyNode | UniqueNode | DictNode | ListNode
+        The shared node.
+
+    """
+    try:
+        return node_cache.setdefault(_structure_key(node), node)
+    except TypeError:
+        # Unhashable literal values are not shared
+        return node
+
+
+def _has_placeholder(template: str | bytes) -> bool:
+    """Return whether a template string has a placeholder, i.e. is not compared as a literal."""
+    if isinstance(template, bytes):
+        return b"{" in template and MASTER_PATTERN_BYTES_REGEX.search(template) is not None
+    return "{" in template and MASTER_PATTERN_REGEX.search(template) is not None
+
+
+def _compile_string(template: str | bytes, pattern_handlers: dict):
+    regex, fields = compile_template(template, pattern_handlers)
+    if not fields:
+        # No patterns in template, it is compared as a literal
+        return LiteralNode(template)
+    return PatternNode(template, regex.pattern, fields, regex)
+
+
+def specialize_node(node, pattern_handlers: dict, bound: dict, string_cache: dict):
+    """
+    Specialize a plan node for identifiers whose values are already known.
+
+    Pattern nodes made of a single known placeholder, or only of known
+    placeholders, become literal nodes compared with plain equality. Other
+    pattern nodes using a known identifier get a regex matching its value as an
+    escaped literal. Nodes without known identifiers are shared with the
+    original plan.
+
+    Parameters
+    ----------
+    node
+        The plan node to specialize.
+    pattern_handlers : dict
+        Dictionary mapping pattern names to regex patterns.
+    bound : dict
+        The known values, by `(pattern, identifier)`. Bytes-like values must be
+        given as `bytes`.
+    string_cache : dict
+        Cache of already specialized template strings, keyed by the template
+        string and the known values of its identifiers.
+
+    Returns
+    -------
+    LiteralNode | PatternNode | AnyNode | UniqueNode | DictNode | ListNode
+        The specialized node, or `node` itself when nothing is known about it.
+
+    """
+    return _specialize_node(node, pattern_handlers, bound, string_cache, {})
+
+
+def _specialize_node(node, pattern_handlers: dict, bound: dict, string_cache: dict, memo: dict):
+    kind = node.kind
+    if kind == "pattern":
+        return _specialize_pattern(node, pattern_handlers, bound, string_cache)
+    if kind not in ("dict", "list", "unique"):
+        return node
+    # Subtrees shared by several occurrences are specialized once, and stay shared
+    specialized = memo.get(id(node))
+    if specialized is not None:
+        return specialized
+    if kind == "dict":
+        specialized = _specialize_dict(node, pattern_handlers, bound, string_cache, memo)
+    elif kind == "list":
+        items = [_specialize_node(item, pattern_handlers, bound, string_cache, memo) for item in node.items]
+        changed = any(item is not original for item, original in zip(items, node.items, strict=True))
+        specialized = ListNode(items) if changed else node
+    else:
+        inner = _specialize_node(node.node, pattern_handlers, bound, string_cache, memo)
+        specialized = node if inner is node.node else UniqueNode(inner, node.scope)
+    memo[id(node)] = specialized
+    return specialized
+
+
+def _specialize_dict(node: DictNode, pattern_handlers: dict, bound: dict, string_cache: dict, memo: dict):
+    changed = False
+    children = {}
+    for key, child in node.children.items():
+        children[key] = _specialize_node(child, pattern_handlers, bound, string_cache, memo)
+        changed = changed or children[key] is not child
+    pattern_children = []
+    for key_node, child in node.pattern_children:
+        new_key = _specialize_pattern(key_node, pattern_handlers, bound, string_cache)
+        new_child = _specialize_node(child, pattern_handlers, bound, string_cache, memo)
+        changed = changed or new_key is not key_node or new_child is not child
+        if new_key.kind == "literal":
+            # A key placeholder whose value is known is looked up by hash like any literal key
+            children[new_key.value] = new_child
+        else:
+            pattern_children.append((new_key, new_child))
+    return DictNode(children, pattern_children) if changed else node
+
+
+def _specialize_pattern(node: PatternNode, pattern_handlers: dict, bound: dict, string_cache: dict):
+    known = {field: bound[field] for field in node.fields if field in bound}
+    if not known:
+        return node
+    key = (node.template, tuple(known.items()))
+    specialized = string_cache.get(key)
+    if specialized is None:
+        regex, fields = compile_template(node.template, pattern_handlers, known)
+        if fields:
+            specialized = PatternNode(node.template, regex.pattern, fields, regex)
+        else:
+            # Every placeholder is known, the whole string is compared without any regex
+            specialized = LiteralNode(bind_template(node.template, known))
+        string_cache[key] = specialized
+    return specialized
+
+
+def iter_nodes(node):
+    """Yield a plan node and all of its distinct descendants, depth first in template order."""
+    stack = [node]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        yield node
+        if node.kind == "dict":
+            children = [*node.children.values()]
+            for key_node, child in node.pattern_children:
+                children.extend((key_node, child))
+            stack.extend(reversed(children))
+        elif node.kind == "list":
+            stack.extend(reversed(node.items))
+        elif node.kind == "unique":
+            stack.append(node.node)
+
+
+def node_to_data(node):
+    """Serialise a plan node into JSON-compatible data."""
+    if node.kind == "dict":
+        return [
+            "d",
+            {key: node_to_data(child) for key, child in node.children.items()},
+            [[node_to_data(key), node_to_data(child)] for key, child in node.pattern_children],
+        ]
+    if node.kind == "list":
+        return ["l", [node_to_data(item) for item in node.items]]
+    if node.kind == "any":
+        for value_type in node.types:
+            if SERIALISABLE_ANY_TYPES.get(value_type.__name__) is not value_type:
+                raise ValueError(f"AnyValue type {value_type.__name__} cannot be serialised")
+        return ["a", [value_type.__name__ for value_type in node.types]]
+    if node.kind == "pattern":
+        return ["p", node.template, node.source, [list(field) for field in node.fields]]
+    if node.kind == "unique":
+        return ["u", node_to_data(node.node), node.scope]
+    return ["v", node.value]
+
+
+def node_from_data(data, node_cache: dict = None):
+    """Restore a plan node serialised with `node_to_data`, sharing its identical subtrees again."""
+    if node_cache is None:
+        node_cache = {}
+    tag = data[0]
+    if tag == "d":
+        node = DictNode(
+            {key: node_from_data(child, node_cache) for key, child in data[1].items()},
+            [(node_from_data(key, node_cache), node_from_data(child, node_cache)) for key, child in data[2]],
+        )
+    elif tag == "l":
+        node = ListNode([node_from_data(item, node_cache) for item in data[1]])
+    elif tag == "p":
+        node = PatternNode(data[1], data[2], [tuple(field) for field in data[3]])
+    elif tag == "a":
+        node = AnyNode(tuple(SERIALISABLE_ANY_TYPES[name] for name in data[1]))
+    elif tag == "u":
+        node = UniqueNode(node_from_data(data[1], node_cache), data[2])
+    elif tag == "v":
+        node = LiteralNode(data[1])
+    else:
+        raise ValueError(f"Unknown plan node tag: {tag!r}")
+    return intern_node(node, node_cache)
+
+
+class CompiledTemplate:
+    """
+    A template analysed ahead of time against a set of pattern handlers.
+
+    Compiled templates can be passed to `DictMatcher.match` in place of the raw
+    template, skipping the analysis of template strings.
+
+    Parameters
+    ----------
+    root : LiteralNode | PatternNode | AnyNode | UniqueNode | DictNode | ListNode
+        The root node of the plan.
+    fingerprint : str
+        The fingerprint of the pattern handlers the plan was compiled with.
+    bindings : dict, optional
+        The identifier values the plan was specialized for, organized like the
+        values of a match.
+
+    Attributes
+    ----------
+    root
+        The root node of the plan.
+    fingerprint : str
+        The fingerprint of the pattern handlers the plan was compiled with.
+    bindings : dict or None
+        The identifier values the plan was specialized for. They are added to
+        the values of every match of the plan.
+    digest : str
+        The SHA-1 digest of the representation of the template, computed on
+        first use. Templates with the same representation have the same digest.
+
+    """
+
+    def __init__(self, root, fingerprint: str, bindings: dict = None):
+        """Initialize the compiled template with its root node, handlers fingerprint and bindings."""
+        self.root = root
+        self.fingerprint = fingerprint
+        self.bindings = bindings
+        self._digest = None
+
+    @property
+    def template(self):
+        """The template this plan was compiled from."""
+        return self.root.template
+
+    @property
+    def digest(self) -> str:
+        """The digest of the representation of the template, which is only rebuilt the first time."""
+        if self._digest is None:
+            self._digest = template_digest(self.template)
+        return self._digest
+
+    def fields(self) -> list[tuple[str, str]]:
+        """
+        Return the identified fields captured by the template.
+
+        Returns
+        -------
+        list[tuple[str, str]]
+            The distinct `(pattern, identifier)` pairs of the template's
+            placeholders, including the ones in keys, in template order.
+            Placeholders without identifier are not included.
+
+        """
+        fields = {}
+        for node in iter_nodes(self.root):
+            if node.kind == "pattern":
+                fields.update((field, None) for field in node.fields if field[1] is not None)
+        return list(fields)
+
+    def explain(self) -> TemplateExplanation:
+        r"""
+        Describe how the template is matched and estimate what a match costs.
+
+        Returns
+        -------
+        TemplateExplanation
+            Every node with its path, kind, regex source and captured fields,
+            in match order; the path binding each identifier and the paths
+            checked against it; and a static cost estimate. `str()` renders it
+            as readable text, and `to_data()` as JSON-compatible data.
+
+        Examples
+        --------
+        >>> plan = compile_plan({'id': '{number:id}', 'items': [{'owner': '{number:id}'}]}, {'number': r'\d+'})
+        >>> print(plan.explain())
+        $                 dict
+        $.id              pattern  ^(\d+)$  binds number:id
+        $.items           list
+        $.items[0]        dict
+        $.items[0].owner  pattern  ^(\d+)$  checks number:id (bound at $.id)
+        <BLANKLINE>
+        Identifiers:
+          number:id: bound at $.id, checked at $.items[0].owner
+        <BLANKLINE>
+        Cost: 1 regexes, 2 regex evaluations, at most 5 values visited, depth 3
+
+        """
+        return explain_node(self.root)
+
+    def to_data(self) -> dict:
+        """
+        Serialise the plan into JSON-compatible data.
+
+        Returns
+        -------
+        dict
+            A dictionary with the plan format version, the handlers fingerprint,
+            the serialised node tree and, for specialized plans, the bindings.
+
+        """
+        data = {"version": PLAN_FORMAT_VERSION, "fingerprint": self.fingerprint, "root": node_to_data(self.root)}
+        if self.bindings is not None:
+            data["bindings"] = self.bindings
+        return data
+
+    @classmethod
+    def from_data(cls, data: dict) -> "CompiledTemplate":
+        """
+        Restore a plan serialised with `to_data`.
+
+        Raises
+        ------
+        ValueError
+            If the data was produced by an incompatible plan format version.
+
+        """
+        if data.get("version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported plan format version: {data.get('version')!r}")
+        return cls(node_from_data(data["root"]), data["fingerprint"], data.get("bindings"))
+
+
+def template_digest(template) -> str:
+    """
+    Return the SHA-1 digest of the representation of a raw template.
+
+    Parameters
+    ----------
+    template
+        The raw template.
+
+    Returns
+    -------
+    str
+        A hexadecimal SHA-1 digest, equal for templates with the same representation.
+
+    """
+    return hashlib.sha1(repr(template).encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def compile_plan(
+    template, pattern_handlers: dict, string_cache: dict = None, fingerprint: str = None
+) -> CompiledTemplate:
+    r"""
+    Compile a template into a reusable plan.
+
+    Parameters
+    ----------
+    template
+        The template to compile, usually a dictionary.
+    pattern_handlers : dict
+        Dictionary mapping pattern names to regex patterns.
+    string_cache : dict, optional
+        Cache of already compiled template strings, see `compile_node`.
+    fingerprint : str, optional
+        The fingerprint of the pattern handlers, as returned by
+        `handlers_fingerprint`, for callers keeping it. It is computed when
+        omitted.
+
+    Returns
+    -------
+    CompiledTemplate
+        The compiled template.
+
+    Examples
+    --------
+    >>> plan = compile_plan({'id': '{number:user_id}'}, {'number': r'\\d+'})
+    >>> plan.root.children['id'].fields
+    [('number', 'user_id')]
+
+    """
+    root = compile_node(template, pattern_handlers, string_cache)
+    if fingerprint is None:
+        fingerprint = handlers_fingerprint(pattern_handlers)
+    return CompiledTemplate(root, fingerprint)
@@ -7,14 +7,263 @@ corresponding values in the other object. Matched values are stored and can
 be reused for consistency across multiple matches.
 """
 
+import copy
+import re
+import threading
+import time
+import weakref
+from typing import NamedTuple
+
+from dict_patterns.arrays import array_item, element_type, first_difference, is_array
+from dict_patterns.captures import LAZY_CAPTURE_LENGTH, Capture, CaptureValues, capture_value
+from dict_patterns.compiled import (
+    AnyNode,
+    CompiledTemplate,
+    DictNode,
+    ListNode,
+    LiteralNode,
+    PatternNode,
+    UniqueNode,
+    compile_plan,
+    handlers_fingerprint,
+    specialize_node,
+)
 from dict_patterns.exceptions import (
+    DictKeyAmbiguityError,
     DictKeyMismatchError,
     DictListLengthMismatchError,
+    DictPatternBudgetError,
     DictPatternMatchError,
+    DictPatternTypeError,
+    DictPatternValueDuplicateError,
     DictPatternValueInconsistencyError,
     DictValueMismatchError,
 )
-from dict_patterns.patterns import compile_template
+
+BYTES_LIKE_TYPES = (bytes, bytearray, memoryview)
+
+# Types of actual values which are never arrays, so they are compared without looking for one
+PLAIN_VALUE_TYPES = frozenset((str, int, float, bool, type(None), dict))
+
+# Number of visited nodes between two checks of the deadline of a match
+DEADLINE_CHECK_INTERVAL = 256
+
+# Number of specializations kept per compiled template, and of specialized template strings
+SPECIALIZATION_CACHE_SIZE = 1024
+
+# Number of raw templates matched repeatedly whose plans are kept by a matcher
+RAW_PLAN_CACHE_SIZE = 64
+
+# Tags of the keys of unhashable containers that must be unique, which no actual value can hold
+_DICT_KEY, _LIST_KEY, _SET_KEY = object(), object(), object()
+
+# Splits a path around its last list index, e.g. "$.pages[0].orders[3].id"
+LAST_LIST_INDEX_REGEX = re.compile(r"^(.*)\[\d+\](.*)$")
+
+
+def _slice_capture(match, start: int, end: int) -> memoryview:
+    """Return a group of a match on an immutable buffer as a slice of the buffer."""
+    return match.string[start:end]
+
+
+def _copy_capture(match, start: int, end: int) -> bytes:
+    """Return a group of a match on a mutable buffer as a copy, so it does not keep the buffer locked."""
+    return bytes(match.string[start:end])
+
+
+def _encoded_capture(match, start: int, end: int) -> bytes:
+    """Return a group of a match on a decoded value in its UTF-8 encoding."""
+    return match.string[start:end].encode("utf-8")
+
+
+def _captures_equal(expected, actual) -> bool:
+    """Compare two captured values, treating str and bytes-like captures as UTF-8 equivalents."""
+    expected, actual = capture_value(expected), capture_value(actual)
+    if isinstance(expected, str) is isinstance(actual, str):
+        return expected == actual
+    if isinstance(expected, str):
+        return expected.encode("utf-8") == actual
+    return expected == actual.encode("utf-8")
+
+
+def _unique_key(value):
+    """Return the hash set key of a value that must be unique."""
+    if isinstance(value, BYTES_LIKE_TYPES):
+        # Bytes-like values are compared with str values through their UTF-8 encoding
+        return bytes(value)
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return _structural_key(value)
+
+
+def _structural_key(value):
+    """
+    Return a hashable key of a value that is equal for equal values.
+
+    Unhashable containers are replaced by a tagged tuple of the keys of their
+    items, so dicts that only differ in key order have the same key, and a list
+    never has the same key as a tuple holding the same items.
+    """
+    try:
+        hash(value)
+    except TypeError:
+        pass
+    else:
+        return value
+    if isinstance(value, dict):
+        return (_DICT_KEY, frozenset((key, _structural_key(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return (_LIST_KEY, tuple(map(_structural_key, value)))
+    if isinstance(value, set):
+        return (_SET_KEY, frozenset(map(_structural_key, value)))
+    return repr(value)
+
+
+def unique_scope(path: str, scope: str = None):
+    """
+    Return the key of the hash set holding the unique values of a scope.
+
+    Named scopes are keyed by name. Otherwise the values of the same position
+    in every element of the nearest enclosing list share the set, so the path
+    is keyed by the list path and the position within its elements.
+    """
+    if scope is not None:
+        return ("scope", scope)
+    match = LAST_LIST_INDEX_REGEX.match(path)
+    if match is None:
+        return ("path", path)
+    return ("list", match.group(1), match.group(2))
+
+
+def _key_pattern_candidates(pattern_children: list, key) -> list:
+    """Return an `(index, match)` tuple for every key pattern matching an actual key."""
+    if not isinstance(key, str):
+        return []
+    candidates = []
+    for index, (key_template, _) in enumerate(pattern_children):
+        match = key_template.regex.match(key)
+        if match:
+            candidates.append((index, match))
+    return candidates
+
+
+def _unchanged(snapshot, template) -> bool:
+    """Return whether a template is still equal to its copy, templates that cannot be compared counting as changed."""
+    try:
+        return bool(snapshot == template)
+    except Exception:
+        return False
+
+
+def _binds_identifiers(key_template: PatternNode) -> bool:
+    """Return whether a key pattern captures identifiers, so it must be paired with a single key."""
+    return any(identifier is not None for _, identifier in key_template.fields)
+
+
+def _trim_cache(cache: dict) -> None:
+    """Drop the oldest entries of a cache holding more than `SPECIALIZATION_CACHE_SIZE` entries."""
+    while len(cache) > SPECIALIZATION_CACHE_SIZE:
+        del cache[next(iter(cache))]
+
+
+class MatchBudget(NamedTuple):
+    """
+    Limits on the resources a single match can use.
+
+    Every limit is optional, None meaning unlimited. Exceeding a limit raises
+    a DictPatternBudgetError at the path where it happened.
+
+    Attributes
+    ----------
+    max_nodes : int or None
+        The maximum number of values visited, containers included.
+    max_depth : int or None
+        The maximum number of nested dictionaries and lists, the root
+        container counting as 1.
+    max_string_length : int or None
+        The maximum length of a string (or bytes-like value) matched against a
+        pattern regex.
+    timeout : float or None
+        The maximum duration of the match, in seconds. The deadline is checked
+        every `DEADLINE_CHECK_INTERVAL` visited values, so it cannot interrupt
+        a single long regex search; use `max_string_length` for that.
+
+    """
+
+    max_nodes: int | None = None
+    max_depth: int | None = None
+    max_string_length: int | None = None
+    timeout: float | None = None
+
+
+class MatchState:
+    """
+    Per-call state of a match.
+
+    Everything that changes while a document is being matched lives here, apart
+    from the matcher, so that a single matcher can be used by several threads at
+    the same time.
+
+    Attributes
+    ----------
+    values : dict
+        The values captured so far, organized by pattern name and identifier.
+    partial_match : bool
+        Whether partial matching of the template is allowed.
+    unique_values : dict
+        The hash sets of the values of Unique constraints, by scope, mapping
+        each value to the path it was first seen at.
+    budget : MatchBudget or None
+        The resource limits of the match, if any.
+    nodes : int
+        The number of values visited so far, only counted with a budget.
+    depth : int
+        The current number of nested containers, only counted with a budget.
+    deadline : float or None
+        The `time.monotonic` time the match must end by.
+    origins : dict or None
+        When not None, the paths where identifiers were bound during the match,
+        by `(pattern, identifier)`.
+
+    """
+
+    __slots__ = ("values", "partial_match", "unique_values", "budget", "nodes", "depth", "deadline", "origins")
+
+    def __init__(self, values: dict, partial_match: bool = False, budget: MatchBudget = None):
+        """Initialize the state with an empty values store and the match options."""
+        self.values = values
+        self.partial_match = partial_match
+        self.unique_values = {}
+        self.budget = budget
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+        self.origins = None
+        if budget is not None and budget.timeout is not None:
+            self.deadline = time.monotonic() + budget.timeout
+
+    def visit(self, path: str) -> None:
+        """Count a visited value, checking the node budget and, periodically, the deadline."""
+        self.nodes += 1
+        budget = self.budget
+        if budget.max_nodes is not None and self.nodes > budget.max_nodes:
+            raise DictPatternBudgetError(path, "max_nodes", budget.max_nodes)
+        if self.deadline is not None and self.nodes % DEADLINE_CHECK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise DictPatternBudgetError(path, "timeout", budget.timeout)
+
+    def enter(self, path: str) -> None:
+        """Count a nested container, checking the depth budget. Callers must decrement `depth` when leaving it."""
+        self.depth += 1
+        max_depth = self.budget.max_depth
+        if max_depth is not None and self.depth > max_depth:
+            self.depth -= 1
+            raise DictPatternBudgetError(path, "max_depth", max_depth)
+
+    def check_string(self, value, path: str) -> None:
+        """Check the length of a value about to be matched against a regex."""
+        max_string_length = self.budget.max_string_length
+        if max_string_length is not None and len(value) > max_string_length:
+            raise DictPatternBudgetError(path, "max_string_length", max_string_length)
 
 
 class DictMatcher:
@@ -26,19 +275,33 @@ class DictMatcher:
     corresponding values in the other object. Matched values are stored and can
     be reused for consistency across multiple matches.
 
+    The matcher itself only holds immutable compiled state, and each call to
+    `match` works on its own values store, so one matcher can be shared by
+    several threads.
+
     Parameters
     ----------
     pattern_handlers : dict
         A dictionary mapping pattern names to their corresponding regex patterns.
         For example: {'string': r'[a-zA-Z]+', 'number': r'\\d+'}
+    budget : MatchBudget, optional
+        The resource limits of every match, for untrusted documents. When
+        omitted, matches are unlimited.
 
     Attributes
     ----------
     pattern_handlers : dict
         The pattern handlers dictionary passed during initialization.
+    budget : MatchBudget or None
+        The resource limits of every match.
+    fingerprint : str
+        The fingerprint of the pattern handlers, used to check that compiled
+        templates were compiled with the same handlers.
     values : dict
         A dictionary storing matched values for each pattern type, organized by
-        pattern name and identifier.
+        pattern name and identifier. It holds the values of the most recent call
+        to `match`; when sharing a matcher across threads use the values returned
+        by `match` instead.
 
     Examples
     --------
@@ -56,7 +319,7 @@ class DictMatcher:
 
     """
 
-    def __init__(self, pattern_handlers: dict):
+    def __init__(self, pattern_handlers: dict, budget: MatchBudget = None):
         """
         Initialize the DictMatcher with pattern handlers.
 
@@ -64,22 +327,188 @@ class DictMatcher:
         ----------
         pattern_handlers : dict
             Dictionary mapping pattern names to regex patterns.
+        budget : MatchBudget, optional
+            The resource limits of every match.
 
         """
         self.pattern_handlers = pattern_handlers
-        self.values = {}
-        self.__reset_values()
+        self.budget = budget
+        self.fingerprint = handlers_fingerprint(pattern_handlers)
+        self._string_plans = {}
+        self._raw_plans = {}
+        self._specialized_plans = weakref.WeakKeyDictionary()
+        self._specialized_strings = {}
+        self._specialize_lock = threading.Lock()
+        self.values = self._new_values()
+
+    def _new_values(self) -> dict:
+        """
+        Return an empty values dictionary with an entry for each pattern type.
 
-    def __reset_values(self):
+        This method is called internally to start every match operation from a
+        clean values store.
         """
-        Reset the values dictionary to empty state for each pattern type.
+        return {key: CaptureValues() for key in self.pattern_handlers}
 
-        This method is called internally to clear previous match results
-        before performing a new match operation.
+    def _new_state(self, partial_match: bool) -> MatchState:
+        """Create the per-call state of a match operation."""
+        return MatchState(self._new_values(), partial_match, self.budget)
+
+    def compile(self, template: dict, bindings: dict = None) -> CompiledTemplate:
         """
-        self.values = {key: {} for key in self.pattern_handlers}
+        Compile a template into a plan that can be matched repeatedly.
+
+        Template strings with placeholders already compiled by this matcher
+        are reused, so compiling many templates sharing the same pattern
+        strings only analyses each of them once. Literal strings are not kept,
+        so the cache of a long-lived matcher does not grow with every literal
+        it has seen. The cache is only ever added to, so it is safe to compile
+        from several threads at once.
 
-    def match(self, template: dict, actual: dict, partial_match: bool = False) -> dict:
+        Parameters
+        ----------
+        template : dict
+            The template object that may contain pattern placeholders.
+        bindings : dict, optional
+            Identifier values already known, organized like the values of a
+            match, to specialize the plan for, see `specialize`.
+
+        Returns
+        -------
+        CompiledTemplate
+            The compiled template, which can be passed to `match`.
+
+        Raises
+        ------
+        DictPatternTypeError
+            If the template uses a pattern not present in the pattern handlers.
+
+        """
+        plan = compile_plan(template, self.pattern_handlers, self._string_plans, self.fingerprint)
+        if bindings:
+            return self.specialize(plan, bindings)
+        return plan
+
+    def specialize(self, template: CompiledTemplate, bindings: dict) -> CompiledTemplate:
+        r"""
+        Specialize a compiled template for identifier values already known.
+
+        A placeholder whose identifier is bound and which makes up the whole
+        string becomes a plain equality check, so a different value raises a
+        DictValueMismatchError and no regex is run. In strings mixing text and
+        placeholders, bound placeholders are matched as the escaped literal
+        value by a specialized regex. Parts of the plan without bound
+        identifiers are shared with the original plan, and specializations are
+        cached per template and set of bound values.
+
+        Parameters
+        ----------
+        template : CompiledTemplate
+            A template compiled with the same pattern handlers.
+        bindings : dict
+            The known values, by pattern name and identifier, like the values
+            returned by `match`.
+
+        Returns
+        -------
+        CompiledTemplate
+            The specialized plan. Its `bindings` are added to the values of
+            every match, so they are returned like values captured by the match.
+
+        Raises
+        ------
+        DictPatternTypeError
+            If a binding uses a pattern not present in the pattern handlers.
+        ValueError
+            If a binding conflicts with a binding of the template.
+
+        Examples
+        --------
+        >>> matcher = DictMatcher({'number': r'\d+'})
+        >>> plan = matcher.compile({'user': '{number:user_id}', 'link': '/users/{number:user_id}'})
+        >>> bound = matcher.specialize(plan, {'number': {'user_id': '42'}})
+        >>> bound.root.children['user'].kind, bound.root.children['link'].kind
+        ('literal', 'literal')
+
+        """
+        plan = self._plan(template)
+        bindings = self._merge_bindings(plan.bindings, bindings)
+        bound = {
+            (pattern, identifier): bytes(value) if isinstance(value, BYTES_LIKE_TYPES) else value
+            for pattern, known in bindings.items()
+            for identifier, value in known.items()
+        }
+        with self._specialize_lock:
+            cached = self._specialized_plans.get(plan)
+            if cached is None:
+                cached = self._specialized_plans[plan] = (frozenset(plan.fields()), {})
+            fields, specializations = cached
+            # Bindings of identifiers the template does not use share the same specialized nodes
+            key = tuple(sorted((field, value) for field, value in bound.items() if field in fields))
+            root = specializations.get(key)
+            if root is None:
+                root = specializations[key] = specialize_node(
+                    plan.root, self.pattern_handlers, bound, self._specialized_strings
+                )
+                _trim_cache(specializations)
+                _trim_cache(self._specialized_strings)
+        return CompiledTemplate(root, plan.fingerprint, bindings)
+
+    def _merge_bindings(self, known: dict | None, bindings: dict) -> dict:
+        """Return the union of the bindings of a template and new bindings, checking they agree."""
+        merged = {pattern: dict(values) for pattern, values in (known or {}).items()}
+        for pattern, values in bindings.items():
+            if pattern not in self.pattern_handlers:
+                raise DictPatternTypeError(pattern, list(self.pattern_handlers.keys()))
+            merged_values = merged.setdefault(pattern, {})
+            for identifier, value in values.items():
+                if identifier in merged_values and not _captures_equal(merged_values[identifier], value):
+                    raise ValueError(f"The binding of {pattern}:{identifier} conflicts with the template's bindings")
+                merged_values[identifier] = value
+        return merged
+
+    def _plan(self, template) -> CompiledTemplate:
+        """Return the compiled plan for a raw or already compiled template."""
+        if not isinstance(template, CompiledTemplate):
+            return self._raw_plan(template)
+        if template.fingerprint != self.fingerprint:
+            raise ValueError("The compiled template was compiled with different pattern handlers")
+        return template
+
+    def _raw_plan(self, template) -> CompiledTemplate:
+        """
+        Return the plan of a raw template, reusing it when the same template is matched repeatedly.
+
+        The plan of a template object seen a second time is kept along with a
+        deep copy of the template, and reused as long as the template is equal
+        to its copy, so templates modified in place are compiled again. Plans
+        of the last `RAW_PLAN_CACHE_SIZE` templates are kept, along with the
+        templates themselves, so that their ids are not reused meanwhile.
+        """
+        key = id(template)
+        entry = self._raw_plans.get(key)
+        if entry is not None and entry[0] is template:
+            snapshot, plan = entry[1], entry[2]
+            if plan is not None and _unchanged(snapshot, template):
+                return plan
+            plan = self.compile(template)
+            try:
+                snapshot = copy.deepcopy(template)
+            except Exception:
+                # Templates holding values that cannot be copied are compiled on every match
+                return plan
+            self._raw_plans[key] = (template, snapshot, plan)
+            return plan
+        # Templates seen once are only remembered, so one-off matches do not pay for a copy
+        with self._specialize_lock:
+            self._raw_plans[key] = (template, None, None)
+            if len(self._raw_plans) > RAW_PLAN_CACHE_SIZE:
+                del self._raw_plans[next(iter(self._raw_plans))]
+        return self.compile(template)
+
+    def match(
+        self, template: dict | CompiledTemplate, actual: dict, partial_match: bool = False, bindings: dict = None
+    ) -> dict:
         """
         Match two dictionary objects using pattern templates.
 
@@ -89,14 +518,19 @@ class DictMatcher:
 
         Parameters
         ----------
-        template : dict
-            The template object that may contain pattern placeholders.
+        template : dict or CompiledTemplate
+            The template object that may contain pattern placeholders, or a
+            template previously compiled with the same pattern handlers.
             Keys must match exactly with the right object.
         actual : dict
             The actual object to match against. This object should contain
             concrete values that match the patterns in the left object.
         partial_match : bool
             Whether to allow partial matching of the template.
+        bindings : dict, optional
+            Identifier values already known, e.g. captured by an earlier match,
+            organized like `values`. The template is specialized for them (see
+            `specialize`), and they are part of the returned values.
 
         Raises
         ------
@@ -115,11 +549,20 @@ class DictMatcher:
         'Alice'
 
         """
-        self.__reset_values()
-        self._match(template, actual, "$", partial_match)
-        return self.values
-
-    def _match(self, template: dict, actual: dict, path: str, partial_match: bool = False) -> None:
+        plan = self.specialize(template, bindings) if bindings else self._plan(template)
+        state = self._new_state(partial_match)
+        self.values = state.values
+        self._match_root(plan, actual, state)
+        return state.values
+
+    def _match_root(self, plan: CompiledTemplate, actual, state: MatchState) -> None:
+        """Match a whole document against a compiled plan, starting from the values it was specialized for."""
+        if plan.bindings:
+            for pattern, known in plan.bindings.items():
+                state.values[pattern].update(known)
+        self._match_value(plan.root, actual, "$", state)
+
+    def _match(self, template: DictNode, actual: dict, path: str, state: MatchState) -> None:
         """
         Recursively match nested dictionary objects.
 
@@ -128,15 +571,15 @@ class DictMatcher:
 
         Parameters
         ----------
-        template : dict
-            The template object (left side of comparison).
+        template : DictNode
+            The compiled template node (left side of comparison).
         actual : dict
             The actual object (right side of comparison).
         path : str
             The current path in the dictionary structure for error reporting.
             Uses dot notation (e.g., "$.user.profile.name").
-        partial_match : bool
-            Whether to allow partial matching of the template.
+        state : MatchState
+            The state of the current match operation.
 
         Raises
         ------
@@ -144,91 +587,329 @@ class DictMatcher:
             If objects don't match at any level, with detailed path information.
 
         """
-        if template.keys() != actual.keys() and not partial_match:
-            raise DictKeyMismatchError(path)
+        if template.pattern_children:
+            self._match_with_key_patterns(template, actual, path, state)
+            return
+
+        children = template.children
+        if children.keys() != actual.keys() and not state.partial_match:
+            raise DictKeyMismatchError(path, actual_value=actual, template_node=template)
 
-        for key, template_value in template.items():
+        for key, template_value in children.items():
             if key not in actual:
                 raise DictKeyMismatchError(f"{path}.{key}")
 
             actual_value = actual[key]
             current_path = f"{path}.{key}"
 
-            self._match_value(template_value, actual_value, current_path, partial_match)
+            self._match_value(template_value, actual_value, current_path, state)
+
+    def _match_with_key_patterns(self, template: DictNode, actual: dict, path: str, state: MatchState) -> None:
+        """
+        Match a dictionary whose template has keys with pattern placeholders.
+
+        Literal template keys are looked up by hash first. Only the remaining
+        actual keys are tested against the key patterns, see `_pair_key_patterns`.
+        Key captures are checked for consistency like any other captured value.
+        """
+        children = template.children
+        for key in children:
+            if key not in actual:
+                raise DictKeyMismatchError(f"{path}.{key}")
+
+        paired = self._pair_key_patterns(template, actual, path, state)
+
+        for key, template_value in children.items():
+            self._match_value(template_value, actual[key], f"{path}.{key}", state)
 
-    def _match_value(self, template_value, actual_value, path: str, partial_match: bool = False) -> None:
+        for (key_template, template_value), keys in zip(template.pattern_children, paired, strict=True):
+            for key, match in keys:
+                current_path = f"{path}.{key}"
+                self._extract_pattern_values(match, key_template.fields, current_path, state)
+                self._match_value(template_value, actual[key], current_path, state)
+
+    def _pair_key_patterns(self, template: DictNode, actual: dict, path: str, state: MatchState) -> list:
+        """
+        Pair the key patterns of the template with the actual keys they match.
+
+        A key pattern with identifiers is paired with exactly one actual key,
+        since its identifiers capture a single value. A key pattern without
+        identifiers describes a mapping, e.g. `{uuid}`, and is paired with
+        every actual key it matches, possibly none. With a budget, each key
+        tested against the key patterns counts as a visited value and its
+        length is checked before any regex runs.
+
+        Returns
+        -------
+        list
+            The list of `(key, match)` tuples of each entry of
+            `template.pattern_children`.
+
+        Raises
+        ------
+        DictKeyAmbiguityError
+            If an actual key matches several key patterns, or a key pattern
+            with identifiers matches several actual keys.
+        DictKeyMismatchError
+            If a key pattern with identifiers matches no actual key, or an
+            actual key matches nothing and partial matching is not allowed.
+        DictPatternBudgetError
+            If a key exceeds the budget, reported at the path of the dictionary.
+
+        """
+        children = template.children
+        pattern_children = template.pattern_children
+        paired = [[] for _ in pattern_children]
+        for key in actual:
+            if key in children:
+                continue
+
+            if state.budget is not None and isinstance(key, str):
+                state.visit(path)
+                state.check_string(key, path)
+            candidates = _key_pattern_candidates(pattern_children, key)
+            if len(candidates) > 1:
+                raise DictKeyAmbiguityError(path, key, [pattern_children[index][0].template for index, _ in candidates])
+            if not candidates:
+                if not state.partial_match:
+                    raise DictKeyMismatchError(path)
+                continue
+
+            index, match = candidates[0]
+            keys = paired[index]
+            if keys and _binds_identifiers(pattern_children[index][0]):
+                raise DictKeyAmbiguityError(path, pattern_children[index][0].template, [keys[0][0], key])
+            keys.append((key, match))
+
+        for (key_template, _), keys in zip(pattern_children, paired, strict=True):
+            if not keys and _binds_identifiers(key_template):
+                raise DictKeyMismatchError(f"{path}.{key_template.template}")
+        return paired
+
+    def _match_value(self, template_value, actual_value, path: str, state: MatchState) -> None:
         """
         Match a single value pair based on their types.
 
         Parameters
         ----------
         template_value
-            The template value to match against.
+            The compiled template node to match against.
         actual_value
             The actual value to match.
         path : str
             The current path for error reporting.
-        partial_match : bool
-            Whether to allow partial matching of the template.
+        state : MatchState
+            The state of the current match operation.
 
         """
-        if isinstance(template_value, dict) and isinstance(actual_value, dict):
-            self._match_dict(template_value, actual_value, path, partial_match)
-        elif isinstance(template_value, list) and isinstance(actual_value, list):
-            self._match_list(template_value, actual_value, path, partial_match)
-        elif isinstance(template_value, str) and isinstance(actual_value, str):
-            self._match_string(template_value, actual_value, path)
-        elif template_value != actual_value:
-            raise DictValueMismatchError(path, template_value, actual_value)
-
-    def _match_dict(self, template: dict, actual: dict, path: str, partial_match: bool = False) -> None:
+        if state.budget is not None:
+            state.visit(path)
+        kind = template_value.kind
+        if kind == "dict" and isinstance(actual_value, dict):
+            self._match_dict(template_value, actual_value, path, state)
+        elif kind == "list" and isinstance(actual_value, list):
+            self._match_list(template_value, actual_value, path, state)
+        elif kind == "pattern" and isinstance(actual_value, str) and not template_value.binary:
+            self._match_string(template_value, actual_value, path, state)
+        elif kind == "any":
+            self._match_any(template_value, actual_value, path)
+        elif kind == "unique":
+            self._match_unique(template_value, actual_value, path, state)
+        elif kind == "pattern" and isinstance(actual_value, BYTES_LIKE_TYPES):
+            self._match_bytes(template_value, actual_value, path, state)
+        elif kind == "literal" and isinstance(actual_value, BYTES_LIKE_TYPES):
+            self._match_bytes_literal(template_value, actual_value, path)
+        else:
+            self._match_other(template_value, actual_value, path, state)
+
+    def _match_other(self, template_value, actual_value, path: str, state: MatchState) -> None:
+        """Match an array against a list template, or compare any other value pair for equality."""
+        if type(actual_value) not in PLAIN_VALUE_TYPES and is_array(actual_value):
+            self._match_array(template_value, actual_value, path, state)
+            return
+        template = template_value.template
+        if template != actual_value:
+            raise DictValueMismatchError(path, template, actual_value)
+
+    def _match_bytes_literal(self, template: LiteralNode, actual, path: str) -> None:
+        """Compare a literal with a bytes-like value, encoding str literals as UTF-8."""
+        value = template.value
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if value != actual:
+            raise DictValueMismatchError(path, template.value, actual)
+
+    def _match_dict(self, template: DictNode, actual: dict, path: str, state: MatchState) -> None:
         """Match two dictionary values recursively."""
-        self._match(template, actual, path, partial_match)
+        if state.budget is None:
+            self._match(template, actual, path, state)
+            return
+        state.enter(path)
+        try:
+            self._match(template, actual, path, state)
+        finally:
+            state.depth -= 1
 
-    def _match_list(self, template: list, actual: list, path: str, partial_match: bool = False) -> None:
+    def _match_list(self, template: ListNode, actual: list, path: str, state: MatchState) -> None:
         """Match two list values element by element."""
-        if len(template) != len(actual):
-            raise DictListLengthMismatchError(path)
-
-        for i, (template_item, actual_item) in enumerate(zip(template, actual, strict=True)):
-            self._match_value(template_item, actual_item, f"{path}[{i}]", partial_match)
-
-    def _match_string(self, template: str, actual: str, path: str) -> None:
-        """Match two string values, handling pattern placeholders."""
-        if not self.pattern_handlers:
-            # No pattern handlers, do direct comparison
-            if template != actual:
-                raise DictValueMismatchError(path, template, actual)
+        if len(template.items) != len(actual):
+            raise DictListLengthMismatchError(path, actual_value=actual, template_node=template)
+        if state.budget is None:
+            self._match_items(template, actual, path, state)
             return
+        state.enter(path)
+        try:
+            self._match_items(template, actual, path, state)
+        finally:
+            state.depth -= 1
+
+    def _match_items(self, template: ListNode, actual: list, path: str, state: MatchState) -> None:
+        """Match the elements of two lists of the same length."""
+        for i, (template_item, actual_item) in enumerate(zip(template.items, actual, strict=True)):
+            self._match_value(template_item, actual_item, f"{path}[{i}]", state)
+
+    def _match_array(self, template, actual, path: str, state: MatchState) -> None:
+        """
+        Match a NumPy array or an `array.array` like the list its `tolist()` would return.
 
-        regex, fields = compile_template(template, self.pattern_handlers)
-        if not fields:
-            # No patterns in template, do direct comparison
-            if template != actual:
-                raise DictValueMismatchError(path, template, actual)
+        Arrays only match list templates. Without a budget, the whole array is
+        compared at once when `_match_array_at_once` can; otherwise its
+        elements are converted to a list, which `_match_items` overrides can
+        index and measure like any other list, and matched element by element.
+        """
+        if template.kind != "list":
+            raise DictValueMismatchError(path, actual_value=actual, template_node=template)
+        if len(template.items) != len(actual):
+            raise DictListLengthMismatchError(path, actual_value=actual, template_node=template)
+        if state.budget is None:
+            if not self._match_array_at_once(template, actual, path):
+                self._match_items(template, actual.tolist(), path, state)
             return
+        state.enter(path)
+        try:
+            self._match_items(template, actual.tolist(), path, state)
+        finally:
+            state.depth -= 1
+
+    def _match_array_at_once(self, template: ListNode, actual, path: str) -> bool:
+        """
+        Match an array with a single operation, returning False if the template does not allow it.
 
-        match = regex.match(actual)
+        A template list of literals is compared with the whole array, and a
+        template list of one repeated AnyValue is checked against the element
+        type of the array, reporting the first failing element.
+        """
+        items = template.items
+        if not items:
+            return True
+        first = items[0]
+        if first.kind == "any" and items.count(first) == len(items):
+            # Identical AnyValue nodes are shared by compile_node, so count compares identities first
+            item_type = element_type(actual)
+            if item_type is None:
+                return False
+            if first.types and not issubclass(item_type, first.types):
+                raise DictValueMismatchError(f"{path}[0]", actual_value=array_item(actual, 0), template_node=first)
+            return True
+        if any(item.kind != "literal" for item in items):
+            return False
+        index = first_difference(actual, [item.value for item in items])
+        if index is not None:
+            raise DictValueMismatchError(f"{path}[{index}]", items[index].value, array_item(actual, index))
+        return True
+
+    def _match_any(self, template: AnyNode, actual, path: str) -> None:
+        """Check the type of a value matched by an AnyValue, without inspecting the value."""
+        if template.types and not isinstance(actual, template.types):
+            raise DictValueMismatchError(path, actual_value=actual, template_node=template)
+
+    def _match_unique(self, template: UniqueNode, actual, path: str, state: MatchState) -> None:
+        """Match a value against the node wrapped by a Unique constraint, then check it is not a duplicate."""
+        self._match_value(template.node, actual, path, state)
+        self._check_unique(unique_scope(path, template.scope), actual, path, state)
+
+    def _check_unique(self, scope, value, path: str, state: MatchState) -> None:
+        """Add a value to the hash set of its scope, failing if it is already there."""
+        seen = state.unique_values.setdefault(scope, {})
+        key = _unique_key(value)
+        first_path = seen.setdefault(key, path)
+        if first_path != path:
+            raise DictPatternValueDuplicateError(path, value, first_path)
+
+    def _match_string(self, template: PatternNode, actual: str, path: str, state: MatchState) -> None:
+        """Match a string value against a template string with pattern placeholders."""
+        if state.budget is not None:
+            state.check_string(actual, path)
+        match = template.regex.match(actual)
         if not match:
-            raise DictPatternMatchError(path, template, actual)
+            raise DictPatternMatchError(path, template.template, actual)
 
-        self._extract_pattern_values(match, fields, path)
+        self._extract_pattern_values(match, template.fields, path, state)
 
-    def _extract_pattern_values(self, match, fields, path: str) -> None:
-        """Extract and validate pattern values from a regex match."""
+    def _match_bytes(self, template: PatternNode, actual, path: str, state: MatchState) -> None:
+        """
+        Match a bytes-like value against a template with pattern placeholders.
+
+        ASCII values are matched without decoding them, and values with
+        non-ASCII bytes are decoded so that the regexes of str templates keep
+        their meaning, see `PatternNode.match_bytes`; the captures of decoded
+        values are encoded back. Captures of `bytes` values are memoryview
+        slices, which need no copy; captures of mutable buffers are `bytes`
+        copies, so the buffer can be resized once the match returns.
+        """
+        view = memoryview(actual).cast("B")
+        try:
+            if state.budget is not None:
+                state.check_string(view, path)
+            match, decoded = template.match_bytes(view)
+            capture = _encoded_capture
+            if not decoded:
+                capture = _slice_capture if isinstance(view.obj, bytes) else _copy_capture
+            if not match:
+                raise DictPatternMatchError(path, template.template, actual)
+            self._extract_pattern_values(match, template.fields, path, state, capture)
+        finally:
+            if not isinstance(view.obj, bytes):
+                # Nothing references the buffer of a mutable value after the match
+                view.release()
+
+    def _extract_pattern_values(self, match, fields, path: str, state: MatchState, capture=None) -> None:
+        """
+        Extract and validate pattern values from a regex match.
+
+        Captures of str values are the groups of the match, or lazy Captures
+        for large groups. `capture` returns the captured value of a group
+        instead, see `_match_bytes`.
+        """
         for i, (pattern, identifier) in enumerate(fields, start=1):
             if identifier is None:
                 # No identifier, skip checking for consistency
                 continue
 
-            matched_value = match.group(i)
-
-            if identifier in self.values[pattern]:
-                # If we have seen this identifier on this pattern we just compare the values
-                if self.values[pattern][identifier] != matched_value:
+            start, end = match.span(i)
+            if capture is not None:
+                matched_value = capture(match, start, end)
+            elif end - start >= LAZY_CAPTURE_LENGTH:
+                # Large captures reference the matched string, their text is only created when read
+                matched_value = Capture(match.string, start, end)
+            else:
+                matched_value = match.group(i)
+
+            known = state.values[pattern]
+            if identifier in known:
+                # If we have seen this identifier on this pattern we just compare the values,
+                # reading the stored one without creating the text of a lazy capture
+                stored_value = dict.__getitem__(known, identifier)
+                if stored_value != matched_value and not _captures_equal(stored_value, matched_value):
                     raise DictPatternValueInconsistencyError(
-                        path, identifier, self.values[pattern][identifier], matched_value
+                        path, identifier, capture_value(stored_value), capture_value(matched_value), pattern=pattern
                     )
             else:
                 # If we have not seen this identifier on this pattern we store the value
-                self.values[pattern][identifier] = matched_value
+                self._bind(pattern, identifier, matched_value, path, state)
+
+    def _bind(self, pattern: str, identifier: str, value, path: str, state: MatchState) -> None:
+        """Store the first value seen for an identifier of a pattern."""
+        state.values[pattern][identifier] = value
+        if state.origins is not None:
+            state.origins[pattern, identifier] = path
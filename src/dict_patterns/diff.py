@@ -0,0 +1,308 @@
+"""
+Structured differences between a template value and an actual value.
+
+A mismatch can involve large subtrees. Instead of printing both sides, a
+ValueDiff lists only the paths where they differ, each with the two values
+found there, and quotes them in size-bounded excerpts.
+"""
+
+import reprlib
+from functools import lru_cache
+from itertools import islice
+from typing import NamedTuple
+
+from dict_patterns.arrays import array_item, is_array
+
+MAX_DIFF_ENTRIES = 100
+
+
+class _Excerpts(reprlib.Repr):
+    """
+    A Repr abbreviating values to excerpts of about `limit` characters.
+
+    Plan nodes of compiled templates are quoted like the template values they
+    were compiled from, walking the nodes rather than rebuilding the template.
+    Dictionaries keep their insertion order, like `str` quotes them.
+    Instances are never modified once created, so they can be shared by threads.
+    """
+
+    def __init__(self, limit: int):
+        """Initialize the limits of the excerpts."""
+        super().__init__()
+        self.maxlevel = 4
+        self.maxdict = self.maxlist = self.maxtuple = 20
+        self.maxset = self.maxfrozenset = self.maxdeque = self.maxarray = 20
+        self.maxstring = self.maxother = self.maxlong = max(limit, 12)
+
+    def repr_LiteralNode(self, node, level: int) -> str:  # noqa: N802
+        """Quote a literal node as its value."""
+        return self.repr1(node.value, level)
+
+    def repr_PatternNode(self, node, level: int) -> str:  # noqa: N802
+        """Quote a pattern node as its template string."""
+        return self.repr1(node.template, level)
+
+    def repr_AnyNode(self, node, level: int) -> str:  # noqa: N802
+        """Quote an AnyValue node as its sentinel."""
+        return self.repr1(node.template, level)
+
+    def repr_UniqueNode(self, node, level: int) -> str:  # noqa: N802
+        """Quote a Unique node like the Unique sentinel, abbreviating the wrapped node."""
+        wrapped = self.repr1(node.node, level - 1)
+        if node.scope is None:
+            return f"Unique({wrapped})"
+        return f"Unique({wrapped}, scope={node.scope!r})"
+
+    def repr_ListNode(self, node, level: int) -> str:  # noqa: N802
+        """Quote a list node like a list of its element nodes."""
+        return self._repr_iterable(node.items, level, "[", "]", self.maxlist)
+
+    def repr_DictNode(self, node, level: int) -> str:  # noqa: N802
+        """Quote a dictionary node like a dictionary of its child nodes, key patterns included."""
+        children = dict(node.children)
+        children.update((key.template, child) for key, child in node.pattern_children)
+        return self.repr_dict(children, level)
+
+    def repr_dict(self, value: dict, level: int) -> str:
+        """Quote a dictionary in insertion order, unlike `reprlib.Repr` which sorts its keys."""
+        if not value:
+            return "{}"
+        if level <= 0:
+            return "{...}"
+        pieces = [
+            f"{self.repr1(key, level - 1)}: {self.repr1(item, level - 1)}"
+            for key, item in islice(value.items(), self.maxdict)
+        ]
+        if len(value) > self.maxdict:
+            pieces.append("...")
+        return f"{{{', '.join(pieces)}}}"
+
+
+@lru_cache(maxsize=16)
+def _excerpts(limit: int) -> _Excerpts:
+    """Return the shared Repr of the excerpts of at most `limit` characters."""
+    return _Excerpts(limit)
+
+
+def excerpt(value, limit: int) -> str:
+    """
+    Return a text excerpt of a value of at most about `limit` characters.
+
+    Strings are quoted as they are, and other values like `str` quotes them,
+    but large values are never rendered in full: containers are abbreviated
+    after a few levels and items, and the text is cut at `limit` characters.
+    Plan nodes are quoted like the template values they were compiled from.
+
+    Parameters
+    ----------
+    value
+        The value, or plan node, to quote.
+    limit : int
+        The maximum number of characters of the excerpt, before the note
+        telling how long the full value is.
+
+    Returns
+    -------
+    str
+        The excerpt.
+
+    """
+    # Imported here because the plan nodes are compiled with patterns raising errors quoting excerpts
+    from dict_patterns.compiled import AnyNode, LiteralNode, PatternNode  # noqa: PLC0415
+
+    if isinstance(value, (LiteralNode, PatternNode, AnyNode)):
+        value = value.template
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, (bytes, bytearray)):
+        text = str(value[: limit + 1])
+    else:
+        text = str(value) if isinstance(value, (int, float, bool, type(None))) else _excerpts(limit).repr(value)
+    if len(text) <= limit:
+        return text
+    size = f", {len(value)} in total" if isinstance(value, (str, bytes, bytearray)) else ""
+    return f"{text[:limit]}... (truncated{size})"
+
+
+def _node_accepts(node, actual) -> bool:
+    """Return whether a literal, pattern or AnyValue plan node accepts a non-array value, ignoring identifiers."""
+    kind = node.kind
+    if kind == "any":
+        return not node.types or isinstance(actual, node.types)
+    bytes_like = isinstance(actual, (bytes, bytearray, memoryview))
+    if kind == "pattern":
+        if bytes_like:
+            return node.match_bytes(memoryview(actual).cast("B"))[0] is not None
+        if isinstance(actual, str) and not node.binary:
+            return node.regex.match(actual) is not None
+        return node.template == actual
+    value = node.template
+    if bytes_like and isinstance(value, str):
+        return value.encode("utf-8") == actual
+    return value == actual
+
+
+class DiffEntry(NamedTuple):
+    """
+    A path where a template value and an actual value differ.
+
+    Attributes
+    ----------
+    path : str
+        The path of the difference.
+    change : str
+        `changed` when both values exist but differ, `missing` when the actual
+        value lacks a key or an element of the template, and `unexpected` when
+        it has one the template does not.
+    template
+        The template value at the path, None when unexpected.
+    actual
+        The actual value at the path, None when missing.
+
+    """
+
+    path: str
+    change: str
+    template: object = None
+    actual: object = None
+
+
+class ValueDiff:
+    """
+    The paths where a template value and an actual value differ.
+
+    Dictionaries are compared key by key and lists and tuples element by
+    element, so only the differing leaves are listed, in depth-first order,
+    the missing and unexpected keys or elements of a container first.
+
+    The template can also be the plan node of a compiled template, in which
+    case its pattern strings, AnyValue sentinels and Unique constraints are
+    checked the way the matcher checks them, ignoring identifier consistency
+    and uniqueness, and the unexpected keys of dictionaries with template key
+    placeholders are not listed.
+
+    Parameters
+    ----------
+    template
+        The template value, or its plan node when `compiled` is True.
+    actual
+        The actual value.
+    path : str
+        The path of both values.
+    max_entries : int
+        The maximum number of differences listed.
+    compiled : bool
+        Whether `template` is a plan node.
+
+    Attributes
+    ----------
+    entries : list[DiffEntry]
+        The differences.
+    truncated : bool
+        Whether more differences were found than `max_entries`.
+
+    """
+
+    def __init__(
+        self, template, actual, path: str = "$", max_entries: int = MAX_DIFF_ENTRIES, *, compiled: bool = False
+    ):
+        """Compare the two values."""
+        self.entries = []
+        self.truncated = False
+        compare = self._compare_node if compiled else self._compare
+        stack = [(path, template, actual)]
+        while stack:
+            if len(self.entries) >= max_entries:
+                self.truncated = True
+                break
+            stack.extend(reversed(compare(*stack.pop())))
+
+    def _compare(self, path: str, template, actual) -> list:
+        """Record the difference of two values, or return the pairs of their children to compare."""
+        if isinstance(template, dict) and isinstance(actual, dict):
+            return self._compare_dicts(path, template, actual, unexpected=True)
+        if isinstance(template, (list, tuple)) and (type(template) is type(actual) or is_array(actual)):
+            return self._compare_lists(path, template, actual)
+        if is_array(actual) or template != actual:
+            self.entries.append(DiffEntry(path, "changed", template, actual))
+        return []
+
+    def _compare_node(self, path: str, node, actual) -> list:
+        """Record the difference of a plan node and a value, or return the pairs of their children to compare."""
+        while node.kind == "unique":
+            node = node.node
+        kind = node.kind
+        if kind == "dict" and isinstance(actual, dict):
+            return self._compare_dicts(path, node.children, actual, unexpected=not node.pattern_children, compiled=True)
+        if kind == "list" and (isinstance(actual, list) or is_array(actual)):
+            return self._compare_lists(path, node.items, actual, compiled=True)
+        # Arrays only match list nodes and AnyValues, and comparing one with == would compare every element
+        if (is_array(actual) and kind != "any") or not _node_accepts(node, actual):
+            self.entries.append(DiffEntry(path, "changed", node.template, actual))
+        return []
+
+    def _compare_dicts(
+        self, path: str, template: dict, actual: dict, *, unexpected: bool, compiled: bool = False
+    ) -> list:
+        """Record the missing and unexpected keys of two dictionaries, returning the pairs of their common keys."""
+        children = []
+        for key, value in template.items():
+            if key in actual:
+                children.append((f"{path}.{key}", value, actual[key]))
+            else:
+                self.entries.append(DiffEntry(f"{path}.{key}", "missing", value.template if compiled else value))
+        if unexpected:
+            self.entries.extend(
+                DiffEntry(f"{path}.{key}", "unexpected", None, value)
+                for key, value in actual.items()
+                if key not in template
+            )
+        return children
+
+    def _compare_lists(self, path: str, template, actual, *, compiled: bool = False) -> list:
+        """Record the missing and unexpected elements of two lists, returning the pairs of their common elements."""
+        if is_array(actual):
+            # Compare the elements of arrays as the Python values they convert to
+            actual = [array_item(actual, i) for i in range(len(actual))]
+        common = min(len(template), len(actual))
+        for i in range(common, len(template)):
+            self.entries.append(DiffEntry(f"{path}[{i}]", "missing", template[i].template if compiled else template[i]))
+        self.entries.extend(
+            DiffEntry(f"{path}[{i}]", "unexpected", None, actual[i]) for i in range(common, len(actual))
+        )
+        return [(f"{path}[{i}]", template[i], actual[i]) for i in range(common)]
+
+    def __len__(self) -> int:
+        """Return the number of differences listed."""
+        return len(self.entries)
+
+    def __iter__(self):
+        """Iterate over the differences."""
+        return iter(self.entries)
+
+    def format(self, limit: int = 80) -> str:
+        """
+        Return the differences, one per line, quoting the values in excerpts of at most `limit` characters.
+
+        Returns
+        -------
+        str
+            The rendered differences.
+
+        """
+        lines = []
+        for entry in self.entries:
+            if entry.change == "missing":
+                lines.append(f"{entry.path}: missing (template: {excerpt(entry.template, limit)})")
+            elif entry.change == "unexpected":
+                lines.append(f"{entry.path}: unexpected (actual: {excerpt(entry.actual, limit)})")
+            else:
+                template, actual = excerpt(entry.template, limit), excerpt(entry.actual, limit)
+                lines.append(f"{entry.path}: changed (template: {template}, actual: {actual})")
+        if self.truncated:
+            lines.append("...")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        """Return the differences, one per line."""
+        return self.format()
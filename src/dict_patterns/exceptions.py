@@ -6,15 +6,115 @@ matching operations, making it easier for users to handle different types of
 errors that can occur during pattern matching.
 """
 
+from .diff import ValueDiff, excerpt
+
 
 class DictPatternError(Exception):
-    """Base exception for all dictionary pattern matching errors."""
+    """
+    Base exception for all dictionary pattern matching errors.
 
-    def __init__(self, message: str, path: str = None):
-        """Initialize the exception with a message and optional path."""
-        self.message = message
+    Messages quoting values are rendered when first read, e.g. by `str()`, and
+    quote them in excerpts of at most `max_value_length` characters, so that a
+    mismatch involving a large subtree neither pays for rendering it nor
+    produces a huge message. The full values remain available as attributes.
+    `args` holds the message, rendering it when read, like for other exceptions.
+    """
+
+    max_value_length = 200
+
+    def __init__(self, message: str = None, path: str = None):
+        """Initialize the exception with a message, or None to render it on first use, and optional path."""
+        self._message = message
         self.path = path
-        super().__init__(self.message)
+        super().__init__()
+
+    @property
+    def message(self) -> str:
+        """The error message, rendered on first use."""
+        if self._message is None:
+            self._message = self._render()
+        return self._message
+
+    @message.setter
+    def message(self, message: str) -> None:
+        self._message = message
+
+    @property
+    def args(self) -> tuple:
+        """The arguments of the exception, i.e. the error message, rendered on first use."""
+        return (self.message,)
+
+    @args.setter
+    def args(self, args) -> None:
+        args = tuple(args)
+        self._message = str(args[0]) if args else ""
+
+    def _render(self) -> str:
+        """Render the message of errors created without one."""
+        return ""
+
+    def _excerpt(self, value) -> str:
+        """Quote a value of the message in a size-bounded excerpt."""
+        return excerpt(value, self.max_value_length)
+
+    def __str__(self) -> str:
+        """Return the error message."""
+        return self.message
+
+    def __repr__(self) -> str:
+        """Return the class name and the error message."""
+        return f"{type(self).__name__}({self.message!r})"
+
+    def __reduce__(self):
+        """Support pickling, so errors can be sent back from worker processes."""
+        return _restore_error, (type(self), self.__dict__)
+
+
+def _restore_error(cls, state: dict) -> DictPatternError:
+    """Recreate a pickled error without calling its (subclass specific) initializer."""
+    error = cls.__new__(cls)
+    Exception.__init__(error)
+    error.__dict__.update(state)
+    return error
+
+
+class _ValueDiffError(DictPatternError):
+    """Base of the errors keeping the template value and the actual value that did not match."""
+
+    def _set_values(self, template_value, actual_value, template_node) -> None:
+        """Store the values, the template value possibly as its plan node."""
+        self._template_value = template_value
+        self._template_node = template_node
+        self.actual_value = actual_value
+        self._diff = None
+
+    @property
+    def template_value(self):
+        """The template value, rebuilt from its plan node on first use."""
+        if self._template_value is None and self._template_node is not None:
+            self._template_value = self._template_node.template
+        return self._template_value
+
+    @property
+    def diff(self) -> ValueDiff:
+        """
+        The paths where the template value and the actual value differ, computed on first use.
+
+        When the error was raised by a matcher, pattern strings and AnyValue
+        sentinels are checked the way the matcher checks them.
+        """
+        if self._diff is None:
+            if self._template_node is not None:
+                self._diff = ValueDiff(self._template_node, self.actual_value, self.path, compiled=True)
+            else:
+                self._diff = ValueDiff(self.template_value, self.actual_value, self.path)
+        return self._diff
+
+    def __reduce__(self):
+        """Support pickling, sending the template value rather than its plan node."""
+        self._template_value = self.template_value
+        self._template_node = None
+        return super().__reduce__()
 
 
 class DictStructureError(DictPatternError):
@@ -25,35 +125,74 @@ class DictStructureError(DictPatternError):
         super().__init__(message, path)
 
 
-class DictKeyMismatchError(DictStructureError):
-    """Raised when dictionary keys don't match between template and actual."""
+class DictKeyMismatchError(DictStructureError, _ValueDiffError):
+    """
+    Raised when dictionary keys don't match between template and actual.
+
+    When raised for a whole dictionary, the `diff` attribute lists its
+    missing and unexpected keys, along with the other differences within it.
+    """
 
-    def __init__(self, path: str):
-        """Initialize the exception with the path where keys don't match."""
+    def __init__(self, path: str, template_value=None, actual_value=None, *, template_node=None):
+        """Initialize the exception with the path where keys don't match and optional template/actual values."""
         message = f"Keys at {path} do not match"
         super().__init__(message, path)
+        self._set_values(template_value, actual_value, template_node)
 
 
-class DictListLengthMismatchError(DictStructureError):
-    """Raised when lists have different lengths."""
+class DictKeyAmbiguityError(DictStructureError):
+    """Raised when a key can be paired with more than one key when matching template key placeholders."""
 
-    def __init__(self, path: str):
-        """Initialize the exception with the path where lists have different lengths."""
-        message = f"Lists at {path} do not match, they have different lengths"
+    def __init__(self, path: str, key: str, candidates: list):
+        """Initialize the exception with the path, the ambiguous key and the keys it can be paired with."""
+        message = f"Key {key!r} at {path} is ambiguous, it matches: {', '.join(map(repr, candidates))}"
         super().__init__(message, path)
+        self.key = key
+        self.candidates = candidates
+
 
+class DictListLengthMismatchError(DictStructureError, _ValueDiffError):
+    """
+    Raised when lists have different lengths.
 
-class DictValueMismatchError(DictPatternError):
-    """Raised when values don't match between template and actual."""
+    The `diff` attribute lists the missing or unexpected elements, along with
+    the other differences within the lists.
+    """
 
-    def __init__(self, path: str, template_value=None, actual_value=None):
-        """Initialize the exception with path and optional template/actual values."""
-        message = f"Values at {path} do not match"
-        if template_value is not None and actual_value is not None:
-            message += f" (template: {template_value}, actual: {actual_value})"
+    def __init__(self, path: str, template_value=None, actual_value=None, *, template_node=None):
+        """Initialize the exception with the path where lists differ in length and optional template/actual values."""
+        message = f"Lists at {path} do not match, they have different lengths"
         super().__init__(message, path)
-        self.template_value = template_value
-        self.actual_value = actual_value
+        self._set_values(template_value, actual_value, template_node)
+
+
+class DictValueMismatchError(_ValueDiffError):
+    """
+    Raised when values don't match between template and actual.
+
+    The `diff` attribute lists the paths where the two values differ, which
+    locates the differences within mismatching subtrees.
+    """
+
+    def __init__(self, path: str, template_value=None, actual_value=None, *, template_node=None):
+        """
+        Initialize the exception with path and optional template/actual values.
+
+        The template value can be given as the plan node it was compiled into
+        with `template_node`, in which case it is only rebuilt when read.
+        """
+        super().__init__(path=path)
+        self._set_values(template_value, actual_value, template_node)
+
+    def _render(self) -> str:
+        message = f"Values at {self.path} do not match"
+        # The excerpt of a plan node walks it, without rebuilding the template value.
+        template, node = self._template_value, self._template_node
+        if template is None and node is not None and not (node.kind == "literal" and node.value is None):
+            template = node
+        if template is not None and self.actual_value is not None:
+            message += f" (template: {self._excerpt(template)}, actual: {self._excerpt(self.actual_value)})"
+        return message
 
 
 class DictPatternMatchError(DictPatternError):
@@ -61,22 +200,83 @@ class DictPatternMatchError(DictPatternError):
 
     def __init__(self, path: str, template: str, actual: str):
         """Initialize the exception with path, template, and actual string values."""
-        message = f"Strings at {path} = {actual} do not match the pattern {template}"
-        super().__init__(message, path)
+        super().__init__(path=path)
         self.template = template
         self.actual = actual
 
+    def _render(self) -> str:
+        return f"Strings at {self.path} = {self._excerpt(self.actual)} do not match the pattern {self.template}"
+
 
 class DictPatternValueInconsistencyError(DictPatternError):
-    """Raised when the same pattern identifier has different values across matches."""
+    """
+    Raised when the same pattern identifier has different values across matches.
 
-    def __init__(self, path: str, identifier: str, expected_value: str, actual_value: str):
+    When known, `pattern` is the pattern of the identifier, and `first_path`
+    and `first_document` tell where the expected value was first bound, the
+    document being set by a MatchSession.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: str,
+        identifier: str,
+        expected_value: str,
+        actual_value: str,
+        *,
+        pattern: str = None,
+        first_path: str = None,
+        first_document=None,
+    ):
         """Initialize the exception with path, identifier, and expected/actual values."""
-        message = f"Values at {path}.{identifier} do not match (expected: {expected_value}, actual: {actual_value})"
-        super().__init__(message, path)
+        super().__init__(path=path)
         self.identifier = identifier
         self.expected_value = expected_value
         self.actual_value = actual_value
+        self.pattern = pattern
+        self.first_path = first_path
+        self.first_document = first_document
+
+    def _render(self) -> str:
+        expected, actual = self._excerpt(self.expected_value), self._excerpt(self.actual_value)
+        message = f"Values at {self.path}.{self.identifier} do not match (expected: {expected}, actual: {actual})"
+        if self.first_document is not None:
+            message += f", first bound by document {self.first_document!r}"
+            if self.first_path is not None:
+                message += f" at {self.first_path}"
+        return message
+
+
+class DictPatternValueDuplicateError(DictPatternError):
+    """Raised when a value that must be unique within its scope was already seen."""
+
+    def __init__(self, path: str, value, first_path: str):
+        """Initialize the exception with the path of the duplicate, its value and the path of the first occurrence."""
+        super().__init__(path=path)
+        self.value = value
+        self.first_path = first_path
+
+    def _render(self) -> str:
+        value = self._excerpt(self.value)
+        return f"Value at {self.path} is a duplicate of the value at {self.first_path} (value: {value})"
+
+
+class DictPatternBudgetError(DictPatternError):
+    """Raised when a match exceeds one of the limits of its MatchBudget."""
+
+    _limits = {
+        "max_nodes": "values visited",
+        "max_depth": "levels of nesting",
+        "max_string_length": "characters in a matched string",
+        "timeout": "seconds",
+    }
+
+    def __init__(self, path: str, limit: str, value):
+        """Initialize the exception with the path, the name of the exceeded limit and its value."""
+        message = f"Match budget exceeded at {path}: more than {value} {self._limits.get(limit, limit)} ({limit})"
+        super().__init__(message, path)
+        self.limit = limit
+        self.value = value
 
 
 class DictPatternTypeError(DictPatternError):
@@ -0,0 +1,216 @@
+"""
+Static analysis of compiled templates.
+
+`explain` walks a plan in the order the DictMatcher matches it and lists every
+node with its path, its kind, its regex and the fields it captures. It also
+follows the identifiers through the plan, so that the path binding each
+identifier and the paths checked against that binding are known, and it
+estimates the cost of a match without running one.
+"""
+
+from typing import NamedTuple
+
+
+class ExplainEntry(NamedTuple):
+    """
+    One node of an explained plan.
+
+    Attributes
+    ----------
+    path : str
+        The template path of the node. Key placeholders are listed at the path
+        of their dictionary, followed by the key template.
+    kind : str
+        The node kind: `literal`, `pattern`, `key` (a key placeholder), `any`,
+        `unique`, `dict` or `list`.
+    source : str or bytes or None
+        The regex source of pattern and key nodes, as generated by
+        `compile_template`.
+    fields : tuple[tuple[str, str], ...]
+        The `(pattern, identifier)` pairs captured by the node.
+    binds : tuple[str, ...]
+        The `pattern:identifier` names first bound by this node.
+    checks : tuple[str, ...]
+        The `pattern:identifier` names this node checks against an earlier
+        binding.
+
+    """
+
+    path: str
+    kind: str
+    source: str | bytes | None = None
+    fields: tuple = ()
+    binds: tuple = ()
+    checks: tuple = ()
+
+
+class CostEstimate(NamedTuple):
+    """
+    Static cost estimate of matching a template.
+
+    Attributes
+    ----------
+    regex_count : int
+        The number of distinct regexes compiled for the template.
+    regex_evaluations : int
+        The number of strings matched against a regex by a successful match.
+        Key placeholders are counted once, although they are evaluated against
+        every actual key that is not a literal template key.
+    nodes : int
+        The number of values visited by a successful match, which is the most
+        any match visits.
+    depth : int
+        The maximum number of nested dictionaries and lists.
+
+    """
+
+    regex_count: int
+    regex_evaluations: int
+    nodes: int
+    depth: int
+
+
+class TemplateExplanation:
+    """
+    The structure, identifier dependencies and cost estimate of a compiled template.
+
+    Attributes
+    ----------
+    entries : list[ExplainEntry]
+        The nodes of the plan, in the order they are matched.
+    bindings : dict[str, dict]
+        For every `pattern:identifier` name, the path binding it (`bound_at`)
+        and the paths checked against that binding (`checked_at`).
+    cost : CostEstimate
+        The static cost estimate.
+
+    """
+
+    def __init__(self, entries: list, bindings: dict, cost: CostEstimate):
+        """Initialize the explanation with its entries, identifier bindings and cost estimate."""
+        self.entries = entries
+        self.bindings = bindings
+        self.cost = cost
+
+    def to_data(self) -> dict:
+        """
+        Return the explanation as JSON-compatible data, e.g. to compare template versions in review.
+
+        Returns
+        -------
+        dict
+            The entries, the bindings and the cost estimate. Bytes regex
+            sources are decoded as UTF-8 with backslash escapes.
+
+        """
+        entries = []
+        for entry in self.entries:
+            data = entry._asdict()
+            if isinstance(entry.source, bytes):
+                data["source"] = entry.source.decode("utf-8", "backslashreplace")
+            data["fields"] = [list(field) for field in entry.fields]
+            data["binds"] = list(entry.binds)
+            data["checks"] = list(entry.checks)
+            entries.append(data)
+        return {"entries": entries, "bindings": self.bindings, "cost": self.cost._asdict()}
+
+    def __str__(self) -> str:
+        """Return a readable rendering of the explanation."""
+        width = max(len(entry.path) for entry in self.entries)
+        lines = []
+        for entry in self.entries:
+            details = []
+            if entry.source is not None:
+                details.append(str(entry.source))
+            details.extend(f"binds {name}" for name in entry.binds)
+            details.extend(f"checks {name} (bound at {self.bindings[name]['bound_at']})" for name in entry.checks)
+            lines.append(f"{entry.path:<{width}}  {entry.kind:<7}  {'  '.join(details)}".rstrip())
+        if self.bindings:
+            lines.append("")
+            lines.append("Identifiers:")
+            for name, binding in self.bindings.items():
+                checked = ", ".join(binding["checked_at"]) or "nowhere else"
+                lines.append(f"  {name}: bound at {binding['bound_at']}, checked at {checked}")
+        cost = self.cost
+        lines.append("")
+        lines.append(
+            f"Cost: {cost.regex_count} regexes, {cost.regex_evaluations} regex evaluations, "
+            f"at most {cost.nodes} values visited, depth {cost.depth}"
+        )
+        return "\n".join(lines)
+
+
+class _Explainer:
+    """Walk of a plan in match order, collecting the entries and the bindings."""
+
+    def __init__(self):
+        self.entries = []
+        self.bindings = {}
+        self.sources = set()
+        self.regex_evaluations = 0
+        self.nodes = 0
+
+    def visit(self, node, path: str, depth: int) -> int:
+        """Explain a value node and its descendants, returning the depth of its deepest container."""
+        self.nodes += 1
+        kind = node.kind
+        if kind == "pattern":
+            self._add_pattern(node, path, kind)
+            return depth
+        self.entries.append(ExplainEntry(path, kind))
+        if kind == "unique":
+            return self.visit(node.node, path, depth)
+        if kind == "list":
+            return max([depth + 1, *(self.visit(item, f"{path}[{i}]", depth + 1) for i, item in enumerate(node.items))])
+        if kind == "dict":
+            return self._visit_dict(node, path, depth + 1)
+        return depth
+
+    def _visit_dict(self, node, path: str, depth: int) -> int:
+        deepest = depth
+        for key, child in node.children.items():
+            deepest = max(deepest, self.visit(child, f"{path}.{key}", depth))
+        for key_node, child in node.pattern_children:
+            child_path = f"{path}.{key_node.template}"
+            self._add_pattern(key_node, child_path, "key")
+            deepest = max(deepest, self.visit(child, child_path, depth))
+        return deepest
+
+    def _add_pattern(self, node, path: str, kind: str) -> None:
+        self.sources.add(node.source)
+        self.regex_evaluations += 1
+        binds = []
+        checks = []
+        for pattern, identifier in node.fields:
+            if identifier is None:
+                continue
+            name = f"{pattern}:{identifier}"
+            binding = self.bindings.get(name)
+            if binding is None:
+                self.bindings[name] = {"bound_at": path, "checked_at": []}
+                binds.append(name)
+            else:
+                binding["checked_at"].append(path)
+                checks.append(name)
+        self.entries.append(ExplainEntry(path, kind, node.source, tuple(node.fields), tuple(binds), tuple(checks)))
+
+
+def explain_node(root) -> TemplateExplanation:
+    """
+    Explain a plan node and its descendants, see `CompiledTemplate.explain`.
+
+    Parameters
+    ----------
+    root
+        The root node of a plan.
+
+    Returns
+    -------
+    TemplateExplanation
+        The explanation of the plan.
+
+    """
+    explainer = _Explainer()
+    depth = explainer.visit(root, "$", 0)
+    cost = CostEstimate(len(explainer.sources), explainer.regex_evaluations, explainer.nodes, depth)
+    return TemplateExplanation(explainer.entries, explainer.bindings, cost)
@@ -0,0 +1,167 @@
+"""
+Loading of JSON templates from disk with a persistent compiled-plan cache.
+
+Templates are read from JSON files and compiled into plans. When a cache
+directory is configured, every compiled plan is stored on disk keyed by the
+SHA-256 of the template file contents and the fingerprint of the pattern
+handlers, so a warm start restores the plan without analysing the template.
+Changing either the file or the handlers produces a different key, which
+invalidates the cached plan automatically.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from .compiled import PLAN_FORMAT_VERSION, CompiledTemplate, compile_plan, handlers_fingerprint
+
+CACHE_VERSION = 1
+
+
+class TemplateLoader:
+    r"""
+    Load JSON templates from files or directories.
+
+    Parameters
+    ----------
+    pattern_handlers : dict
+        Dictionary mapping pattern names to regex patterns.
+    cache_dir : str or os.PathLike, optional
+        Directory where compiled plans are cached. When omitted, templates
+        are compiled every time they are loaded.
+
+    Attributes
+    ----------
+    pattern_handlers : dict
+        The pattern handlers dictionary passed during initialization.
+    fingerprint : str
+        The fingerprint of the pattern handlers.
+    cache_dir : pathlib.Path or None
+        The cache directory, if any.
+
+    Examples
+    --------
+    >>> loader = TemplateLoader({'number': r'\\d+'}, cache_dir='.dict_patterns_cache')
+    >>> template = loader.load('templates/user.json')
+    >>> DictMatcher({'number': r'\\d+'}).match(template, {'id': '42'})
+    {'number': {'user_id': '42'}}
+
+    """
+
+    def __init__(self, pattern_handlers: dict, cache_dir: str | os.PathLike = None):
+        """Initialize the loader with pattern handlers and an optional cache directory."""
+        self.pattern_handlers = pattern_handlers
+        self.fingerprint = handlers_fingerprint(pattern_handlers)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+    def load(self, path: str | os.PathLike) -> CompiledTemplate:
+        """
+        Load and compile a single JSON template file.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+            Path to the JSON template file.
+
+        Returns
+        -------
+        CompiledTemplate
+            The compiled template, restored from the cache when possible.
+
+        Raises
+        ------
+        DictPatternTypeError
+            If the template uses a pattern not present in the pattern handlers.
+
+        """
+        content = Path(path).read_bytes()
+        if self.cache_dir is None:
+            return compile_plan(json.loads(content), self.pattern_handlers, fingerprint=self.fingerprint)
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        cache_path = self.cache_dir / f"v{CACHE_VERSION}-{content_hash}-{self.fingerprint}.json"
+
+        compiled = self._read_cache(cache_path, content_hash)
+        if compiled is None:
+            compiled = compile_plan(json.loads(content), self.pattern_handlers, fingerprint=self.fingerprint)
+            self._write_cache(cache_path, content_hash, compiled)
+        return compiled
+
+    def load_directory(self, path: str | os.PathLike, pattern: str = "**/*.json") -> dict[str, CompiledTemplate]:
+        """
+        Load and compile every JSON template in a directory.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+            The directory containing the templates.
+        pattern : str
+            Glob pattern, relative to `path`, selecting the template files.
+
+        Returns
+        -------
+        dict[str, CompiledTemplate]
+            Compiled templates keyed by their path relative to `path`, using
+            forward slashes and without the file suffix (e.g. "users/get").
+
+        """
+        root = Path(path)
+        return {
+            file.relative_to(root).with_suffix("").as_posix(): self.load(file)
+            for file in sorted(root.glob(pattern))
+            if file.is_file()
+        }
+
+    def _read_cache(self, cache_path: Path, content_hash: str) -> CompiledTemplate | None:
+        """Return the cached plan, or None if it is missing, stale or unreadable."""
+        try:
+            with cache_path.open("rb") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            not isinstance(entry, dict)
+            or entry.get("cache_version") != CACHE_VERSION
+            or entry.get("content_hash") != content_hash
+            or entry.get("fingerprint") != self.fingerprint
+        ):
+            return None
+
+        try:
+            return CompiledTemplate.from_data(entry["plan"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    def _write_cache(self, cache_path: Path, content_hash: str, compiled: CompiledTemplate) -> None:
+        """
+        Atomically store a compiled plan in the cache directory.
+
+        The cache is best effort: when the entry cannot be written (for example a
+        read-only or missing cache directory, or a full disk) it is skipped and
+        the template is still returned by :meth:`load`.
+        """
+        entry = {
+            "cache_version": CACHE_VERSION,
+            "plan_version": PLAN_FORMAT_VERSION,
+            "content_hash": content_hash,
+            "fingerprint": self.fingerprint,
+            "plan": compiled.to_data(),
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(entry, file, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        except BaseException as error:
+            with contextlib.suppress(OSError):
+                Path(tmp_path).unlink(missing_ok=True)
+            if not isinstance(error, OSError):
+                raise
@@ -27,9 +27,12 @@ import re
 from .exceptions import DictPatternTypeError
 
 MASTER_PATTERN_REGEX = re.compile(r"\{(?P<pattern>[a-zA-Z0-9_]+)(?::(?P<identifier>[a-zA-Z0-9_]+))?\}")
+MASTER_PATTERN_BYTES_REGEX = re.compile(MASTER_PATTERN_REGEX.pattern.encode("ascii"))
 
 
-def compile_template(template: str, available_patterns: dict) -> tuple[re.Pattern, list[tuple[str, str]]]:
+def compile_template(
+    template: str | bytes, available_patterns: dict, bound: dict = None
+) -> tuple[re.Pattern, list[tuple[str, str]]]:
     r"""
     Convert a template with placeholders into a regex and metadata.
 
@@ -39,15 +42,21 @@ def compile_template(template: str, available_patterns: dict) -> tuple[re.Patter
 
     Parameters
     ----------
-    template : str
+    template : str or bytes
         The template string containing pattern placeholders in the format
         {pattern_name:identifier}. The identifier part is optional.
         Example: "Hello {string:name}, you are {number:age} years old"
+        When a bytes template is given, a bytes regex is returned, with the
+        pattern regexes encoded as UTF-8.
     available_patterns : dict
         Dictionary mapping pattern names to their corresponding regex patterns.
         The regex patterns should not include capturing groups as they will
         be automatically wrapped in parentheses.
         Example: {'string': r'[a-zA-Z]+', 'number': r'\\d+'}
+    bound : dict, optional
+        Values already known for some placeholders, by `(pattern_name,
+        identifier)`. These placeholders are matched as the escaped literal
+        value instead of the pattern regex, and are not listed in the fields.
 
     Returns
     -------
@@ -90,8 +99,13 @@ def compile_template(template: str, available_patterns: dict) -> tuple[re.Patter
     - Literal text between placeholders is automatically escaped
     - Each placeholder becomes a capturing group in the regex
     - The order of capturing groups matches the order of placeholders in the template
+    - Pattern names and identifiers are always returned as str, even for bytes templates
 
     """
+    if isinstance(template, bytes):
+        return _compile_bytes_template(template, available_patterns, bound or {})
+
+    bound = bound or {}
     regex_parts = []
     last_end = 0
     fields = []  # to keep track of (pattern, identifier)
@@ -106,17 +120,104 @@ def compile_template(template: str, available_patterns: dict) -> tuple[re.Patter
         if pattern not in available_patterns:
             raise DictPatternTypeError(pattern, list(available_patterns.keys()))
 
+        last_end = match.end()
+        if (pattern, identifier) in bound:
+            # The value is already known, it is matched as a literal
+            regex_parts.append(re.escape(bound_text(bound[pattern, identifier], binary=False)))
+            continue
+
         # Add the capturing group for this placeholder
         regex_parts.append(f"({available_patterns[pattern]})")
 
         # Remember mapping of this group
         fields.append((pattern, identifier))
 
-        last_end = match.end()
-
     # Add any remaining text, as literal, after last placeholder
     regex_parts.append(re.escape(template[last_end:]))
 
     # Compile regex
     full_regex = "".join(regex_parts)
     return re.compile(f"^{full_regex}$"), fields
+
+
+def _compile_bytes_template(
+    template: bytes, available_patterns: dict, bound: dict
+) -> tuple[re.Pattern, list[tuple[str, str]]]:
+    """Compile a bytes template into a bytes regex, see `compile_template`."""
+    regex_parts = []
+    last_end = 0
+    fields = []
+
+    for match in MASTER_PATTERN_BYTES_REGEX.finditer(template):
+        pattern = match.group("pattern").decode("ascii")
+        identifier = match.group("identifier")
+        if identifier is not None:
+            identifier = identifier.decode("ascii")
+
+        regex_parts.append(re.escape(template[last_end : match.start()]))
+
+        if pattern not in available_patterns:
+            raise DictPatternTypeError(pattern, list(available_patterns.keys()))
+
+        last_end = match.end()
+        if (pattern, identifier) in bound:
+            regex_parts.append(re.escape(bound_text(bound[pattern, identifier], binary=True)))
+            continue
+
+        handler = available_patterns[pattern]
+        if isinstance(handler, str):
+            handler = handler.encode("utf-8")
+        regex_parts.append(b"(" + handler + b")")
+
+        fields.append((pattern, identifier))
+
+    regex_parts.append(re.escape(template[last_end:]))
+
+    full_regex = b"".join(regex_parts)
+    return re.compile(b"^" + full_regex + b"$"), fields
+
+
+def bound_text(value, binary: bool) -> str | bytes:
+    """
+    Return a known placeholder value as str, or as bytes for bytes templates, converting through UTF-8.
+
+    Bytes-like values are taken as their bytes, and other values, e.g. integers, as their `str()`.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        return value if binary else value.decode("utf-8")
+    text = value if isinstance(value, str) else str(value)
+    return text.encode("utf-8") if binary else text
+
+
+def bind_template(template: str | bytes, bound: dict) -> str | bytes:
+    """
+    Replace the placeholders of a template whose values are known with their values.
+
+    Parameters
+    ----------
+    template : str or bytes
+        The template string.
+    bound : dict
+        The known values, by `(pattern_name, identifier)`.
+
+    Returns
+    -------
+    str or bytes
+        The template with the known placeholders substituted, the other
+        placeholders being left as they are.
+
+    """
+    binary = isinstance(template, bytes)
+    master = MASTER_PATTERN_BYTES_REGEX if binary else MASTER_PATTERN_REGEX
+
+    def substitute(match: re.Match):
+        pattern, identifier = match.group("pattern", "identifier")
+        if binary:
+            pattern = pattern.decode("ascii")
+            identifier = identifier.decode("ascii") if identifier is not None else None
+        if (pattern, identifier) not in bound:
+            return match.group(0)
+        return bound_text(bound[pattern, identifier], binary)
+
+    return master.sub(substitute, template)
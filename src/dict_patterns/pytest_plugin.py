@@ -1,12 +1,123 @@
 """Module containing pytest fixtures for dictionary pattern matching."""
 
+import time
+
 import pytest
 
+from dict_patterns.compiled import CompiledTemplate, template_digest
 from dict_patterns.dict_matcher import DictMatcher
 
+TEMPLATE_LABEL_LENGTH = 60
+
+
+class MatchDurations:
+    """
+    Aggregated timings of the matches made through the plugin fixtures.
+
+    Every entry is a `[calls, compile seconds, match seconds]` list, kept both
+    by test node id and by template identity. Two templates have the same
+    identity when they have the same representation. The identity of a
+    compiled template is its cached digest, so matching it repeatedly does
+    not rebuild the template.
+    """
+
+    def __init__(self):
+        """Initialize empty aggregates."""
+        self.by_test = {}
+        self.by_template = {}
+        self.template_labels = {}
+
+    def add(self, test: str, template, compile_seconds: float, match_seconds: float) -> None:
+        """
+        Record the timings of one match.
+
+        Args:
+            test: The node id of the test making the match
+            template: The raw or compiled template that was matched
+            compile_seconds: The time spent compiling the template
+            match_seconds: The time spent matching the compiled template
+
+        """
+        identity = (template.digest if isinstance(template, CompiledTemplate) else template_digest(template))[:12]
+        if identity not in self.template_labels:
+            if isinstance(template, CompiledTemplate):
+                template = template.template
+            label = repr(template)
+            if len(label) > TEMPLATE_LABEL_LENGTH:
+                label = label[: TEMPLATE_LABEL_LENGTH - 3] + "..."
+            self.template_labels[identity] = f"{identity} {label}"
+        for entries, key in ((self.by_test, test), (self.by_template, identity)):
+            entry = entries.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += compile_seconds
+            entry[2] += match_seconds
+
+    def report(self, terminalreporter, top: int) -> None:
+        """
+        Write the top entries by total time to the terminal.
+
+        Args:
+            terminalreporter: The pytest terminal reporter
+            top: The number of entries to write for each aggregation
+
+        """
+        sections = (
+            ("test", self.by_test, {}),
+            ("template", self.by_template, self.template_labels),
+        )
+        for name, entries, labels in sections:
+            terminalreporter.write_sep("=", f"slowest {top} dict-patterns matches by {name}")
+            ranked = sorted(entries.items(), key=lambda item: item[1][1] + item[1][2], reverse=True)
+            for key, (calls, compile_seconds, match_seconds) in ranked[:top]:
+                terminalreporter.write_line(
+                    f"{compile_seconds + match_seconds:.4f}s total {compile_seconds:.4f}s compile "
+                    f"{match_seconds:.4f}s match {calls:>7} calls  {labels.get(key, key)}"
+                )
+
+
+_durations_key = pytest.StashKey[MatchDurations]()
+
+
+class TimedDictMatcher(DictMatcher):
+    """DictMatcher recording the compile and match time of every call to `match`."""
+
+    def __init__(self, pattern_handlers: dict, durations: MatchDurations, test: str):
+        """Initialize the matcher with the aggregates and the test it records for."""
+        super().__init__(pattern_handlers)
+        self.durations = durations
+        self.test = test
+
+    def match(self, template, actual, partial_match: bool = False, bindings: dict = None) -> dict:
+        """Match a template, recording how long its compilation, with its specialization, and its matching took."""
+        start = time.perf_counter()
+        plan = self.specialize(template, bindings) if bindings else self._plan(template)
+        compiled = time.perf_counter()
+        try:
+            return super().match(plan, actual, partial_match)
+        finally:
+            self.durations.add(self.test, template, compiled - start, time.perf_counter() - compiled)
+
+
+def pytest_addoption(parser):  # noqa: D103
+    group = parser.getgroup("dict-patterns")
+    group.addoption(
+        "--dict-patterns-durations",
+        type=int,
+        default=0,
+        metavar="N",
+        help="show the N slowest dict-patterns matches by test and by template (0 to disable)",
+    )
+
 
 def pytest_configure(config):  # noqa: D103
-    pass
+    if config.getoption("dict_patterns_durations", 0) > 0:
+        config.stash[_durations_key] = MatchDurations()
+
+
+def pytest_terminal_summary(terminalreporter, config):  # noqa: D103
+    durations = config.stash.get(_durations_key, None)
+    if durations is not None:
+        durations.report(terminalreporter, config.getoption("dict_patterns_durations"))
 
 
 @pytest.fixture
@@ -26,21 +137,26 @@ def pattern_handlers():
 
 
 @pytest.fixture
-def dict_matcher(pattern_handlers):
+def dict_matcher(pattern_handlers, request):
     """
     Fixture that provides a DictMatcher instance configured with pattern handlers.
 
     This fixture creates a DictMatcher with the pattern handlers from the
     pattern_handlers fixture. It can be used to perform dictionary pattern matching
-    in tests.
+    in tests. When the `--dict-patterns-durations` option is given, the matcher
+    also records how long each of its matches takes.
 
     Args:
         pattern_handlers: Fixture providing custom pattern handlers
+        request: The pytest request of the test using the fixture
 
     Returns:
         DictMatcher: Configured dictionary matcher instance
 
     """
+    durations = request.config.stash.get(_durations_key, None)
+    if durations is not None:
+        return TimedDictMatcher(pattern_handlers, durations, request.node.nodeid)
     return DictMatcher(pattern_handlers)
 
 
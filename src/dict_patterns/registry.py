@@ -0,0 +1,236 @@
+"""
+A registry of named templates, reloaded from disk while it is being used.
+
+The registry maps template names to compiled plans. A background thread polls
+the modification times of the template files, compiles the files that changed
+and swaps the new plans in. Readers never wait for a compilation: they get the
+registered template from a dictionary that is replaced as a whole on every
+change, so each lookup sees one consistent version of every template.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from .compiled import CompiledTemplate
+from .exceptions import DictPatternError
+from .loader import TemplateLoader
+
+logger = logging.getLogger(__name__)
+
+
+class RegisteredTemplate(NamedTuple):
+    """
+    A template of the registry.
+
+    Attributes
+    ----------
+    plan : CompiledTemplate
+        The compiled template.
+    version : int
+        The registry version this template was loaded in.
+    path : pathlib.Path
+        The template file.
+
+    """
+
+    plan: CompiledTemplate
+    version: int
+    path: Path
+
+
+class TemplateRegistry:
+    """
+    Named templates loaded from a directory, reloaded when their files change.
+
+    Templates are named after their path relative to the directory, without
+    the file suffix, like `TemplateLoader.load_directory` does. The directory
+    is loaded when the registry is created; `reload` checks it again, and
+    `start` does it periodically on a background thread.
+
+    Parameters
+    ----------
+    loader : TemplateLoader
+        The loader compiling the template files.
+    directory : str or os.PathLike
+        The directory containing the templates.
+    pattern : str
+        Glob pattern, relative to `directory`, selecting the template files.
+    poll_interval : float
+        The number of seconds between two checks of the background thread.
+    on_error : callable, optional
+        Called with the template name and the exception when a template file
+        fails to load. The previous version of the template is kept. The
+        background thread also calls it with None as the name when a reload
+        fails unexpectedly, and keeps polling. Exceptions raised by `on_error`
+        are logged and do not stop the reload.
+
+    Attributes
+    ----------
+    version : int
+        The number of changes applied so far: every added, updated or removed
+        template increments it.
+    errors : dict[str, Exception]
+        The error of every template whose latest file failed to load. The
+        dictionary is replaced, never modified, by a reload.
+
+    Examples
+    --------
+    >>> registry = TemplateRegistry(TemplateLoader(patterns), 'templates/', poll_interval=2.0)
+    >>> registry.start()
+    >>> matcher.match(registry.get('users/get').plan, document)  # doctest: +SKIP
+    >>> registry.stop()
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        loader: TemplateLoader,
+        directory: str | os.PathLike,
+        pattern: str = "**/*.json",
+        *,
+        poll_interval: float = 1.0,
+        on_error=None,
+    ):
+        """Initialize the registry and load every template of the directory."""
+        self.loader = loader
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.on_error = on_error
+        self.version = 0
+        self.errors = {}
+        self._templates = {}
+        self._stats = {}
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.reload()
+
+    def __contains__(self, name: str) -> bool:
+        """Return whether a template is registered under a name."""
+        return name in self._templates
+
+    def names(self) -> list[str]:
+        """Return the names of the registered templates."""
+        return sorted(self._templates)
+
+    def get(self, name: str) -> RegisteredTemplate:
+        """
+        Return the current version of a template.
+
+        Raises
+        ------
+        KeyError
+            If no template is registered under the name.
+
+        """
+        return self._templates[name]
+
+    def snapshot(self) -> dict[str, RegisteredTemplate]:
+        """Return every registered template, all from the same registry version."""
+        return self._templates
+
+    def reload(self) -> list[str]:
+        """
+        Load the template files added or modified since the last check, and forget the removed ones.
+
+        Returns
+        -------
+        list[str]
+            The names of the templates that changed.
+
+        """
+        with self._reload_lock:
+            files = {
+                file.relative_to(self.directory).with_suffix("").as_posix(): file
+                for file in sorted(self.directory.glob(self.pattern))
+                if file.is_file()
+            }
+            # The new state is built on copies, so a reload failing half way changes nothing
+            templates, stats, errors = dict(self._templates), dict(self._stats), dict(self.errors)
+            version = self.version
+            changed = []
+            for name in [name for name in stats if name not in files]:
+                del stats[name]
+                errors.pop(name, None)
+                if templates.pop(name, None) is not None:
+                    version += 1
+                    changed.append(name)
+
+            for name, file in files.items():
+                plan = self._reload_file(name, file, stats, errors)
+                if plan is not None:
+                    version += 1
+                    templates[name] = RegisteredTemplate(plan, version, file)
+                    changed.append(name)
+
+            # Readers keep using the previous dictionaries until these single assignments
+            self._stats, self.errors, self.version = stats, errors, version
+            if changed:
+                self._templates = templates
+            return changed
+
+    def _reload_file(self, name: str, file: Path, stats: dict, errors: dict) -> CompiledTemplate | None:
+        """Load a template file if it changed, returning its new plan, or None if it did not change or failed."""
+        try:
+            stat = file.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if stats.get(name) == signature:
+                return None
+            stats[name] = signature
+            plan = self.loader.load(file)
+        except (DictPatternError, ValueError, OSError) as error:
+            errors[name] = error
+            self._report(name, error)
+            return None
+
+        errors.pop(name, None)
+        return plan
+
+    def _report(self, name: str | None, error: Exception) -> None:
+        """Pass an error to `on_error`, logging the errors raised by the callback itself."""
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(name, error)
+        except Exception:
+            logger.exception("The on_error callback failed on the error of template %s", name)
+
+    def start(self) -> None:
+        """Start checking the directory for changes every `poll_interval` seconds on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._poll, name="dict-patterns-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, waiting for a reload in progress to finish."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "TemplateRegistry":
+        """Start the background thread."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop the background thread."""
+        self.stop()
+
+    def _poll(self) -> None:
+        """Reload the directory every `poll_interval` seconds until stopped, surviving any error."""
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as error:
+                if self.on_error is None:
+                    logger.exception("Reloading the templates of %s failed", self.directory)
+                else:
+                    self._report(None, error)
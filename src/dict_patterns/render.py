@@ -0,0 +1,231 @@
+"""
+Rendering of compiled templates into documents, the reverse of matching.
+
+A TemplateRenderer turns a compiled template into a tree of render steps once:
+subtrees without placeholders are built ahead of time and shared by every
+rendered document, and template strings are split into their literal parts and
+placeholder slots. Rendering then only looks up the values of the placeholders
+and joins the precomputed parts. Placeholders without identifier have no value
+to look up, and are filled with an example value of their pattern.
+"""
+
+from .compiled import CompiledTemplate
+from .dict_matcher import BYTES_LIKE_TYPES
+from .patterns import MASTER_PATTERN_BYTES_REGEX, MASTER_PATTERN_REGEX
+
+
+def _as_str(value) -> str:
+    """Convert a value into the text filling a placeholder of a str template."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, BYTES_LIKE_TYPES):
+        return bytes(value).decode("utf-8")
+    return str(value)
+
+
+def _as_bytes(value) -> bytes:
+    """Convert a value into the bytes filling a placeholder of a bytes template."""
+    if isinstance(value, BYTES_LIKE_TYPES):
+        return bytes(value)
+    return _as_str(value).encode("utf-8")
+
+
+class _StringRenderer:
+    """Render step filling the placeholders of a template string."""
+
+    __slots__ = ("parts", "slots", "whole", "convert", "empty", "path", "examples")
+
+    def __init__(self, template: str | bytes, fields: list, path: str, examples: dict):
+        for pattern, identifier in fields:
+            if identifier is None and pattern not in examples:
+                raise ValueError(
+                    f"Placeholder {{{pattern}}} at {path} has no identifier and no example value to be rendered"
+                )
+        master_regex = MASTER_PATTERN_BYTES_REGEX if isinstance(template, bytes) else MASTER_PATTERN_REGEX
+        self.parts = master_regex.split(template)[::3]
+        self.slots = fields
+        self.whole = len(fields) == 1 and not any(self.parts)
+        self.convert = _as_bytes if isinstance(template, bytes) else _as_str
+        self.empty = template[:0]
+        self.path = path
+        self.examples = examples
+
+    def __call__(self, values: dict):
+        if self.whole:
+            return self.convert(self._lookup(values, *self.slots[0]))
+        parts = self.parts
+        rendered = [parts[0]]
+        for (pattern, identifier), part in zip(self.slots, parts[1:], strict=True):
+            rendered.append(self.convert(self._lookup(values, pattern, identifier)))
+            rendered.append(part)
+        return self.empty.join(rendered)
+
+    def _lookup(self, values: dict, pattern: str, identifier: str | None):
+        if identifier is None:
+            return self.examples[pattern]
+        known = values.get(pattern, {})
+        if identifier in known:
+            return known[identifier]
+        raise ValueError(f"No value for placeholder {{{pattern}:{identifier}}} at {self.path}")
+
+
+class _DictRenderer:
+    """Render step building a dictionary with at least one placeholder in its keys or values."""
+
+    __slots__ = ("static", "dynamic", "pattern_children")
+
+    def __init__(self, static: dict, dynamic: list, pattern_children: list):
+        self.static = static
+        self.dynamic = dynamic
+        self.pattern_children = pattern_children
+
+    def __call__(self, values: dict) -> dict:
+        rendered = dict(self.static)
+        for key, render in self.dynamic:
+            rendered[key] = render(values)
+        for render_key, render_value in self.pattern_children:
+            rendered[render_key(values)] = render_value(values)
+        return rendered
+
+
+class _ListRenderer:
+    """Render step building a list with at least one placeholder in its elements."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: list):
+        self.items = items
+
+    def __call__(self, values: dict) -> list:
+        return [render(values) for render in self.items]
+
+
+class _Static:
+    """Render step returning a value built ahead of time."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, values: dict):
+        return self.value
+
+
+def _any_value(node):
+    """Return the value rendered for an AnyValue: None, or an empty value of its first type."""
+    if not node.types:
+        return None
+    try:
+        return node.types[0]()
+    except TypeError:
+        raise ValueError(f"AnyValue type {node.types[0].__name__} cannot be rendered") from None
+
+
+def _compile_renderer(node, path: str, examples: dict):
+    while node.kind == "unique":
+        node = node.node
+    if node.kind == "literal":
+        return _Static(node.value)
+    if node.kind == "any":
+        return _Static(_any_value(node))
+    if node.kind == "pattern":
+        return _StringRenderer(node.template, node.fields, path, examples)
+    if node.kind == "list":
+        items = [_compile_renderer(item, f"{path}[{i}]", examples) for i, item in enumerate(node.items)]
+        if all(isinstance(item, _Static) for item in items):
+            return _Static([item.value for item in items])
+        return _ListRenderer(items)
+    return _compile_dict_renderer(node, path, examples)
+
+
+def _compile_dict_renderer(node, path: str, examples: dict):
+    # Keys filled at render time are kept in the static dictionary too, so that
+    # assigning them in a copy keeps the template's key order
+    static = {}
+    dynamic = []
+    for key, child in node.children.items():
+        render = _compile_renderer(child, f"{path}.{key}", examples)
+        static[key] = render.value if isinstance(render, _Static) else None
+        if not isinstance(render, _Static):
+            dynamic.append((key, render))
+    pattern_children = [
+        (_compile_renderer(key_node, path, examples), _compile_renderer(child, f"{path}.{key_node.template}", examples))
+        for key_node, child in node.pattern_children
+    ]
+    if not dynamic and not pattern_children:
+        return _Static(static)
+    return _DictRenderer(static, dynamic, pattern_children)
+
+
+class TemplateRenderer:
+    r"""
+    A compiled template turned into a document generator.
+
+    Every placeholder of the template is filled with the value of its
+    identifier, looked up in a values dictionary with the same
+    `{pattern: {identifier: value}}` shape `DictMatcher.match` returns, and
+    every placeholder without identifier with the example value of its
+    pattern. Rendering the values of a successful match produces a document
+    matching the template again, as long as the examples match their patterns.
+
+    Parameters
+    ----------
+    template : CompiledTemplate
+        The compiled template to render.
+    examples : dict, optional
+        A value of each pattern used by placeholders without identifier, by
+        pattern name, e.g. `{'string': 'example'}`.
+
+    Raises
+    ------
+    ValueError
+        If a placeholder without identifier uses a pattern with no example.
+
+    Notes
+    -----
+    - Subtrees of the template without placeholders are built once and shared
+      by every rendered document, they must not be modified.
+    - Values filling part of a string, and values of a different type than the
+      template string, are converted: bytes-like values are decoded as UTF-8
+      in str templates, str values are encoded as UTF-8 in bytes templates,
+      and other values are converted with `str`.
+    - `ANY` is rendered as None, and `AnyValue(type, ...)` as an empty
+      instance of its first type.
+
+    Examples
+    --------
+    >>> matcher = DictMatcher({'id': r'\\d+'})
+    >>> renderer = TemplateRenderer(matcher.compile({'id': '{id:user_id}', 'url': '/users/{id:user_id}'}))
+    >>> renderer.render({'id': {'user_id': '42'}})
+    {'id': '42', 'url': '/users/42'}
+
+    """
+
+    def __init__(self, template: CompiledTemplate, examples: dict = None):
+        """Compile the render steps of a compiled template."""
+        self.template = template
+        self.examples = dict(examples or {})
+        self._render = _compile_renderer(template.root, "$", self.examples)
+
+    def render(self, values: dict):
+        """
+        Render a document from the values of the template's placeholders.
+
+        Parameters
+        ----------
+        values : dict
+            The placeholder values, by pattern name and identifier.
+
+        Returns
+        -------
+        The rendered document.
+
+        Raises
+        ------
+        ValueError
+            If a placeholder with an identifier has no value. The message
+            includes the path of the placeholder.
+
+        """
+        return self._render(values)
@@ -0,0 +1,237 @@
+"""
+Sampled matching of very large lists.
+
+The SamplingDictMatcher checks only some elements of large lists: the first
+and last few, where producers most often get things wrong, and a seeded random
+sample of the elements in between. It is meant for monitoring the shape of
+traffic, where checking every element of huge arrays costs more than it tells.
+Every sampled list is reported with the number of elements checked and the
+confidence that the unchecked elements would have matched too.
+"""
+
+import math
+import random
+from typing import NamedTuple
+
+from dict_patterns.compiled import ListNode
+from dict_patterns.dict_matcher import DictMatcher, MatchBudget, MatchState
+
+
+class ListSample(NamedTuple):
+    """
+    The sample checked for one large list.
+
+    Attributes
+    ----------
+    path : str
+        The path of the list.
+    length : int
+        The number of elements of the list.
+    checked : int
+        The number of elements checked, head and tail included.
+    sampled : int
+        The number of elements checked at random between the head and the tail.
+    confidence : float
+        The probability that the random sample would have included a failing
+        element, if at least `tolerance` of the elements between the head and
+        the tail had failed. It is 1.0 when all of them were checked.
+
+    """
+
+    path: str
+    length: int
+    checked: int
+    sampled: int
+    confidence: float
+
+
+def sample_confidence(population: int, sampled: int, tolerance: float) -> float:
+    """
+    Return the probability that a random sample hits a failing element.
+
+    The population is assumed to contain the smallest number of failing
+    elements above `tolerance`, and the sample to be drawn without replacement
+    (hypergeometric distribution).
+
+    Parameters
+    ----------
+    population : int
+        The number of elements the sample was drawn from.
+    sampled : int
+        The number of elements drawn.
+    tolerance : float
+        The fraction of failing elements the confidence is computed for.
+
+    Returns
+    -------
+    float
+        The confidence, between 0.0 and 1.0.
+
+    """
+    if sampled >= population:
+        return 1.0
+    failing = max(1, math.ceil(tolerance * population))
+    missed = 1.0
+    for i in range(sampled):
+        missed *= (population - failing - i) / (population - i)
+        if missed <= 0.0:
+            return 1.0
+    return 1.0 - missed
+
+
+class _SamplingMatchState(MatchState):
+    """Match state also collecting the samples of the lists of the current call."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, values: dict, partial_match: bool = False, budget: MatchBudget = None):
+        super().__init__(values, partial_match, budget)
+        self.samples = []
+
+
+class SamplingDictMatcher(DictMatcher):
+    r"""
+    A DictMatcher checking only a sample of the elements of large lists.
+
+    Lists with at least `min_length` elements (and more than `head + tail`)
+    still need the same length as their template, but only their first `head`
+    and last `tail` elements are checked, plus a random sample of `rate` of the
+    elements in between. The sample only depends on `seed` and on the path of
+    the list, so matching the same document again checks the same elements.
+
+    Sampled elements are checked in list order against the same values store,
+    so identifier consistency (and uniqueness) is enforced across all of them.
+    Values captured only by unchecked elements are not captured.
+
+    This mode is for monitoring the shape of traffic: a document matching with
+    sampling may not match without it. Use a DictMatcher to test correctness.
+
+    Parameters
+    ----------
+    pattern_handlers : dict
+        A dictionary mapping pattern names to their corresponding regex patterns.
+    head : int
+        The number of leading elements always checked.
+    tail : int
+        The number of trailing elements always checked.
+    rate : float
+        The fraction of the other elements checked at random.
+    seed : int or str
+        The seed of the random samples.
+    min_length : int
+        The minimum length of the lists checked by sampling; shorter lists are
+        checked entirely.
+    tolerance : float
+        The fraction of failing elements the reported confidence is computed for.
+    budget : MatchBudget, optional
+        The resource limits of every match.
+
+    Attributes
+    ----------
+    samples : list[ListSample]
+        The samples of the lists checked by sampling during the most recent
+        call to `match`, in the order they were checked. Like `values`, use
+        `match_sampled` instead when sharing a matcher across threads.
+
+    Examples
+    --------
+    >>> matcher = SamplingDictMatcher({'id': r'\\d+'}, head=10, tail=10, rate=0.01, seed=42)
+    >>> template = {'owner': '{id:owner}', 'items': [{'owner': '{id:owner}'}] * 100_000}
+    >>> matcher.match(template, document)  # doctest: +SKIP
+    >>> matcher.samples  # doctest: +SKIP
+    [ListSample(path='$.items', length=100000, checked=1020, sampled=1000, confidence=0.99995...)]
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        pattern_handlers: dict,
+        *,
+        head: int = 10,
+        tail: int = 10,
+        rate: float = 0.01,
+        seed: int | str = 0,
+        min_length: int = 1000,
+        tolerance: float = 0.01,
+        budget: MatchBudget = None,
+    ):
+        """Initialize the matcher with pattern handlers and sampling options."""
+        if head < 0 or tail < 0:
+            raise ValueError("head and tail must not be negative")
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("rate must be between 0 and 1")
+        if not 0.0 < tolerance <= 1.0:
+            raise ValueError("tolerance must be greater than 0 and at most 1")
+        super().__init__(pattern_handlers, budget)
+        self.head = head
+        self.tail = tail
+        self.rate = rate
+        self.seed = seed
+        self.min_length = min_length
+        self.tolerance = tolerance
+        self.samples = []
+
+    def _new_state(self, partial_match: bool) -> _SamplingMatchState:
+        """Create the per-call state of a match operation."""
+        state = _SamplingMatchState(self._new_values(), partial_match, self.budget)
+        self.samples = state.samples
+        return state
+
+    def match_sampled(self, template, actual: dict, partial_match: bool = False) -> tuple[dict, list[ListSample]]:
+        """
+        Match two dictionary objects, returning the samples along with the values.
+
+        Unlike `match` followed by reading `samples`, this is safe when the
+        matcher is shared by several threads.
+
+        Returns
+        -------
+        tuple[dict, list[ListSample]]
+            The captured values and the samples of the lists checked by sampling.
+
+        """
+        plan = self._plan(template)
+        state = self._new_state(partial_match)
+        self._match_root(plan, actual, state)
+        return state.values, state.samples
+
+    def sample_indices(self, path: str, length: int) -> list[int]:
+        """
+        Return the indices of the elements checked in a list, in increasing order.
+
+        Parameters
+        ----------
+        path : str
+            The path of the list, which seeds its random sample together with `seed`.
+        length : int
+            The number of elements of the list.
+
+        Returns
+        -------
+        list[int]
+            The indices of the head, of the random sample and of the tail.
+
+        """
+        if length < self.min_length or length <= self.head + self.tail:
+            return list(range(length))
+        middle = range(self.head, length - self.tail)
+        size = min(len(middle), math.ceil(self.rate * len(middle)))
+        # String seeds are hashed with SHA-512, so samples are the same in every process
+        sampled = random.Random(f"{self.seed}:{path}").sample(middle, size)  # noqa: S311
+        return [*range(self.head), *sorted(sampled), *range(length - self.tail, length)]
+
+    def _match_items(self, template: ListNode, actual: list, path: str, state: _SamplingMatchState) -> None:
+        """Match the elements of two lists of the same length, or only a sample of them for large lists."""
+        length = len(actual)
+        if length < self.min_length or length <= self.head + self.tail:
+            super()._match_items(template, actual, path, state)
+            return
+
+        indices = self.sample_indices(path, length)
+        population = length - self.head - self.tail
+        sampled = len(indices) - self.head - self.tail
+        confidence = sample_confidence(population, sampled, self.tolerance)
+        state.samples.append(ListSample(path, length, len(indices), sampled, confidence))
+        items = template.items
+        for i in indices:
+            self._match_value(items[i], actual[i], f"{path}[{i}]", state)
@@ -0,0 +1,194 @@
+"""
+Parallel scanning of large JSONL files.
+
+The file is memory-mapped and split into byte ranges aligned to line ends.
+Every range is scanned by a worker that maps the file again, decodes the lines
+of its range one at a time and matches them against a compiled template. Only
+the pages of the ranges being scanned are loaded by the operating system, so
+the file is never read into memory as a whole.
+
+Workers count the lines of their range, and the ranges are consumed in file
+order, so every result carries its line number in the original file.
+"""
+
+import json
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from .batch import MatchResult
+from .compiled import CompiledTemplate
+from .dict_matcher import DictMatcher
+from .exceptions import DictPatternError
+
+SCAN_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Matchers of the worker processes, by handlers fingerprint and budget
+_worker_matchers = {}
+
+
+def split_ranges(path: str | Path, chunk_size: int = SCAN_CHUNK_SIZE) -> list[tuple[int, int]]:
+    """
+    Split a file into byte ranges of about `chunk_size` bytes, each ending after a newline.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The file to split.
+    chunk_size : int
+        The approximate size of every range.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The `(start, end)` offsets of the ranges, covering the whole file.
+
+    """
+    with open(path, "rb") as file:
+        size = Path(path).stat().st_size
+        if size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            ranges = []
+            start = 0
+            while start < size:
+                newline = mapped.find(b"\n", min(start + chunk_size, size) - 1)
+                end = size if newline < 0 else newline + 1
+                ranges.append((start, end))
+                start = end
+            return ranges
+
+
+def _scan_range(matcher_args: tuple, template: CompiledTemplate, partial_match: bool, path: str, span: tuple):
+    """
+    Match the lines of a byte range of a file.
+
+    Returns the `(line offset, MatchResult)` of every non-blank line, where
+    the offset counts the lines from the start of the range, and the number of
+    lines in the range.
+    """
+    pattern_handlers, budget = matcher_args
+    matcher = _worker_matchers.get((template.fingerprint, budget))
+    if matcher is None:
+        matcher = _worker_matchers[template.fingerprint, budget] = DictMatcher(pattern_handlers, budget)
+
+    start, end = span
+    results = []
+    lines = 0
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = start
+        while position < end:
+            newline = mapped.find(b"\n", position, end)
+            line_end = end if newline < 0 else newline
+            line = mapped[position:line_end]
+            position = line_end + 1
+            lines += 1
+            if line.strip():
+                results.append((lines - 1, _match_line(matcher, template, partial_match, line)))
+    return results, lines
+
+
+def _match_line(matcher: DictMatcher, template: CompiledTemplate, partial_match: bool, line: bytes) -> MatchResult:
+    """Decode and match a single line."""
+    state = matcher._new_state(partial_match)
+    try:
+        matcher._match_root(template, json.loads(line), state)
+    except (DictPatternError, ValueError) as error:
+        return MatchResult(state.values, error)
+    return MatchResult(state.values)
+
+
+def scan_jsonl(  # noqa: PLR0913
+    matcher: DictMatcher,
+    template,
+    path: str | Path,
+    partial_match: bool = False,
+    *,
+    stop_on_error: bool = False,
+    chunk_size: int = SCAN_CHUNK_SIZE,
+    executor: Executor = None,
+    max_workers: int = None,
+):
+    r"""
+    Match every line of a JSONL file against a template, scanning ranges of the file in parallel.
+
+    Results are yielded in file order as they become available. Closing the
+    generator (e.g. by breaking out of the loop) stops the scan: the ranges
+    not started yet are cancelled.
+
+    Parameters
+    ----------
+    matcher : DictMatcher
+        The matcher whose pattern handlers and budget are used. Workers match
+        the lines with a plain DictMatcher using the same handlers and budget.
+    template : dict or CompiledTemplate
+        The template to match, compiled once for the whole file.
+    path : str or os.PathLike
+        The JSONL file to scan.
+    partial_match : bool
+        Whether to allow partial matching of the template.
+    stop_on_error : bool
+        Whether to stop after yielding the first failing line.
+    chunk_size : int
+        The approximate size in bytes of the ranges scanned by the workers.
+    executor : concurrent.futures.Executor, optional
+        The executor scanning the ranges. When omitted, a process pool is
+        created for the scan and shut down at its end.
+    max_workers : int, optional
+        The number of processes of the pool created when no executor is given.
+
+    Yields
+    ------
+    tuple[int, MatchResult]
+        The 1-based line number and the result of every non-blank line. Lines
+        that are not valid JSON fail with a `json.JSONDecodeError`.
+
+    Examples
+    --------
+    >>> matcher = DictMatcher({'id': r'\\d+'})
+    >>> for line_number, result in scan_jsonl(matcher, {'id': '{id}'}, 'capture.jsonl', max_workers=8):
+    ...     if not result.ok:
+    ...         print(line_number, result.error)
+
+    """
+    plan = matcher._plan(template)
+    path = str(path)
+    scan_range = partial(_scan_range, (matcher.pattern_handlers, matcher.budget), plan, partial_match, path)
+    owned_executor = None
+    if executor is None:
+        executor = owned_executor = ProcessPoolExecutor(max_workers=max_workers)
+    # Only a few ranges are in flight, so the results of a fast scan never pile up in memory
+    in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+    pending = deque()
+    try:
+        first_line = 1
+        for span in split_ranges(path, chunk_size):
+            pending.append(executor.submit(scan_range, span))
+            if len(pending) < in_flight:
+                continue
+            first_line = yield from _yield_range(pending.popleft(), first_line, stop_on_error)
+            if first_line is None:
+                return
+        while pending:
+            first_line = yield from _yield_range(pending.popleft(), first_line, stop_on_error)
+            if first_line is None:
+                return
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned_executor is not None:
+            owned_executor.shutdown(cancel_futures=True)
+
+
+def _yield_range(future, first_line: int, stop_on_error: bool):
+    """Yield the results of a scanned range, returning the first line of the next range, or None to stop."""
+    results, lines = future.result()
+    for offset, result in results:
+        yield first_line + offset, result
+        if stop_on_error and not result.ok:
+            return None
+    return first_line + lines
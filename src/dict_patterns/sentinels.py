@@ -0,0 +1,106 @@
+"""
+Special template values.
+
+These values can be used in Python templates in place of a literal value, a
+pattern string or a nested structure to change how the matching value is
+checked.
+"""
+
+
+class AnyValue:
+    """
+    Template value matching any value without inspecting it.
+
+    The key holding an AnyValue must be present in the actual dictionary (or
+    the list element must exist), but its value is never compared, recursed
+    into or matched against a regex, so the check costs the same no matter how
+    large the value is. When types are given, the value must be an instance of
+    one of them; note that `bool` values are instances of `int`.
+
+    Parameters
+    ----------
+    *types : type
+        Optional types the value must be an instance of.
+
+    Examples
+    --------
+    >>> template = {'id': '{number:id}', 'thumbnail': ANY, 'trace': AnyValue(dict, list)}
+
+    """
+
+    __slots__ = ("types",)
+
+    def __init__(self, *types: type):
+        """Initialize the sentinel with the optional types the value must be an instance of."""
+        self.types = types
+
+    def __repr__(self) -> str:
+        """Return ANY, or AnyValue(...) with the accepted type names."""
+        if not self.types:
+            return "ANY"
+        return f"AnyValue({', '.join(value_type.__name__ for value_type in self.types)})"
+
+    def __eq__(self, other) -> bool:
+        """Two sentinels are equal when they accept the same types."""
+        if not isinstance(other, AnyValue):
+            return NotImplemented
+        return self.types == other.types
+
+    def __hash__(self) -> int:
+        """Hash the sentinel by its accepted types."""
+        return hash((AnyValue, self.types))
+
+
+ANY = AnyValue()
+
+
+class Unique:
+    """
+    Template value whose matched values must all be distinct within a scope.
+
+    The wrapped template is matched as usual, and the actual value is then
+    added to a hash set shared by the values of its scope. A value already in
+    the set raises a DictPatternValueDuplicateError reporting both paths, so
+    checking that n values are distinct takes linear time.
+
+    By default, the scope is the nearest enclosing list: the values found at
+    the same position of every element of the list must be distinct. With a
+    scope name, all the Unique values of the document with that name share the
+    same set.
+
+    Parameters
+    ----------
+    template
+        The template the value must match, usually a pattern string.
+    scope : str, optional
+        The name of the scope shared by the values.
+
+    Examples
+    --------
+    >>> template = {'orders': [{'id': Unique('{uuid}'), 'total': '{number}'}] * 20}
+    >>> template = {'orders': [Unique('{uuid}', scope='ids')] * 20, 'refunds': [Unique('{uuid}', scope='ids')] * 5}
+
+    """
+
+    __slots__ = ("template", "scope")
+
+    def __init__(self, template, scope: str = None):
+        """Initialize the constraint with the wrapped template and an optional scope name."""
+        self.template = template
+        self.scope = scope
+
+    def __repr__(self) -> str:
+        """Return Unique(...) with the wrapped template and the scope, if any."""
+        if self.scope is None:
+            return f"Unique({self.template!r})"
+        return f"Unique({self.template!r}, scope={self.scope!r})"
+
+    def __eq__(self, other) -> bool:
+        """Two constraints are equal when they wrap equal templates in the same scope."""
+        if not isinstance(other, Unique):
+            return NotImplemented
+        return self.template == other.template and self.scope == other.scope
+
+    def __hash__(self) -> int:
+        """Hash the constraint by its scope, templates may not be hashable."""
+        return hash((Unique, self.scope))
@@ -0,0 +1,248 @@
+"""
+Matching sequences of related documents against shared identifiers.
+
+A MatchSession matches several documents, e.g. the responses of a create, a
+get and a list request, against their templates with one values store that
+persists across documents, so an identifier captured by one document must have
+the same value in all the following ones. Every binding is indexed by its
+`(pattern, identifier)` with the document and path that created it, and
+checkpoints discard the bindings of failed steps by popping them, since
+bindings are only ever appended, instead of copying the store.
+"""
+
+from typing import NamedTuple
+
+from dict_patterns.compiled import CompiledTemplate
+from dict_patterns.dict_matcher import DictMatcher, _captures_equal
+from dict_patterns.exceptions import DictPatternValueInconsistencyError
+
+
+class SessionBinding(NamedTuple):
+    """
+    A value bound by a document of a session.
+
+    Attributes
+    ----------
+    value
+        The value bound to the identifier.
+    document
+        The name of the document that bound it first.
+    path : str
+        The path of the value in that document.
+
+    """
+
+    value: object
+    document: object
+    path: str
+
+
+class SessionCheckpoint:
+    """
+    A point of a MatchSession that its bindings can be rolled back to.
+
+    Used as a context manager, the checkpoint rolls the session back when the
+    block raises, so the bindings of a failed step are discarded.
+    """
+
+    def __init__(self, session: "MatchSession"):
+        """Record the current size of the session."""
+        self.session = session
+        self.bindings = len(session.bindings)
+        self.documents = len(session.documents)
+
+    def rollback(self) -> None:
+        """Discard the bindings and the documents matched since the checkpoint."""
+        self.session._rollback(self.bindings, self.documents)
+
+    def __enter__(self) -> "SessionCheckpoint":
+        """Return the checkpoint."""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        """Roll back the session if the block raised."""
+        if exc_type is not None:
+            self.rollback()
+
+
+class MatchSession:
+    r"""
+    Match several documents against shared identifier bindings.
+
+    Each call to `match` checks one document with the matcher, starting from
+    the values bound by the documents matched before it, so identifiers must
+    have the same value across all the documents of the session. A document
+    failing to match binds nothing. Unique constraints are only checked within
+    each document. A session is not thread-safe, but any number of sessions can
+    share a matcher.
+
+    Parameters
+    ----------
+    matcher : DictMatcher
+        The matcher used for every document.
+    bindings : dict, optional
+        Identifier values known before the first document, organized like the
+        values of a match. They are indexed as bound by the `None` document.
+
+    Attributes
+    ----------
+    matcher : DictMatcher
+        The matcher used for every document.
+    values : dict
+        The values bound so far, organized by pattern name and identifier like
+        the values of a match. It must not be modified.
+    bindings : dict[tuple[str, str], SessionBinding]
+        The index of the bindings, by `(pattern, identifier)`, in the order they
+        were bound. It must not be modified.
+    documents : list
+        The names of the documents matched so far.
+
+    Examples
+    --------
+    >>> session = MatchSession(DictMatcher({'number': r'\\d+'}))
+    >>> session.match({'id': '{number:user_id}'}, {'id': '42'}, document='create')
+    {'number': {'user_id': '42'}}
+    >>> try:
+    ...     session.match({'users': [{'id': '{number:user_id}'}]}, {'users': [{'id': '7'}]}, document='list')
+    ... except DictPatternValueInconsistencyError as error:
+    ...     print(error.first_document, error.first_path)
+    create $.id
+
+    """
+
+    def __init__(self, matcher: DictMatcher, bindings: dict = None):
+        """Initialize the session with the matcher and optional known bindings."""
+        self.matcher = matcher
+        self.values = matcher._new_values()
+        self.bindings = {}
+        self.documents = []
+        for pattern, known in matcher._merge_bindings(None, bindings or {}).items():
+            for identifier, value in known.items():
+                self.values[pattern][identifier] = value
+                self.bindings[pattern, identifier] = SessionBinding(value, None, None)
+
+    def match(
+        self, template: dict | CompiledTemplate, actual: dict, partial_match: bool = False, document=None
+    ) -> dict:
+        """
+        Match a document of the session, binding the identifiers it captures first.
+
+        Parameters
+        ----------
+        template : dict or CompiledTemplate
+            The template of the document.
+        actual : dict
+            The document.
+        partial_match : bool
+            Whether to allow partial matching of the template.
+        document : optional
+            The name of the document, used to report where identifiers were
+            first bound. Defaults to its position in the session.
+
+        Returns
+        -------
+        dict
+            The values the document bound, organized by pattern name and
+            identifier. Values bound by earlier documents are not included.
+
+        Raises
+        ------
+        DictPatternError
+            If the document does not match. A DictPatternValueInconsistencyError
+            tells the document and the path that first bound the expected value.
+
+        """
+        matcher = self.matcher
+        plan = matcher._plan(template)
+        if document is None:
+            document = len(self.documents)
+        state = matcher._new_state(partial_match)
+        state.values = self.values
+        state.origins = origins = {}
+        try:
+            if plan.bindings:
+                self._bind_plan(plan, origins)
+            matcher._match_root(plan, actual, state)
+        except BaseException as error:
+            self._discard(origins)
+            if isinstance(error, DictPatternValueInconsistencyError):
+                self._locate(error, origins, document)
+            raise
+
+        values = {}
+        for (pattern, identifier), path in origins.items():
+            value = self.values[pattern][identifier]
+            self.bindings[pattern, identifier] = SessionBinding(value, document, path)
+            values.setdefault(pattern, {})[identifier] = value
+        self.documents.append(document)
+        return values
+
+    def _bind_plan(self, plan: CompiledTemplate, origins: dict) -> None:
+        """Bind the values a plan was specialized for at the root of the document, checking they agree."""
+        for pattern, known in plan.bindings.items():
+            values = self.values[pattern]
+            for identifier, value in known.items():
+                if identifier not in values:
+                    values[identifier] = value
+                    origins[pattern, identifier] = "$"
+                elif values[identifier] != value and not _captures_equal(values[identifier], value):
+                    raise DictPatternValueInconsistencyError(
+                        "$", identifier, values[identifier], value, pattern=pattern
+                    )
+
+    def _discard(self, origins: dict) -> None:
+        """Remove the values bound by a document that failed to match."""
+        for pattern, identifier in origins:
+            del self.values[pattern][identifier]
+
+    def _locate(self, error: DictPatternValueInconsistencyError, origins: dict, document) -> None:
+        """Tell a consistency error where the expected value was first bound."""
+        key = (error.pattern, error.identifier)
+        if key in origins:
+            error.first_document, error.first_path = document, origins[key]
+        elif key in self.bindings:
+            binding = self.bindings[key]
+            error.first_document, error.first_path = binding.document, binding.path
+
+    def binding(self, pattern: str, identifier: str) -> SessionBinding | None:
+        """
+        Return the binding of an identifier, or None if it is not bound.
+
+        Returns
+        -------
+        SessionBinding or None
+            The value of the identifier and the document and path that bound it.
+
+        """
+        return self.bindings.get((pattern, identifier))
+
+    def checkpoint(self) -> SessionCheckpoint:
+        """
+        Return a checkpoint the session can be rolled back to.
+
+        Rolling back removes the bindings and documents added since, newest
+        first, so it costs as much as the bindings removed, however many
+        bindings the session has. Checkpoints can be nested; rolling back to a
+        checkpoint also discards the checkpoints taken after it.
+
+        Returns
+        -------
+        SessionCheckpoint
+            The checkpoint, which rolls the session back when used as a context
+            manager around a block that raises.
+
+        Examples
+        --------
+        >>> with session.checkpoint():  # doctest: +SKIP
+        ...     session.match(create_template, create_response, document='create')
+        ...     session.match(get_template, get_response, document='get')
+
+        """
+        return SessionCheckpoint(self)
+
+    def _rollback(self, bindings: int, documents: int) -> None:
+        """Remove the bindings and documents added after the given sizes, newest first."""
+        while len(self.bindings) > bindings:
+            (pattern, identifier), _ = self.bindings.popitem()
+            del self.values[pattern][identifier]
+        del self.documents[documents:]
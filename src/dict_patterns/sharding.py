@@ -0,0 +1,196 @@
+"""
+Parallel matching of large lists inside a single document.
+
+The ShardedDictMatcher splits every large list of a template into shards that
+are matched by separate workers. Each worker starts from an empty values store
+and returns the bindings it created, in the order they were created. A merge
+phase then replays the shards in document order against the shared values
+store, so that identifier conflicts (and duplicates of Unique values) across
+shards are detected and reported at the same path a sequential run would report.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from dict_patterns.captures import Capture, capture_value
+from dict_patterns.compiled import ListNode
+from dict_patterns.dict_matcher import DictMatcher, MatchState, _captures_equal
+from dict_patterns.exceptions import (
+    DictListLengthMismatchError,
+    DictPatternError,
+    DictPatternValueInconsistencyError,
+)
+
+
+class _ShardMatcher(DictMatcher):
+    """Matcher used by workers, recording bindings and unique values in the order they are seen."""
+
+    def __init__(self, pattern_handlers: dict):
+        super().__init__(pattern_handlers)
+        self.bindings = []
+
+    def _bind(self, pattern: str, identifier: str, value, path: str, state: MatchState) -> None:
+        super()._bind(pattern, identifier, value, path, state)
+        if isinstance(value, memoryview):
+            # memoryview slices cannot be sent back from worker processes
+            value = bytes(value)
+        elif isinstance(value, Capture):
+            # Lazy captures would send their whole source string
+            value = value.text
+        self.bindings.append(("bind", (pattern, identifier), value, path))
+
+    def _check_unique(self, scope, value, path: str, state: MatchState) -> None:
+        super()._check_unique(scope, value, path, state)
+        if isinstance(value, memoryview):
+            value = bytes(value)
+        self.bindings.append(("unique", scope, value, path))
+
+
+def _match_shard(pattern_handlers: dict, shard: tuple, path: str, partial_match: bool):
+    """
+    Match one shard of a list, returning its bindings and the error raised, if any.
+
+    The shard is a `(start, template_items, actual_items)` tuple. The bindings
+    are returned even when the shard fails, since they were all created before
+    the error and the merge phase must check them first.
+    """
+    start, template_items, actual_items = shard
+    matcher = _ShardMatcher(pattern_handlers)
+    state = matcher._new_state(partial_match)
+    try:
+        for offset, (template_item, actual_item) in enumerate(zip(template_items, actual_items, strict=True)):
+            matcher._match_value(template_item, actual_item, f"{path}[{start + offset}]", state)
+    except DictPatternError as error:
+        return matcher.bindings, error
+    return matcher.bindings, None
+
+
+class _ShardedMatchState(MatchState):
+    """Match state also holding the process pool owned by the current call, if any."""
+
+    __slots__ = ("owned_executor",)
+
+    def __init__(self, values: dict, partial_match: bool = False):
+        super().__init__(values, partial_match)
+        self.owned_executor = None
+
+
+class ShardedDictMatcher(DictMatcher):
+    r"""
+    A DictMatcher that matches large lists in parallel shards.
+
+    Lists with at least `shard_size` elements are split into shards of
+    `shard_size` elements that are matched by an executor. The result, the
+    captured values and the raised errors are the same as the ones of a
+    sequential `DictMatcher`.
+
+    Parameters
+    ----------
+    pattern_handlers : dict
+        A dictionary mapping pattern names to their corresponding regex patterns.
+    shard_size : int
+        The number of list elements matched by each worker.
+    executor : concurrent.futures.Executor, optional
+        The executor running the shards. When omitted, a process pool is
+        created when the first large list is found and shut down at the end of
+        each call to `match`.
+    max_workers : int, optional
+        The number of processes of the pool created when no executor is given.
+
+    Notes
+    -----
+    When a process pool is used, the template and the list elements are
+    pickled to the workers. Values captured from bytes-like objects are
+    returned as `bytes` instead of `memoryview` slices.
+
+    Examples
+    --------
+    >>> matcher = ShardedDictMatcher({'id': r'\\d+'}, shard_size=50_000)
+    >>> template = {'owner': '{id:owner}', 'items': [{'owner': '{id:owner}'}] * 1_000_000}
+    >>> matcher.match(template, document)  # doctest: +SKIP
+
+    """
+
+    def __init__(
+        self, pattern_handlers: dict, shard_size: int = 10_000, executor: Executor = None, max_workers: int = None
+    ):
+        """Initialize the matcher with pattern handlers and sharding options."""
+        if shard_size < 1:
+            raise ValueError("shard_size must be a positive integer")
+        super().__init__(pattern_handlers)
+        self.shard_size = shard_size
+        self.executor = executor
+        self.max_workers = max_workers
+
+    def _match_root(self, plan, actual, state: _ShardedMatchState) -> None:
+        """Match a whole document, shutting down the process pool created for it, if any."""
+        try:
+            super()._match_root(plan, actual, state)
+        finally:
+            if state.owned_executor is not None:
+                state.owned_executor.shutdown(cancel_futures=True)
+
+    def _new_state(self, partial_match: bool) -> _ShardedMatchState:
+        """Create the per-call state of a match operation."""
+        return _ShardedMatchState(self._new_values(), partial_match)
+
+    def _get_executor(self, state: _ShardedMatchState) -> Executor:
+        """Return the configured executor, creating a process pool for the current call if needed."""
+        if self.executor is not None:
+            return self.executor
+        if state.owned_executor is None:
+            state.owned_executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return state.owned_executor
+
+    def _match_list(self, template: ListNode, actual: list, path: str, state: _ShardedMatchState) -> None:
+        """Match two list values, splitting them in shards when they are large enough."""
+        if len(template.items) != len(actual):
+            raise DictListLengthMismatchError(path, actual_value=actual, template_node=template)
+
+        if len(actual) < self.shard_size:
+            super()._match_list(template, actual, path, state)
+            return
+
+        executor = self._get_executor(state)
+        futures = [
+            executor.submit(
+                _match_shard,
+                self.pattern_handlers,
+                (start, template.items[start : start + self.shard_size], actual[start : start + self.shard_size]),
+                path,
+                state.partial_match,
+            )
+            for start in range(0, len(actual), self.shard_size)
+        ]
+        try:
+            for future in futures:
+                bindings, error = future.result()
+                self._merge_shard(bindings, state)
+                if error is not None:
+                    raise error
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _merge_shard(self, bindings: list, state: MatchState) -> None:
+        """
+        Merge the bindings of a shard into the values store.
+
+        The bindings are replayed in the order the shard created them. The
+        first binding disagreeing with a value bound before the shard (or the
+        first unique value already seen before the shard) is where a sequential
+        run would have failed, and it is reported at its path.
+        """
+        for kind, key, value, path in bindings:
+            if kind == "unique":
+                self._check_unique(key, value, path, state)
+                continue
+            pattern, identifier = key
+            known = state.values[pattern]
+            if identifier not in known:
+                self._bind(pattern, identifier, value, path, state)
+                continue
+            stored_value = dict.__getitem__(known, identifier)
+            if stored_value != value and not _captures_equal(stored_value, value):
+                raise DictPatternValueInconsistencyError(
+                    path, identifier, capture_value(stored_value), value, pattern=pattern
+                )
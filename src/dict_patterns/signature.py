@@ -0,0 +1,199 @@
+"""
+Quick-reject signatures for compiled templates.
+
+A signature keeps the cheap checks of a compiled template: the type and the
+required keys of every dictionary, the length of every list, the literal
+values and the types of the values matched by patterns and AnyValue
+sentinels. Checks are kept in the depth-first order of the DictMatcher walk.
+A failing check only tells that the full match fails: the DictMatcher can fail
+earlier, on a regex, a Unique constraint or a key placeholder walked before
+that check. Only the checks before any of those are known to fail with the
+error the full match reports.
+"""
+
+from dict_patterns.arrays import array_item, is_array
+from dict_patterns.compiled import CompiledTemplate
+from dict_patterns.dict_matcher import BYTES_LIKE_TYPES
+from dict_patterns.exceptions import (
+    DictKeyMismatchError,
+    DictListLengthMismatchError,
+    DictPatternError,
+    DictValueMismatchError,
+)
+
+DEFAULT_MAX_CHECKS = 256
+
+
+class TemplateSignature:
+    r"""
+    The cheap checks of a compiled template, in the order the DictMatcher walks them.
+
+    For every failing check, `check` returns the error the DictMatcher raises
+    for that check. Since regexes, identifier consistency, Unique constraints
+    and key placeholders are not checked, a document passing the signature can
+    still fail the full match, and a document failing a check can fail the
+    full match earlier, on one of those. The first `exact` checks come before
+    any of them, so when one of these fails, the DictMatcher raises the very
+    same error.
+
+    Parameters
+    ----------
+    template : CompiledTemplate
+        The compiled template.
+    partial_match : bool
+        Whether the template will be matched with partial matching.
+    max_checks : int
+        The maximum number of checks kept. Only the first checks in walk order
+        are kept for large templates, which bounds the cost on documents that
+        pass.
+
+    Attributes
+    ----------
+    checks : list
+        The checks, in walk order.
+    exact : int
+        The number of leading checks walked before any regex, Unique
+        constraint or key placeholder, whose failure is the first failure of
+        the DictMatcher walk.
+
+    Examples
+    --------
+    >>> matcher = DictMatcher({'id': r'\\d+'})
+    >>> signature = TemplateSignature(matcher.compile({'type': 'user', 'id': '{id}'}))
+    >>> signature.check({'type': 'order', 'id': '1'})
+    DictValueMismatchError('Values at $.type do not match (template: user, actual: order)')
+
+    """
+
+    def __init__(self, template: CompiledTemplate, partial_match: bool = False, max_checks: int = DEFAULT_MAX_CHECKS):
+        """Build the signature of a compiled template."""
+        self.partial_match = partial_match
+        self.checks = []
+        self.exact = None
+
+        stack = [(-1, None, template.root, "$")]
+        while stack and len(self.checks) < max_checks:
+            parent, accessor, node, path = stack.pop()
+            index = len(self.checks)
+            uncertain = node.kind == "unique"
+            while node.kind == "unique":
+                # Uniqueness needs the other values of the scope, only the wrapped node is checked
+                node = node.node
+            uncertain = uncertain or node.kind == "pattern" or (node.kind == "dict" and bool(node.pattern_children))
+            if uncertain and self.exact is None:
+                # The DictMatcher can fail on this node after the check passed, so later failures may not be its first
+                self.exact = index + 1
+
+            self.checks.append((parent, accessor, node, path, self._node_checks[node.kind]))
+            # Children are pushed in reverse, so they are popped in the order the DictMatcher matches them
+            if node.kind == "dict":
+                children = [(index, key, child, f"{path}.{key}") for key, child in node.children.items()]
+                stack.extend(reversed(children))
+            elif node.kind == "list":
+                stack.extend((index, i, node.items[i], f"{path}[{i}]") for i in reversed(range(len(node.items))))
+        if self.exact is None:
+            self.exact = len(self.checks)
+
+    def __len__(self) -> int:
+        """Return the number of checks of the signature."""
+        return len(self.checks)
+
+    def check(self, document) -> DictPatternError | None:
+        """
+        Run the checks of the signature against a document.
+
+        Parameters
+        ----------
+        document
+            The document to check.
+
+        Returns
+        -------
+        DictPatternError or None
+            The error the DictMatcher raises for the first failing check, or
+            None if every check passed.
+
+        """
+        return self._first_failure(document)[1]
+
+    def _first_failure(self, document) -> tuple[int, DictPatternError | None]:
+        """Return the index and the error of the first failing check, or `(len(self), None)`."""
+        resolved = [None] * len(self.checks)
+        for index, (parent, accessor, node, path, check_node) in enumerate(self.checks):
+            # Parents are checked first, so the index, or the key unless matching partially, is known to exist
+            if parent < 0:
+                actual = document
+            else:
+                container = resolved[parent]
+                if isinstance(container, dict):
+                    if accessor not in container:
+                        # Partial matching checks each key right before its value, like the DictMatcher
+                        return index, DictKeyMismatchError(path)
+                    actual = container[accessor]
+                else:
+                    actual = container[accessor] if isinstance(container, list) else array_item(container, accessor)
+            resolved[index] = actual
+            error = check_node(self, node, actual, path)
+            if error is not None:
+                return index, error
+        return len(self.checks), None
+
+    def _check_dict(self, node, actual, path: str) -> DictPatternError | None:
+        """Check the type and the keys of a dictionary the way the DictMatcher does."""
+        if not isinstance(actual, dict):
+            return DictValueMismatchError(path, actual_value=actual, template_node=node)
+        return self._check_keys(node, actual, path)
+
+    def _check_keys(self, node, actual: dict, path: str) -> DictPatternError | None:
+        """Check the keys of a dictionary the way the DictMatcher does."""
+        children = node.children
+        if not node.pattern_children:
+            if not self.partial_match and children.keys() != actual.keys():
+                return DictKeyMismatchError(path, actual_value=actual, template_node=node)
+            return None
+        # Dictionaries with key patterns check all their literal keys before their values
+        for key in children:
+            if key not in actual:
+                return DictKeyMismatchError(f"{path}.{key}")
+        return None
+
+    def _check_list(self, node, actual, path: str) -> DictPatternError | None:
+        """Check the type and the length of a list."""
+        if not isinstance(actual, list) and not is_array(actual):
+            return DictValueMismatchError(path, actual_value=actual, template_node=node)
+        if len(node.items) != len(actual):
+            return DictListLengthMismatchError(path, actual_value=actual, template_node=node)
+        return None
+
+    def _check_pattern(self, node, actual, path: str) -> DictPatternError | None:
+        """Check that a value can be matched against a pattern, without running its regex."""
+        if isinstance(actual, BYTES_LIKE_TYPES) or (isinstance(actual, str) and not node.binary):
+            return None
+        if is_array(actual):
+            return DictValueMismatchError(path, actual_value=actual, template_node=node)
+        return DictValueMismatchError(path, node.template, actual) if node.template != actual else None
+
+    def _check_any(self, node, actual, path: str) -> DictPatternError | None:
+        """Check the type of a value matched by an AnyValue, its presence being checked by its parent."""
+        if not node.types or isinstance(actual, node.types):
+            return None
+        return DictValueMismatchError(path, actual_value=actual, template_node=node)
+
+    def _check_literal(self, node, actual, path: str) -> DictPatternError | None:
+        """Compare a literal value the way the DictMatcher does."""
+        value = node.value
+        if isinstance(actual, BYTES_LIKE_TYPES) and isinstance(value, str):
+            different = value.encode("utf-8") != actual
+        elif is_array(actual):
+            different = True
+        else:
+            different = value != actual
+        return DictValueMismatchError(path, value, actual) if different else None
+
+    _node_checks = {
+        "dict": _check_dict,
+        "list": _check_list,
+        "pattern": _check_pattern,
+        "any": _check_any,
+        "literal": _check_literal,
+    }
@@ -0,0 +1,116 @@
+import contextlib
+import gc
+import json
+
+import pytest
+
+from dict_patterns.adaptive import AdaptiveDictMatcher
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import DictPatternMatchError, DictValueMismatchError
+
+PATTERNS = {"id": r"\d+", "word": r"[a-z]+"}
+TEMPLATE = {
+    "payload": [{"id": "{id}", "name": "{word}"}] * 50,
+    "owner": {"id": "{id:owner_id}"},
+    "status": "ok",
+}
+
+
+def _document(status="ok", owner="1"):
+    return {"payload": [{"id": str(i), "name": "item"} for i in range(50)], "owner": {"id": owner}, "status": status}
+
+
+def test_adaptive_order_learns_failing_checks():
+    """Test that a cheap check failing often is moved first, so failing documents are rejected there."""
+    matcher = AdaptiveDictMatcher(PATTERNS, reorder_every=20)
+    template = matcher.compile(TEMPLATE)
+
+    for i in range(40):
+        with contextlib.suppress(DictValueMismatchError):
+            matcher.match(template, _document(status="ok" if i % 4 == 0 else "failed"))
+
+    assert matcher.learned_order(template)["$"][0] == "status"
+    document = _document(status="failed")
+    document["payload"][0]["id"] = "x"
+    with pytest.raises(DictValueMismatchError) as error:
+        matcher.match(template, document)
+    assert error.value.path == "$.status"
+    with pytest.raises(DictPatternMatchError):
+        DictMatcher(PATTERNS).match(TEMPLATE, document)
+
+
+def test_adaptive_order_keeps_matching_outcome():
+    """Test that matching documents capture the same values whatever the order."""
+    matcher = AdaptiveDictMatcher(PATTERNS, reorder_every=1)
+    template = matcher.compile(TEMPLATE)
+    matcher.load_order(template, {"$": ["status", "owner", "payload"]})
+
+    assert matcher.match(template, _document(owner="7")) == DictMatcher(PATTERNS).match(TEMPLATE, _document(owner="7"))
+
+
+def test_adaptive_order_frozen_and_reloaded():
+    """Test that frozen matchers keep their order and that orders can be saved and loaded."""
+    matcher = AdaptiveDictMatcher(PATTERNS, reorder_every=1, frozen=True)
+    template = matcher.compile(TEMPLATE)
+    for _ in range(5):
+        with pytest.raises(DictValueMismatchError):
+            matcher.match(template, _document(status="failed"))
+    assert matcher.learned_order(template)["$"] == ["payload", "owner", "status"]
+
+    matcher.unfreeze()
+    with pytest.raises(DictValueMismatchError):
+        matcher.match(template, _document(status="failed"))
+    orders = json.loads(json.dumps(matcher.learned_order(template)))
+    # The identical elements of the payload share one node, listed at its first path
+    assert orders == {"$": ["status", "payload", "owner"], "$.payload[0]": ["id", "name"], "$.owner": ["id"]}
+
+    other = AdaptiveDictMatcher(PATTERNS, frozen=True)
+    loaded = other.compile(TEMPLATE)
+    other.load_order(loaded, orders)
+    assert other.learned_order(loaded) == orders
+    with pytest.raises(ValueError, match=r"The order for \$ does not list the keys"):
+        other.load_order(loaded, {"$": ["status", "status", "owner"]})
+
+
+def test_adaptive_order_ignores_raw_templates():
+    """Test that raw templates are matched in template order."""
+    matcher = AdaptiveDictMatcher(PATTERNS, reorder_every=1)
+    for _ in range(3):
+        with pytest.raises(DictValueMismatchError):
+            matcher.match(TEMPLATE, _document(status="failed"))
+
+    document = _document(status="failed", owner="x")
+    with pytest.raises(DictPatternMatchError):
+        matcher.match(TEMPLATE, document)
+
+
+def test_adaptive_compile_with_bindings():
+    """Test that templates compiled with bindings are specialized and tracked."""
+    matcher = AdaptiveDictMatcher(PATTERNS, reorder_every=1)
+    template = matcher.compile(TEMPLATE, bindings={"id": {"owner_id": "7"}})
+
+    assert template.root.children["owner"].children["id"].kind == "literal"
+    assert matcher.match(template, _document(owner="7"))["id"] == {"owner_id": "7"}
+    with pytest.raises(DictValueMismatchError):
+        matcher.match(template, _document(owner="8"))
+    assert set(matcher.learned_order(template)) == {"$", "$.payload[0]", "$.owner"}
+
+
+def test_adaptive_order_drops_collected_plans():
+    """Test that the statistics of a compiled template are dropped once the template is collected."""
+    matcher = AdaptiveDictMatcher(PATTERNS, reorder_every=1)
+    for _ in range(3):
+        template = matcher.compile(TEMPLATE)
+        matcher.match(template, _document())
+        del template
+        gc.collect()
+
+        assert len(matcher._plans) == 0
+        assert len(matcher._stats) == 0
+
+    template = matcher.compile({"status": "{word}", "owner": "{id}"})
+    matcher.load_order(template, {"$": ["owner", "status"]})
+    del template
+    gc.collect()
+    template = matcher.compile({"status": "{word}", "owner": "{id}"})
+    assert matcher.learned_order(template) == {"$": ["status", "owner"]}
@@ -0,0 +1,194 @@
+import array
+import sys
+
+import pytest
+
+from dict_patterns import arrays
+from dict_patterns.arrays import element_type, first_difference, is_array
+from dict_patterns.columnar import ColumnarDictMatcher
+from dict_patterns.dict_matcher import DictMatcher, MatchBudget
+from dict_patterns.exceptions import (
+    DictListLengthMismatchError,
+    DictPatternBudgetError,
+    DictPatternValueDuplicateError,
+    DictValueMismatchError,
+)
+from dict_patterns.sampling import SamplingDictMatcher
+from dict_patterns.sentinels import ANY, AnyValue, Unique
+from dict_patterns.signature import TemplateSignature
+
+PATTERNS = {"number": r"\d+"}
+
+
+def test_array_matches_literal_list():
+    """Test that an array.array matches the template list of its values."""
+    matcher = DictMatcher(PATTERNS)
+
+    assert matcher.match({"a": [1, 2, 3]}, {"a": array.array("q", [1, 2, 3])}) == {"number": {}}
+    assert matcher.match({"a": [0.5, 1.0]}, {"a": array.array("d", [0.5, 1])}) == {"number": {}}
+
+
+def test_array_reports_first_mismatching_index():
+    """Test that a literal mismatch is reported at the index of the first different element."""
+    matcher = DictMatcher(PATTERNS)
+
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match({"a": [1, 2, 3, 4]}, {"a": array.array("i", [1, 2, 5, 6])})
+
+    assert exc_info.value.path == "$.a[2]"
+    assert exc_info.value.template_value == 3
+    assert exc_info.value.actual_value == 5
+
+
+def test_array_length_mismatch():
+    """Test that arrays of another length than the template list are reported like lists."""
+    matcher = DictMatcher(PATTERNS)
+
+    with pytest.raises(DictListLengthMismatchError) as exc_info:
+        matcher.match({"a": [1, 2]}, {"a": array.array("i", [1, 2, 3])})
+
+    assert exc_info.value.path == "$.a"
+
+
+def test_array_element_types_are_checked_once():
+    """Test that a list of one repeated AnyValue is checked against the element type of the array."""
+    matcher = DictMatcher(PATTERNS)
+
+    assert matcher.match({"a": [AnyValue(int)] * 3}, {"a": array.array("b", [1, 2, 3])}) == {"number": {}}
+    assert matcher.match({"a": [ANY] * 2}, {"a": array.array("d", [1, 2])}) == {"number": {}}
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match({"a": [AnyValue(int)] * 2}, {"a": array.array("f", [1, 2])})
+
+    assert exc_info.value.path == "$.a[0]"
+    assert exc_info.value.actual_value == 1.0
+
+
+def test_array_falls_back_to_element_matching():
+    """Test that templates mixing patterns and literals are matched element by element."""
+    matcher = DictMatcher(PATTERNS)
+    template = {"a": ["{number:first}", "b", AnyValue(str)]}
+
+    assert matcher.match(template, {"a": array.array("u", "1bc")}) == {"number": {"first": "1"}}
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match(template, {"a": array.array("u", "1xc")})
+
+    assert exc_info.value.path == "$.a[1]"
+
+
+def test_array_matching_with_budget():
+    """Test that arrays are matched element by element, counting each element, when a budget is set."""
+    template = {"a": [1, 2]}
+    document = {"a": array.array("i", [1, 3])}
+
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        DictMatcher(PATTERNS, budget=MatchBudget(max_nodes=4)).match(template, document)
+    assert exc_info.value.path == "$.a[1]"
+
+    with pytest.raises(DictPatternBudgetError) as exc_info:
+        DictMatcher(PATTERNS, budget=MatchBudget(max_nodes=3)).match(template, document)
+    assert exc_info.value.path == "$.a[1]"
+
+
+def test_array_never_equals_other_templates():
+    """Test that an array only matches a list template."""
+    matcher = DictMatcher(PATTERNS)
+
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match({"a": "{number:n}"}, {"a": array.array("i", [1])})
+
+    assert exc_info.value.path == "$.a"
+
+
+@pytest.mark.parametrize(
+    "matcher",
+    [SamplingDictMatcher(PATTERNS, rate=1.0), ColumnarDictMatcher(PATTERNS)],
+    ids=["sampling", "columnar"],
+)
+def test_array_in_list_matcher_subclasses(matcher):
+    """Test that matchers overriding how list elements are matched handle arrays element by element."""
+    template = {"v": [Unique(ANY)] * 2000}
+
+    assert matcher.match(template, {"v": array.array("i", range(2000))}) == {"number": {}}
+    with pytest.raises(DictPatternValueDuplicateError) as exc_info:
+        matcher.match(template, {"v": array.array("i", [*range(1999), 0])})
+
+    assert exc_info.value.path == "$.v[1999]"
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match({"v": ["{number:n}", *[1] * 1999]}, {"v": array.array("i", [1] * 2000)})
+
+    assert exc_info.value.path == "$.v[0]"
+
+
+def test_first_difference_of_inexact_values():
+    """Test that values which do not convert exactly to the array type are compared element by element."""
+    assert first_difference(array.array("f", [0.5, 0.1]), [0.5, 0.1]) == 1
+    assert first_difference(array.array("q", [1, 2]), [1, 2.5]) == 1
+    assert first_difference(array.array("q", [1, 2]), [1, "2"]) == 1
+    assert first_difference(array.array("B", [1, 2]), [1, 2]) is None
+
+
+def test_numpy_is_not_imported(monkeypatch):
+    """Test that arrays are recognized without importing NumPy."""
+    monkeypatch.delitem(sys.modules, "numpy", raising=False)
+
+    assert is_array(array.array("i"))
+    assert not is_array([1, 2])
+    assert arrays._numpy() is None
+    assert "numpy" not in sys.modules
+
+
+def test_array_signature_and_diff():
+    """Test that signatures and value differences treat arrays like lists."""
+    matcher = DictMatcher(PATTERNS)
+    compiled = matcher.compile({"a": [1, 2, 3]})
+
+    assert TemplateSignature(compiled).check({"a": array.array("i", [1, 2, 3])}) is None
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match(compiled, {"a": array.array("i", [1, 5, 3])})
+
+    assert exc_info.value.path == "$.a[1]"
+    error = TemplateSignature(compiled).check({"a": array.array("i", [1, 2])})
+    assert isinstance(error, DictListLengthMismatchError)
+    assert [(entry.path, entry.change) for entry in error.diff] == [("$.a[2]", "missing")]
+
+
+def test_numpy_arrays():
+    """Test that numeric NumPy arrays are compared at once and report the first mismatching index."""
+    numpy = pytest.importorskip("numpy")
+    matcher = DictMatcher(PATTERNS)
+
+    assert matcher.match({"a": [1, 2, 3]}, {"a": numpy.arange(1, 4)}) == {"number": {}}
+    assert matcher.match({"a": [AnyValue(float)] * 2}, {"a": numpy.zeros(2)}) == {"number": {}}
+    assert matcher.match({"a": [[1, 2], [3, 4]]}, {"a": numpy.array([[1, 2], [3, 4]])}) == {"number": {}}
+    assert element_type(numpy.array(["a", "b"])) is str
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match({"a": [1, 2, 3]}, {"a": numpy.array([1, 2, 4])})
+
+    assert exc_info.value.path == "$.a[2]"
+    assert type(exc_info.value.actual_value) is int
+
+
+@pytest.mark.parametrize(
+    "matcher_type",
+    [DictMatcher, ColumnarDictMatcher, lambda patterns: SamplingDictMatcher(patterns, rate=1.0)],
+    ids=["dict", "columnar", "sampling"],
+)
+def test_numpy_arrays_in_list_matcher_subclasses(matcher_type):
+    """Test that every matcher reports the same error for a NumPy array failing an element-wise match."""
+    numpy = pytest.importorskip("numpy")
+    matcher = matcher_type(PATTERNS)
+    template = {"v": [{"id": "{number}", "kind": "a"}] * 2000}
+    document = {"v": numpy.array([{"id": str(i), "kind": "a"} for i in range(1999)] + [{"id": "1", "kind": "b"}])}
+
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match(template, document)
+
+    assert exc_info.value.path == "$.v[1999].kind"
+
+
+def test_numpy_large_integers():
+    """Test that integers which do not convert exactly to floats are not compared as floats."""
+    numpy = pytest.importorskip("numpy")
+
+    assert first_difference(numpy.array([1.0, 2.0**53]), [1, 2**53 + 1]) == 1
+    assert first_difference(numpy.array([1, 2**62]), [1, 2**62]) is None
@@ -0,0 +1,124 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dict_patterns.batch import MatchResult, extract_columns, match_batch
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import DictPatternMatchError, DictPatternValueInconsistencyError
+
+PATTERNS = {"id": r"\d+", "name": r"[a-z]+"}
+TEMPLATE = {
+    "id": "{id:user_id}",
+    "name": "{name:user_name}",
+    "friends": [{"id": "{id:friend_id}", "owner": "{id:user_id}"}],
+}
+
+
+def _document(i):
+    return {"id": str(i), "name": "user" * (i % 3 + 1), "friends": [{"id": str(i + 1), "owner": str(i)}]}
+
+
+def _expected(i):
+    return {"id": {"user_id": str(i), "friend_id": str(i + 1)}, "name": {"user_name": "user" * (i % 3 + 1)}}
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_match_batch():
+    """Test that batches return one result per document, in order."""
+    documents = [_document(i) for i in range(150)]
+    documents[3]["name"] = "123"
+    documents[7]["friends"][0]["owner"] = "0"
+
+    results = match_batch(DictMatcher(PATTERNS), TEMPLATE, documents)
+
+    assert len(results) == 150
+    assert [i for i, result in enumerate(results) if not result.ok] == [3, 7]
+    assert results[0] == MatchResult(_expected(0))
+    assert isinstance(results[3].error, DictPatternMatchError)
+    assert isinstance(results[7].error, DictPatternValueInconsistencyError)
+    assert results[7].values["id"] == {"user_id": "7", "friend_id": "8"}
+
+
+def test_match_batch_with_executor_and_partial_match():
+    """Test batches on a caller provided executor with partial matching."""
+    matcher = DictMatcher(PATTERNS)
+    documents = [{**_document(i), "extra": True} for i in range(5)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = match_batch(matcher, matcher.compile(TEMPLATE), documents, partial_match=True, executor=executor)
+
+    assert [result.values for result in results] == [_expected(i) for i in range(5)]
+
+
+def test_shared_matcher_stress(fast_switching):
+    """Test that a matcher shared by many threads never mixes up the values of concurrent calls."""
+    matcher = DictMatcher(PATTERNS)
+    compiled = matcher.compile(TEMPLATE)
+    threads_count = 8
+    barrier = threading.Barrier(threads_count)
+    failures = []
+
+    def worker(offset):
+        barrier.wait()
+        for i in range(offset, 4000, threads_count):
+            template = compiled if i % 2 else TEMPLATE
+            values = matcher.match(template, _document(i))
+            if values != _expected(i):
+                failures.append((i, values))
+            try:
+                matcher.match(template, {**_document(i), "name": str(i)})
+            except DictPatternMatchError as error:
+                if error.path != "$.name":
+                    failures.append((i, error))
+            else:
+                failures.append((i, "no error"))
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
+
+
+def test_extract_columns():
+    """Test that captures are stored in one column per field, with a validity mask for failed rows."""
+    matcher = DictMatcher(PATTERNS)
+    documents = [_document(i) for i in range(5)]
+    documents[2] = {**documents[2], "name": "2"}
+
+    columns = extract_columns(matcher, TEMPLATE, iter(documents))
+
+    assert len(columns) == 5
+    assert columns.fields == [("id", "user_id"), ("name", "user_name"), ("id", "friend_id")]
+    assert columns.columns[("id", "user_id")] == ["0", "1", None, "3", "4"]
+    assert columns.columns[("id", "friend_id")] == ["1", "2", None, "4", "5"]
+    assert list(columns.valid) == [1, 1, 0, 1, 1]
+    assert list(columns.errors) == [2]
+    assert columns.errors[2].path == "$.name"
+    assert columns.to_dict()["name:user_name"] is columns.columns[("name", "user_name")]
+
+
+def test_extract_columns_on_executor():
+    """Test that columns extracted on a thread pool match the per-document results."""
+    matcher = DictMatcher(PATTERNS)
+    documents = [_document(i) if i % 7 else {**_document(i), "id": "x"} for i in range(300)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        columns = extract_columns(matcher, matcher.compile(TEMPLATE), documents, executor=executor)
+    results = match_batch(matcher, TEMPLATE, documents)
+
+    assert list(columns.valid) == [int(result.ok) for result in results]
+    assert columns.columns[("name", "user_name")] == [
+        result.values["name"]["user_name"] if result.ok else None for result in results
+    ]
@@ -0,0 +1,91 @@
+import json
+import pickle
+
+import pytest
+
+from dict_patterns import captures
+from dict_patterns.captures import LAZY_CAPTURE_LENGTH, Capture, CaptureValues
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import DictPatternValueInconsistencyError
+
+PATTERNS = {"b64": r"[A-Za-z0-9+/=]+", "number": r"\d+"}
+PAYLOAD = "QUJD" * LAZY_CAPTURE_LENGTH
+
+
+def _stored(values: dict, identifier: str):
+    return dict.__getitem__(values, identifier)
+
+
+def test_large_captures_are_created_when_read():
+    """Test that large captures are stored as references and only become strings when read."""
+    matcher = DictMatcher(PATTERNS)
+    document = {"a": f"data:{PAYLOAD}", "b": {"c": f"data:{PAYLOAD}"}, "id": "42"}
+
+    values = matcher.match({"a": "data:{b64:payload}", "b": {"c": "data:{b64:payload}"}, "id": "{number:id}"}, document)
+
+    stored = _stored(values["b64"], "payload")
+    assert isinstance(stored, Capture)
+    assert stored.source is document["a"]
+    assert len(stored) == len(PAYLOAD)
+    assert _stored(values["number"], "id") == "42"
+
+    assert values["b64"]["payload"] == PAYLOAD
+    assert type(_stored(values["b64"], "payload")) is str
+
+
+def test_lazy_captures_are_checked_for_consistency():
+    """Test that lazy captures of different lengths or contents are inconsistent."""
+    matcher = DictMatcher(PATTERNS)
+    template = {"a": "{b64:payload}", "b": "{b64:payload}"}
+
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        matcher.match(template, {"a": PAYLOAD, "b": PAYLOAD + "QUJD"})
+    assert exc_info.value.expected_value == PAYLOAD
+
+    other = PAYLOAD[:-1] + "E"
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        matcher.match(template, {"a": PAYLOAD, "b": other})
+    assert (exc_info.value.expected_value, exc_info.value.actual_value) == (PAYLOAD, other)
+
+
+def test_lazy_captures_compare_with_bytes_captures():
+    """Test that a lazy str capture and a bytes capture of its UTF-8 encoding are consistent."""
+    matcher = DictMatcher(PATTERNS)
+
+    values = matcher.match({"a": "{b64:payload}", "b": "{b64:payload}"}, {"a": PAYLOAD, "b": PAYLOAD.encode()})
+
+    assert values["b64"]["payload"] == PAYLOAD
+
+
+def test_capture_comparison(monkeypatch):
+    """Test that captures compare by length, then by contents, chunk by chunk."""
+    monkeypatch.setattr(captures, "COMPARE_CHUNK_LENGTH", 3)
+    source = "xxabcdefgxxabcdefgxxabcdefh"
+
+    first, second, third = Capture(source, 2, 9), Capture(source, 11, 18), Capture(source, 20, 27)
+
+    assert first == second
+    assert first == "abcdefg"
+    assert first != third
+    assert first != Capture(source, 2, 8)
+    assert first != "abcdefgh"
+    assert first != 7
+    assert hash(first) == hash("abcdefg")
+    assert (str(first), repr(first)) == ("abcdefg", "'abcdefg'")
+
+
+def test_capture_values_read_as_text():
+    """Test that every way of reading the values gives their text."""
+    values = CaptureValues(id="1")
+    dict.__setitem__(values, "payload", Capture("--abc--", 2, 5))
+
+    assert values == {"id": "1", "payload": "abc"}
+    assert json.dumps(values) == '{"id": "1", "payload": "abc"}'
+    assert dict(values) == {"id": "1", "payload": "abc"}
+    assert type(dict(values)["payload"]) is str
+    assert pickle.loads(pickle.dumps(values)) == {"id": "1", "payload": "abc"}
+    assert values.get("payload") == "abc"
+    assert values.get("missing", "-") == "-"
+    assert list(values.values()) == ["1", "abc"]
+    assert values.pop("payload") == "abc"
+    assert repr(values) == "{'id': '1'}"
@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from dict_patterns.cli import main
+
+TEMPLATE = {"id": "{id:user_id}", "name": "{name}", "friends": [{"owner": "{id:user_id}"}]}
+PATTERNS = {"id": r"\d+", "name": r"[a-z]+"}
+
+
+@pytest.fixture
+def files(tmp_path):
+    template = tmp_path / "template.json"
+    template.write_text(json.dumps(TEMPLATE))
+    handlers = tmp_path / "handlers.json"
+    handlers.write_text(json.dumps(PATTERNS))
+    documents = [{"id": str(i), "name": "ann", "friends": [{"owner": str(i)}]} for i in range(10)]
+    documents[3]["name"] = "Ann"
+    documents[6]["friends"][0]["owner"] = "0"
+    lines = [json.dumps(document) for document in documents]
+    lines.insert(8, "{not json")
+    inputs = tmp_path / "documents.jsonl"
+    inputs.write_text("\n".join(lines) + "\n")
+    return str(template), str(handlers), str(inputs)
+
+
+def test_cli_reports_failures_and_summary(files, capsys):
+    """Test that failures are reported with their line and counted by exception class."""
+    template, handlers, inputs = files
+
+    assert main([template, handlers, inputs]) == 1
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[0].startswith(f"{inputs}:4: DictPatternMatchError: ")
+    assert output[1].startswith(f"{inputs}:7: DictPatternValueInconsistencyError: ")
+    assert output[2].startswith(f"{inputs}:9: JSONDecodeError: ")
+    assert output[3].startswith("Checked 11 documents in ")
+    assert output[3].endswith("documents/sec), 3 failed")
+    assert "  DictPatternMatchError: 1" in output
+    assert "Slowest template paths:" not in output
+
+    assert main([template, handlers, inputs, "--slowest", "3"]) == 1
+    output = capsys.readouterr().out.splitlines()
+    assert output[3].endswith("documents/sec, timing template paths), 3 failed")
+    assert "Slowest template paths:" in output
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_cli_json_output(files, capsys, jobs):
+    """Test the machine-readable output, sequentially and on several processes."""
+    template, handlers, inputs = files
+
+    assert main([template, handlers, inputs, "--json", "--jobs", jobs, "--slowest", "2"]) == 1
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["ok"] for record in records[:-1]] == [True] * 3 + [False] + [True] * 2 + [False, True, False] + [
+        True
+    ] * 2
+    assert records[0]["values"] == {"id": {"user_id": "0"}, "name": {}}
+    assert records[6]["error"]["path"] == "$.friends[0].owner"
+    summary = records[-1]["summary"]
+    assert summary["documents"] == 11
+    assert summary["profiled"]
+    assert summary["failures"] == {
+        "DictPatternMatchError": 1,
+        "DictPatternValueInconsistencyError": 1,
+        "JSONDecodeError": 1,
+    }
+    assert len(summary["slowest_paths"]) == 2
+    assert {entry["path"] for entry in summary["slowest_paths"]} <= {
+        "$",
+        "$.id",
+        "$.name",
+        "$.friends",
+        "$.friends[*]",
+        "$.friends[*].owner",
+    }
+
+
+def test_cli_fail_fast_and_partial(files, tmp_path, capsys):
+    """Test that --fail-fast stops at the first failure and --partial allows extra keys."""
+    template, handlers, inputs = files
+
+    assert main([template, handlers, inputs, "--fail-fast"]) == 1
+    output = capsys.readouterr().out.splitlines()
+    assert output[0].startswith(f"{inputs}:4: ")
+    assert output[1].startswith("Checked 4 documents in ")
+    assert "Slowest template paths:" not in output
+
+    document = tmp_path / "document.json"
+    document.write_text(json.dumps({"id": "1", "name": "ann", "friends": [{"owner": "1"}], "extra": True}))
+    assert main([template, handlers, str(document)]) == 1
+    assert main([template, handlers, str(document), "--partial"]) == 0
+
+
+def test_cli_mmap(files, capsys):
+    """Test that memory-mapped scans report the same failures."""
+    template, handlers, inputs = files
+
+    assert main([template, handlers, inputs, "--mmap", "--jobs", "2"]) == 1
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[0].startswith(f"{inputs}:4: DictPatternMatchError: ")
+    assert output[1].startswith(f"{inputs}:7: DictPatternValueInconsistencyError: ")
+    assert output[2].startswith(f"{inputs}:9: JSONDecodeError: ")
+    assert output[3].startswith("Checked 11 documents in ")
+
+
+@pytest.mark.parametrize(
+    ("which", "content", "message"),
+    [
+        ("handlers", None, "No such file or directory"),
+        ("handlers", "{not json", "Expecting property name"),
+        ("handlers", "[1]", "expected a JSON object"),
+        ("template", None, "No such file or directory"),
+        ("template", "{not json", "Expecting property name"),
+        ("inputs", None, "No such file or directory"),
+        ("inputs", b"\xff\n", "can't decode byte"),
+    ],
+)
+def test_cli_unusable_files(files, capsys, which, content, message):
+    """Test that unreadable or invalid files exit with a one-line message instead of a traceback."""
+    paths = dict(zip(("template", "handlers", "inputs"), files, strict=True))
+    if content is None:
+        paths[which] += ".missing"
+    elif isinstance(content, bytes):
+        with open(paths[which], "wb") as file:
+            file.write(content)
+    else:
+        with open(paths[which], "w") as file:
+            file.write(content)
+
+    with pytest.raises(SystemExit) as error:
+        main([paths["template"], paths["handlers"], paths["inputs"]])
+
+    assert error.value.code == 2
+    stderr = capsys.readouterr().err.splitlines()
+    assert len(stderr) == 1
+    assert stderr[0].startswith("dict-patterns: error: ")
+    assert message in stderr[0]
+
+
+def test_cli_slowest_with_mmap(files, capsys):
+    """Test that --slowest is rejected with --mmap, which does not time template paths."""
+    template, handlers, inputs = files
+
+    with pytest.raises(SystemExit) as error:
+        main([template, handlers, inputs, "--mmap", "--slowest", "3"])
+
+    assert error.value.code == 2
+    assert "--slowest cannot be used with --mmap" in capsys.readouterr().err
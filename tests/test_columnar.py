@@ -0,0 +1,166 @@
+import pytest
+
+from dict_patterns.columnar import ColumnarDictMatcher
+from dict_patterns.dict_matcher import DictMatcher, MatchBudget
+from dict_patterns.exceptions import DictPatternBudgetError, DictPatternError, DictValueMismatchError
+from dict_patterns.sentinels import ANY, AnyValue
+
+PATTERNS = {"id": r"\d+", "name": r"[a-z]+", "text": r".*"}
+
+
+def _document(count):
+    template = {
+        "owner": "{id:owner}",
+        "items": [{"owner": "{id:owner}", "tag": "t-{name}", "type": "item", "extra": ANY}] * count,
+    }
+    actual = {
+        "owner": "7",
+        "items": [
+            {"owner": "7", "tag": f"t-{'abc' if i % 2 else 'xyz'}", "type": "item", "extra": i} for i in range(count)
+        ],
+    }
+    return template, actual
+
+
+def _outcome(matcher, template, actual, partial_match=False):
+    try:
+        return matcher.match(template, actual, partial_match), None
+    except DictPatternError as error:
+        return matcher.values, (type(error), error.path, str(error))
+
+
+def _assert_same_as_sequential(template, actual, partial_match=False):
+    expected = _outcome(DictMatcher(PATTERNS), template, actual, partial_match)
+    assert _outcome(ColumnarDictMatcher(PATTERNS, min_length=10), template, actual, partial_match) == expected
+    return expected
+
+
+def test_columnar_match_success(monkeypatch):
+    """Test that uniform lists are checked by column, capturing the same values."""
+    template, actual = _document(50)
+
+    values, error = _assert_same_as_sequential(template, actual)
+    assert error is None
+    assert values == {"id": {"owner": "7"}, "name": {}, "text": {}}
+
+    matched = []
+    original = DictMatcher._match_value
+
+    def recording(self, template_value, actual_value, path, state):
+        matched.append(path)
+        original(self, template_value, actual_value, path, state)
+
+    monkeypatch.setattr(DictMatcher, "_match_value", recording)
+    ColumnarDictMatcher(PATTERNS, min_length=10).match(template, actual)
+    assert matched == ["$", "$.owner", "$.items"]
+
+
+def test_columnar_match_binds_identifiers_first_seen_in_the_list():
+    """Test that identifiers bound by the list are bound once, in element order."""
+    template = {"items": ["{id:a}-{id:b}"] * 20, "last": "{id:b}"}
+    actual = {"items": ["1-2"] * 20, "last": "2"}
+
+    values, error = _assert_same_as_sequential(template, actual)
+    assert error is None
+    assert list(values["id"].items()) == [("a", "1"), ("b", "2")]
+
+
+@pytest.mark.parametrize(
+    ("index", "key", "value"),
+    [
+        (0, "tag", "t-ABC"),
+        (17, "tag", "x-abc"),
+        (49, "owner", "8"),
+        (23, "type", "other"),
+        (12, "tag", "t-\x00abc"),
+        (12, "tag", 12),
+        (30, "tag", b"t-abc"),
+    ],
+)
+def test_columnar_match_failures(index, key, value):
+    """Test that failures are reported at the element and path a DictMatcher reports."""
+    template, actual = _document(50)
+    actual["items"][index][key] = value
+
+    _assert_same_as_sequential(template, actual)
+
+
+def test_columnar_match_structure_differences():
+    """Test elements with missing or extra keys, and typed AnyValue columns."""
+    template, actual = _document(50)
+    del actual["items"][20]["tag"]
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error[1] == "$.items[20]"
+
+    template, actual = _document(50)
+    actual["items"][20]["more"] = 1
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error is not None
+    _, error = _assert_same_as_sequential(template, actual, partial_match=True)
+    assert error is None
+
+    template = {"items": [{"extra": AnyValue(int)}] * 20}
+    actual = {"items": [{"extra": 1}] * 19 + [{"extra": "1"}]}
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error[1] == "$.items[19].extra"
+
+
+def test_columnar_match_inconsistent_identifiers():
+    """Test that identifiers capturing different values are reported like a DictMatcher does."""
+    template = {"owner": "{id:owner}", "items": [{"owner": "{id:owner}"}] * 20}
+    actual = {"owner": "7", "items": [{"owner": "7"}] * 20}
+    actual["items"][5] = {"owner": "8"}
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error[1] == "$.items[5].owner"
+
+    template = {"items": [{"a": "{id:x}", "b": "{id:x}"}] * 20}
+    actual = {"items": [{"a": "1", "b": "2"}] * 20}
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error[1] == "$.items[0].b"
+
+
+def test_columnar_match_regex_spanning_separators():
+    """Test that patterns able to match the separator fall back to matching element by element."""
+    template = {"items": ["{text:a}-{text:b}"] * 20}
+    actual = {"items": ["x-y"] * 20}
+
+    values, error = _assert_same_as_sequential(template, actual)
+    assert error is None
+    assert values["text"] == {"a": "x", "b": "y"}
+
+
+def test_columnar_match_non_uniform_templates():
+    """Test that lists of different element templates are matched element by element."""
+    template = {"items": [{"id": f"{{id:item_{i}}}"} for i in range(20)]}
+    actual = {"items": [{"id": str(i)} for i in range(20)]}
+    values, _ = _assert_same_as_sequential(template, actual)
+    assert len(values["id"]) == 20
+
+    template = {"rows": [["{id:x}", "{name}"] * 10] * 20}
+    actual = {"rows": [["1", "abc"] * 10 for _ in range(20)]}
+    actual["rows"][19][18] = "2"
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error[1] == "$.rows[19][18]"
+
+
+def test_columnar_match_budget():
+    """Test that matches with a budget are matched element by element."""
+    matcher = ColumnarDictMatcher(PATTERNS, min_length=10, budget=MatchBudget(max_string_length=5))
+    template = {"items": ["{name}"] * 20}
+    actual = {"items": ["abc"] * 19 + ["a" * 10]}
+
+    with pytest.raises(DictPatternBudgetError) as error:
+        matcher.match(template, actual)
+    assert error.value.path == "$.items[19]"
+
+
+@pytest.mark.parametrize("value", [[1, 2], [5]])
+def test_columnar_match_arrays_in_literal_column(value):
+    """Test that NumPy arrays in a literal column are reported as a DictMatcher reports them."""
+    numpy = pytest.importorskip("numpy")
+    template = {"items": [{"id": "{id}", "count": 5}] * 20}
+    actual = {"items": [{"id": str(i), "count": 5} for i in range(20)]}
+    actual["items"][7]["count"] = numpy.array(value)
+
+    _, error = _assert_same_as_sequential(template, actual)
+    assert error[:2] == (DictValueMismatchError, "$.items[7].count")
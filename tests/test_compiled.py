@@ -0,0 +1,206 @@
+import json
+
+import pytest
+
+from dict_patterns.compiled import CompiledTemplate, compile_plan, handlers_fingerprint
+from dict_patterns.exceptions import DictPatternTypeError
+from dict_patterns.sentinels import ANY, AnyValue, Unique
+
+
+def test_compile_plan_classifies_strings():
+    """Test that strings are classified as literals or patterns."""
+    patterns = {"number": r"\d+"}
+    plan = compile_plan({"id": "{number:user_id}", "name": "John", "age": 30, "tags": ["{number}"]}, patterns)
+
+    children = plan.root.children
+    assert children["id"].kind == "pattern"
+    assert children["id"].fields == [("number", "user_id")]
+    assert children["id"].regex.match("42") is not None
+    assert children["name"].kind == "literal"
+    assert children["age"].kind == "literal"
+    assert children["tags"].kind == "list"
+    assert children["tags"].items[0].fields == [("number", None)]
+
+
+def test_compile_plan_without_pattern_handlers_keeps_placeholders_literal():
+    """Test that without pattern handlers placeholders are compared literally."""
+    plan = compile_plan({"id": "{number:user_id}"}, {})
+
+    assert plan.root.children["id"].kind == "literal"
+
+
+def test_compile_plan_unknown_pattern():
+    """Test that unknown patterns are reported at compile time."""
+    with pytest.raises(DictPatternTypeError, match="Unknown pattern type: unknown"):
+        compile_plan({"id": "{unknown}"}, {"number": r"\d+"})
+
+
+def test_compile_plan_reuses_string_cache():
+    """Test that repeated strings are analysed once."""
+    string_cache = {}
+    plan = compile_plan([{"id": "{number}"}, {"id": "{number}"}], {"number": r"\d+"}, string_cache)
+
+    assert list(string_cache) == ["{number}"]
+    assert plan.root.items[0].children["id"] is plan.root.items[1].children["id"]
+
+
+def test_compile_plan_only_caches_pattern_strings():
+    """Test that literal strings are not added to the string cache, which only grows with pattern strings."""
+    string_cache = {}
+    for index in range(100):
+        plan = compile_plan(
+            {"id": "{number}", "name": f"user {index}", b"raw": b"data", "{not a placeholder}": "{}"},
+            {"number": r"\d+"},
+            string_cache,
+        )
+
+    assert list(string_cache) == ["{number}"]
+    assert plan.root.children["name"].kind == "literal"
+    assert plan.root.children[b"raw"].kind == "literal"
+    assert plan.root.children["{not a placeholder}"].kind == "literal"
+
+
+def test_compiled_template_round_trip():
+    """Test that a plan survives serialisation and keeps its template."""
+    template = {"user": {"id": "{number:user_id}", "name": "John"}, "items": [1, None, True]}
+    plan = compile_plan(template, {"number": r"\d+"})
+
+    restored = CompiledTemplate.from_data(json.loads(json.dumps(plan.to_data())))
+
+    assert restored.template == template
+    assert restored.fingerprint == plan.fingerprint
+    assert (
+        restored.root.children["user"].children["id"].regex.pattern == plan.root.children["user"].children["id"].source
+    )
+
+
+def test_compiled_template_rejects_other_versions():
+    """Test that plans from other format versions are rejected."""
+    data = compile_plan({}, {}).to_data()
+    data["version"] = -1
+
+    with pytest.raises(ValueError, match="Unsupported plan format version"):
+        CompiledTemplate.from_data(data)
+
+
+def test_handlers_fingerprint_ignores_order():
+    """Test that the fingerprint only depends on the handler contents."""
+    assert handlers_fingerprint({"a": "x", "b": "y"}) == handlers_fingerprint({"b": "y", "a": "x"})
+    assert handlers_fingerprint({"a": "x"}) != handlers_fingerprint({"a": "z"})
+
+
+def test_compile_plan_pattern_keys():
+    """Test that keys with placeholders are compiled apart from literal keys."""
+    template = {"name": "John", "{number:user_id}": {"id": "{number:user_id}"}}
+    plan = compile_plan(template, {"number": r"\d+"})
+
+    assert list(plan.root.children) == ["name"]
+    ((key_node, value_node),) = plan.root.pattern_children
+    assert key_node.fields == [("number", "user_id")]
+    assert value_node.kind == "dict"
+
+    restored = CompiledTemplate.from_data(json.loads(json.dumps(plan.to_data())))
+    assert restored.template == template
+    assert restored.root.pattern_children[0][0].template == "{number:user_id}"
+
+
+def test_compile_plan_any_value():
+    """Test that AnyValue sentinels compile into any nodes and survive serialisation."""
+    template = {"blob": ANY, "image": AnyValue(str, type(None))}
+    plan = compile_plan(template, {})
+
+    assert plan.root.children["blob"].kind == "any"
+    assert plan.root.children["image"].types == (str, type(None))
+
+    restored = CompiledTemplate.from_data(json.loads(json.dumps(plan.to_data())))
+    assert restored.template == template
+
+    with pytest.raises(ValueError, match="AnyValue type CompiledTemplate cannot be serialised"):
+        compile_plan({"blob": AnyValue(CompiledTemplate)}, {}).to_data()
+
+
+def test_compiled_template_fields():
+    """Test that the identified fields are listed once, in template order."""
+    patterns = {"number": r"\d+", "word": r"[a-z]+"}
+    template = {"id": "{number:id}", "{word:key}": ["{number}", "{number:id}-{word:name}"]}
+
+    assert compile_plan(template, patterns).fields() == [("number", "id"), ("word", "key"), ("word", "name")]
+
+
+def test_compile_plan_unique():
+    """Test that Unique constraints compile into unique nodes and survive serialisation."""
+    template = {"ids": [Unique("{number}"), Unique("{number:id}", scope="ids")]}
+    plan = compile_plan(template, {"number": r"\d+"})
+
+    assert plan.root.children["ids"].items[1].kind == "unique"
+    assert plan.root.children["ids"].items[1].node.kind == "pattern"
+    assert plan.fields() == [("number", "id")]
+
+    restored = CompiledTemplate.from_data(json.loads(json.dumps(plan.to_data())))
+    assert restored.template == template
+
+
+def test_compile_plan_shares_identical_subtrees():
+    """Test that structurally identical subtrees compile into a single shared node."""
+
+    def element():
+        # Distinct but equal objects, like the elements of a template loaded from JSON
+        return {"id": "{number}", "tags": ["a", 1], "meta": {"kind": "item", "any": AnyValue(int)}}
+
+    template = {"items": [element() for _ in range(1000)], "first": element()}
+
+    plan = compile_plan(template, {"number": r"\d+"})
+
+    items = plan.root.children["items"].items
+    assert all(item is items[0] for item in items)
+    assert plan.root.children["first"] is items[0]
+    assert plan.template == template
+
+
+def test_compile_plan_keeps_different_literals_apart():
+    """Test that equal literals of different types, and different structures, are not shared."""
+    plan = compile_plan([{"a": 1}, {"a": 1.0}, {"a": True}, {"a": 1}, {1: "a"}, {True: "a"}, [[1]], [[1]]], {})
+
+    items = plan.root.items
+    assert len({id(item) for item in items[:4]}) == 3
+    assert items[3] is items[0]
+    assert items[4] is not items[5]
+    assert items[6] is items[7]
+    assert plan.template == [{"a": 1}, {"a": 1.0}, {"a": True}, {"a": 1}, {1: "a"}, {True: "a"}, [[1]], [[1]]]
+
+
+def test_compile_plan_keeps_signed_zeros_apart():
+    """Test that 0.0 and -0.0, which are equal, are not shared, nor are tuples of equal values of different types."""
+    template = [0.0, -0.0, [0.0], [-0.0], (1,), (True,), (1,), 0j, -0j]
+    plan = compile_plan(template, {})
+
+    items = plan.root.items
+    assert [str(item.template) for item in items] == [
+        "0.0",
+        "-0.0",
+        "[0.0]",
+        "[-0.0]",
+        "(1,)",
+        "(True,)",
+        "(1,)",
+        "0j",
+        "(-0-0j)",
+    ]
+    assert items[2] is not items[3]
+    assert items[4] is not items[5]
+    assert items[6] is items[4]
+
+    restored = CompiledTemplate.from_data(json.loads(json.dumps(compile_plan([[0.0], [-0.0]], {}).to_data())))
+    assert str(restored.template) == "[[0.0], [-0.0]]"
+
+
+def test_compiled_template_from_data_shares_identical_subtrees():
+    """Test that restored plans share their identical subtrees again."""
+    plan = compile_plan({"items": [{"id": "{number:id}", "n": [1, 2]}] * 100}, {"number": r"\d+"})
+
+    restored = CompiledTemplate.from_data(json.loads(json.dumps(plan.to_data())))
+
+    items = restored.root.children["items"].items
+    assert all(item is items[0] for item in items)
+    assert restored.template == plan.template
+    assert restored.fields() == [("number", "id")]
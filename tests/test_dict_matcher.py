@@ -1,12 +1,18 @@
 import pytest
 
-from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.dict_matcher import DictMatcher, MatchBudget
 from dict_patterns.exceptions import (
+    DictKeyAmbiguityError,
     DictKeyMismatchError,
     DictListLengthMismatchError,
+    DictPatternBudgetError,
     DictPatternMatchError,
+    DictPatternTypeError,
+    DictPatternValueDuplicateError,
     DictPatternValueInconsistencyError,
+    DictValueMismatchError,
 )
+from dict_patterns.sentinels import ANY, AnyValue, Unique
 
 
 def test_dict_matcher_no_patterns():
@@ -621,3 +627,458 @@ def test_dict_matcher_complex_list_nesting():
     assert json_matcher.values["type"]["cat2_type"] == "Books"
     assert json_matcher.values["type"]["sub1_type"] == "Phones"
     assert json_matcher.values["type"]["sub2_type"] == "Laptops"
+
+
+def test_dict_matcher_compiled_template():
+    """Test matching with a template compiled ahead of time."""
+    patterns = {"id": r"\d+", "name": r"[a-zA-Z]+"}
+    json_matcher = DictMatcher(patterns)
+    compiled = json_matcher.compile({"id": "{id:user_id}", "friends": [{"id": "{id:friend_id}", "name": "{name}"}]})
+
+    json_matcher.match(compiled, {"id": "1", "friends": [{"id": "2", "name": "Bob"}]})
+    assert json_matcher.values == {"id": {"user_id": "1", "friend_id": "2"}, "name": {}}
+
+    json_matcher.match(compiled, {"id": "3", "friends": [{"id": "4", "name": "Eve"}]})
+    assert json_matcher.values == {"id": {"user_id": "3", "friend_id": "4"}, "name": {}}
+
+
+def test_dict_matcher_compiled_template_with_other_handlers():
+    """Test that compiled templates must come from the same pattern handlers."""
+    compiled = DictMatcher({"id": r"\d+"}).compile({"id": "{id}"})
+
+    with pytest.raises(ValueError, match="different pattern handlers"):
+        DictMatcher({"id": r"[0-9]+"}).match(compiled, {"id": "1"})
+
+
+def test_dict_matcher_raw_template_plans(monkeypatch):
+    """Test that raw templates matched repeatedly reuse their plan until they are modified."""
+    json_matcher = DictMatcher({"id": r"\d+"})
+    monkeypatch.setattr("dict_patterns.compiled.handlers_fingerprint", lambda handlers: pytest.fail("fingerprinted"))
+    template = {"id": "{id:user_id}", "kind": "user"}
+
+    plans = [json_matcher._plan(template) for _ in range(3)]
+    assert plans[0] is not plans[1]
+    assert plans[2] is plans[1]
+    assert json_matcher.match(template, {"id": "1", "kind": "user"}) == {"id": {"user_id": "1"}}
+
+    template["kind"] = "admin"
+    assert json_matcher._plan(template) is not plans[1]
+    with pytest.raises(DictValueMismatchError):
+        json_matcher.match(template, {"id": "1", "kind": "user"})
+    json_matcher.match(template, {"id": "1", "kind": "admin"})
+
+
+def test_dict_matcher_type_mismatch_reports_template_value():
+    """Test that structural type mismatches report the template value."""
+    json_matcher = DictMatcher({"id": r"\d+"})
+
+    with pytest.raises(DictValueMismatchError, match="template: \\{'id': '\\{id\\}'\\}, actual: \\[1\\]"):
+        json_matcher.match({"user": {"id": "{id}"}}, {"user": [1]})
+
+
+def test_dict_matcher_bytes_values():
+    """Test that str templates match bytes-like values without decoding them."""
+    patterns = {"id": r"\d+", "word": r"[a-z]+"}
+    json_matcher = DictMatcher(patterns)
+    payload = b"user-42"
+
+    template = {
+        "key": "user-{id:user_id}",
+        "name": "alice",
+        "raw": "{word:word}",
+        "again": "{id:user_id}",
+    }
+    actual = {
+        "key": payload,
+        "name": bytearray(b"alice"),
+        "raw": memoryview(b"hello"),
+        "again": "42",
+    }
+
+    json_matcher.match(template, actual)
+
+    captured = json_matcher.values["id"]["user_id"]
+    assert isinstance(captured, memoryview)
+    assert captured == b"42"
+    assert captured.obj is payload
+    assert json_matcher.values["word"]["word"] == b"hello"
+
+
+def test_dict_matcher_mutable_buffer_captures():
+    """Test that captures of mutable buffers are copies, so the buffers can be resized after the match."""
+    json_matcher = DictMatcher({"id": r"\d+"})
+    buffer = bytearray(b"user-42")
+
+    values = json_matcher.match({"key": "user-{id:user_id}"}, {"key": buffer})
+    buffer.extend(b"0")
+
+    assert values["id"]["user_id"] == b"42"
+    assert type(values["id"]["user_id"]) is bytes
+
+
+def test_dict_matcher_non_ascii_bytes_values():
+    """Test that non-ASCII bytes values are matched with the str meaning of the pattern regexes."""
+    json_matcher = DictMatcher({"word": r"\w+", "pair": r".{2}"})
+    template = {"name": "{word:name}", "code": "{pair:code}-{pair}"}
+
+    values = json_matcher.match(template, {"name": "héllo".encode(), "code": bytearray("éé-ab".encode())})
+
+    assert values == {"word": {"name": "héllo".encode()}, "pair": {"code": "éé".encode()}}
+    with pytest.raises(DictPatternMatchError, match="\\$\\.code"):
+        json_matcher.match(template, {"name": b"x", "code": "ééé-ab".encode()})
+    with pytest.raises(DictPatternMatchError, match="\\$\\.name"):
+        json_matcher.match(template, {"name": b"\xff\xfe", "code": b"ab-cd"})
+
+
+def test_dict_matcher_bytes_templates():
+    """Test that bytes templates match bytes-like values."""
+    json_matcher = DictMatcher({"id": r"\d+"})
+
+    json_matcher.match(
+        {"key": b"user-{id:user_id}", "name": b"alice"}, {"key": b"user-7", "name": memoryview(b"alice")}
+    )
+    assert json_matcher.values["id"]["user_id"] == b"7"
+
+    with pytest.raises(DictValueMismatchError):
+        json_matcher.match({"key": b"user-{id:user_id}"}, {"key": "user-7"})
+
+
+def test_dict_matcher_bytes_errors():
+    """Test pattern and consistency errors on bytes-like values."""
+    json_matcher = DictMatcher({"id": r"\d+"})
+
+    with pytest.raises(DictPatternMatchError, match="\\$\\.key"):
+        json_matcher.match({"key": "user-{id:user_id}"}, {"key": b"user-x"})
+
+    with pytest.raises(DictPatternValueInconsistencyError, match="\\$\\.b\\.user_id"):
+        json_matcher.match({"a": "{id:user_id}", "b": "{id:user_id}"}, {"a": b"1", "b": "2"})
+
+    with pytest.raises(DictValueMismatchError, match="\\$\\.name"):
+        json_matcher.match({"name": "alice"}, {"name": b"bob"})
+
+
+def test_dict_matcher_pattern_keys():
+    """Test placeholders in dictionary keys."""
+    patterns = {"uuid": r"[0-9a-f]{8}", "number": r"\d+"}
+    json_matcher = DictMatcher(patterns)
+
+    template = {
+        "count": 2,
+        "users": {
+            "{uuid:first}": {"id": "{uuid:first}", "age": "{number}"},
+            "{number:legacy}": {"id": "{number:legacy}"},
+        },
+    }
+    actual = {
+        "count": 2,
+        "users": {
+            "1d408610": {"id": "1d408610", "age": "30"},
+            "42": {"id": "42"},
+        },
+    }
+
+    json_matcher.match(template, actual)
+
+    assert json_matcher.values == {"uuid": {"first": "1d408610"}, "number": {"legacy": "42"}}
+
+
+def test_dict_matcher_pattern_keys_consistency():
+    """Test that key captures are checked for consistency."""
+    json_matcher = DictMatcher({"uuid": r"[0-9a-f]{8}"})
+
+    template = {"owner": "{uuid:user_id}", "users": {"{uuid:user_id}": {"name": "John"}}}
+    actual = {"owner": "1d408610", "users": {"caa8b54a": {"name": "John"}}}
+
+    with pytest.raises(DictPatternValueInconsistencyError, match="\\$\\.users\\.caa8b54a\\.user_id"):
+        json_matcher.match(template, actual)
+
+
+def test_dict_matcher_pattern_keys_literal_keys_first():
+    """Test that literal keys take precedence over key patterns."""
+    json_matcher = DictMatcher({"word": r"[a-z]+"})
+
+    template = {"name": "John", "{word:other}": "value"}
+    actual = {"name": "John", "extra": "value"}
+
+    assert json_matcher.match(template, actual) == {"word": {"other": "extra"}}
+
+
+def test_dict_matcher_pattern_keys_mismatches():
+    """Test missing and extra keys with key patterns."""
+    json_matcher = DictMatcher({"number": r"\d+"})
+    template = {"name": "John", "{number:id}": True}
+
+    with pytest.raises(DictKeyMismatchError, match="Keys at \\$\\.\\{number:id\\} do not match"):
+        json_matcher.match(template, {"name": "John"})
+
+    with pytest.raises(DictKeyMismatchError, match="Keys at \\$\\.name do not match"):
+        json_matcher.match(template, {"1": True})
+
+    with pytest.raises(DictKeyMismatchError, match="Keys at \\$ do not match"):
+        json_matcher.match(template, {"name": "John", "1": True, "extra": False})
+
+    assert json_matcher.match(template, {"name": "John", "1": True, "extra": False}, partial_match=True) == {
+        "number": {"id": "1"}
+    }
+
+
+def test_dict_matcher_pattern_keys_ambiguity():
+    """Test that keys matching more than one key pattern are reported."""
+    json_matcher = DictMatcher({"number": r"\d+", "word": r"\w+"})
+
+    with pytest.raises(
+        DictKeyAmbiguityError, match="Key '42' at \\$ is ambiguous, it matches: '\\{number\\}', '\\{word\\}'"
+    ):
+        json_matcher.match({"{number}": 1, "{word}": 2}, {"42": 1, "abc": 2})
+
+    with pytest.raises(DictKeyAmbiguityError, match="Key '\\{number:n\\}' at \\$ is ambiguous, it matches: '1', '2'"):
+        json_matcher.match({"{number:n}": 1}, {"1": 1, "2": 1}, partial_match=True)
+
+
+@pytest.mark.parametrize("partial_match", [False, True])
+def test_dict_matcher_pattern_keys_mapping(partial_match):
+    """Test that key patterns without identifiers check every key they match, like a mapping."""
+    json_matcher = DictMatcher({"uuid": r"[0-9a-f]{8}", "word": r"[a-z]+"})
+    template = {"count": 3, "{uuid}": {"name": "{word}", "owner": "{uuid:owner}"}}
+    users = {f"{i:08x}": {"name": "john", "owner": "1d408610"} for i in range(3)}
+
+    assert json_matcher.match(template, {"count": 3, **users}, partial_match) == {
+        "uuid": {"owner": "1d408610"},
+        "word": {},
+    }
+    assert json_matcher.match({"{uuid}": 1}, {}, partial_match) == {"uuid": {}, "word": {}}
+
+    users["00000001"]["name"] = "John"
+    with pytest.raises(DictPatternMatchError, match="\\$\\.00000001\\.name"):
+        json_matcher.match(template, {"count": 3, **users}, partial_match)
+
+
+class _Untouchable:
+    """A value that fails if it is compared or inspected in any way."""
+
+    def __eq__(self, other):
+        raise AssertionError("The value should not be compared")
+
+    __ne__ = __eq__
+    __hash__ = object.__hash__
+
+
+def test_dict_matcher_any_value():
+    """Test that ANY requires the key but never inspects its value."""
+    json_matcher = DictMatcher({"number": r"\d+"})
+
+    template = {"id": "{number:id}", "blob": ANY, "items": [ANY, {"trace": ANY}]}
+    actual = {"id": "1", "blob": _Untouchable(), "items": [_Untouchable(), {"trace": {"huge": list(range(10))}}]}
+
+    assert json_matcher.match(template, actual) == {"number": {"id": "1"}}
+
+    with pytest.raises(DictKeyMismatchError, match="Keys at \\$\\.blob do not match"):
+        json_matcher.match({"id": "{number}", "blob": ANY}, {"id": "1", "extra": "x"}, partial_match=True)
+
+
+def test_dict_matcher_any_value_with_types():
+    """Test that AnyValue can restrict the type of the value."""
+    json_matcher = DictMatcher({})
+    template = {"image": AnyValue(str, bytes), "debug": AnyValue(dict)}
+
+    json_matcher.match(template, {"image": b"\x89PNG", "debug": {"a": 1}})
+
+    with pytest.raises(DictValueMismatchError, match="template: AnyValue\\(dict\\), actual: \\[1\\]"):
+        json_matcher.match(template, {"image": "aGVsbG8=", "debug": [1]})
+
+
+def test_dict_matcher_unique_in_list():
+    """Test that Unique values must be distinct among the elements of their list."""
+    json_matcher = DictMatcher({"number": r"\d+"})
+    template = {"orders": [{"id": Unique("{number}"), "customer": "{number:customer}"}] * 4}
+    orders = [{"id": str(i), "customer": "7"} for i in range(4)]
+
+    assert json_matcher.match(template, {"orders": orders}) == {"number": {"customer": "7"}}
+
+    orders[3]["id"] = "1"
+    with pytest.raises(DictPatternValueDuplicateError) as error:
+        json_matcher.match(template, {"orders": orders})
+    assert error.value.path == "$.orders[3].id"
+    assert error.value.first_path == "$.orders[1].id"
+    assert str(error.value) == "Value at $.orders[3].id is a duplicate of the value at $.orders[1].id (value: 1)"
+
+
+def test_dict_matcher_unique_scopes():
+    """Test that the default scope is the nearest list, and that named scopes span the whole document."""
+    json_matcher = DictMatcher({"number": r"\d+"})
+    template = {"pages": [{"ids": [Unique("{number}")] * 2}] * 2}
+
+    json_matcher.match(template, {"pages": [{"ids": ["1", "2"]}, {"ids": ["1", "2"]}]})
+    with pytest.raises(DictPatternValueDuplicateError, match="\\$\\.pages\\[1\\]\\.ids\\[1\\]"):
+        json_matcher.match(template, {"pages": [{"ids": ["1", "2"]}, {"ids": ["3", "3"]}]})
+
+    template = {"orders": [Unique("{number}", scope="ids")] * 2, "refund": Unique("{number}", scope="ids")}
+    json_matcher.match(template, {"orders": ["1", "2"], "refund": "3"})
+    with pytest.raises(DictPatternValueDuplicateError) as error:
+        json_matcher.match(template, {"orders": ["1", "2"], "refund": b"2"})
+    assert error.value.first_path == "$.orders[1]"
+
+
+def test_dict_matcher_unique_still_matches_template():
+    """Test that the wrapped template is matched before uniqueness is checked."""
+    json_matcher = DictMatcher({"number": r"\d+"})
+
+    with pytest.raises(DictPatternMatchError):
+        json_matcher.match([Unique("{number}")] * 2, ["1", "x"])
+    json_matcher.match([Unique({"a": ANY})] * 2, [{"a": [1]}, {"a": [2]}])
+    with pytest.raises(DictPatternValueDuplicateError):
+        json_matcher.match([Unique({"a": ANY})] * 2, [{"a": [1]}, {"a": [1]}])
+
+
+def test_dict_matcher_unique_compares_structurally():
+    """Test that unhashable Unique values are duplicates when they are equal, whatever their key order."""
+    json_matcher = DictMatcher({})
+    template = [Unique(ANY)] * 2
+
+    with pytest.raises(DictPatternValueDuplicateError) as error:
+        json_matcher.match(template, [{"a": 1, "b": [2, {"c": 3, "d": 4}]}, {"b": [2, {"d": 4, "c": 3}], "a": 1}])
+    assert error.value.first_path == "$[0]"
+    with pytest.raises(DictPatternValueDuplicateError):
+        json_matcher.match(template, [{"a": {1, 2}}, {"a": {2, 1}}])
+    json_matcher.match(template, [{"a": 1, "b": 2}, {"a": 1, "b": 3}])
+    json_matcher.match(template, [[1, 2], (1, 2)])
+    json_matcher.match(template, [[1, 2], [2, 1]])
+
+
+def test_dict_matcher_budget_nodes_and_depth():
+    """Test that the node and depth budgets stop the match at the path where they are exceeded."""
+    json_matcher = DictMatcher({"number": r"\d+"}, budget=MatchBudget(max_nodes=5))
+    template = {"items": ["{number}"] * 3, "total": "{number}"}
+    actual = {"items": ["1", "2", "3"], "total": "6"}
+
+    with pytest.raises(DictPatternBudgetError) as error:
+        json_matcher.match(template, actual)
+    assert error.value.path == "$.total"
+    assert error.value.limit == "max_nodes"
+    assert str(error.value) == "Match budget exceeded at $.total: more than 5 values visited (max_nodes)"
+    DictMatcher({"number": r"\d+"}, budget=MatchBudget(max_nodes=6)).match(template, actual)
+
+    nested = {"a": {"b": {"c": [1]}}}
+    DictMatcher({}, budget=MatchBudget(max_depth=4)).match(nested, nested)
+    with pytest.raises(DictPatternBudgetError, match="at \\$\\.a\\.b\\.c: more than 3 levels of nesting"):
+        DictMatcher({}, budget=MatchBudget(max_depth=3)).match(nested, nested)
+
+
+def test_dict_matcher_budget_string_length_and_timeout():
+    """Test that long strings are not fed to the regex and that the deadline is checked."""
+    json_matcher = DictMatcher({"word": r"[a-z]+"}, budget=MatchBudget(max_string_length=10))
+
+    json_matcher.match({"name": "{word}", "bio": "x" * 50}, {"name": "abc", "bio": "x" * 50})
+    with pytest.raises(DictPatternBudgetError, match="at \\$\\.name: more than 10 characters"):
+        json_matcher.match({"name": "{word}"}, {"name": "a" * 11})
+    with pytest.raises(DictPatternBudgetError, match="at \\$\\.name: more than 10 characters"):
+        json_matcher.match({"name": "{word}"}, {"name": b"a" * 11})
+
+    json_matcher = DictMatcher({}, budget=MatchBudget(timeout=0))
+    with pytest.raises(DictPatternBudgetError) as error:
+        json_matcher.match(list(range(1000)), list(range(1000)))
+    assert error.value.limit == "timeout"
+    assert error.value.path == "$[254]"
+
+
+def test_dict_matcher_budget_pattern_keys():
+    """Test that keys tested against key patterns are counted and length-checked before the regexes run."""
+    json_matcher = DictMatcher({"word": r"[a-z]+"}, budget=MatchBudget(max_string_length=10))
+
+    assert json_matcher.match({"{word:k}": 1}, {"abc": 1}) == {"word": {"k": "abc"}}
+    with pytest.raises(DictPatternBudgetError, match="at \\$: more than 10 characters"):
+        json_matcher.match({"{word:k}": 1}, {"a" * 100000: 1})
+    with pytest.raises(DictPatternBudgetError, match="at \\$: more than 10 characters"):
+        json_matcher.match({"{word}": 1}, {"a" * 11: 1}, partial_match=True)
+
+    json_matcher = DictMatcher({"word": r"[a-z]+"}, budget=MatchBudget(max_nodes=3))
+    json_matcher.match({"{word}": 1}, {"a": 1})
+    with pytest.raises(DictPatternBudgetError) as error:
+        json_matcher.match({"{word}": 1}, {"a": 1, "b": 1})
+    assert error.value.limit == "max_nodes"
+
+
+def test_dict_matcher_bindings_specialize_template():
+    """Test that pre-bound identifiers become literal checks and are part of the values."""
+    json_matcher = DictMatcher({"number": r"\d+", "word": r"[a-z]+"})
+    template = {"user": "{number:user_id}", "link": "/{word:kind}/{number:user_id}", "{number:user_id}": "{word:kind}"}
+    bindings = {"number": {"user_id": "42"}}
+
+    values = json_matcher.match(template, {"user": "42", "link": "/users/42", "42": "users"}, bindings=bindings)
+    assert values == {"number": {"user_id": "42"}, "word": {"kind": "users"}}
+
+    with pytest.raises(DictValueMismatchError) as error:
+        json_matcher.match(template, {"user": "43", "link": "/users/42", "42": "users"}, bindings=bindings)
+    assert error.value.path == "$.user"
+    with pytest.raises(DictPatternMatchError):
+        json_matcher.match(template, {"user": "42", "link": "/users/43", "42": "users"}, bindings=bindings)
+    with pytest.raises(DictKeyMismatchError):
+        json_matcher.match(template, {"user": "42", "link": "/users/42", "43": "users"}, bindings=bindings)
+
+
+def test_dict_matcher_bindings_of_other_types():
+    """Test that bindings which are neither str nor bytes-like are bound as their text."""
+    json_matcher = DictMatcher({"number": r"\d+"})
+    template = {"id": "{number:id}", "link": "/users/{number:id}", "raw": b"{number:id}"}
+    bindings = {"number": {"id": 42}}
+
+    assert json_matcher.match(template, {"id": "42", "link": "/users/42", "raw": b"42"}, bindings=bindings) == bindings
+    with pytest.raises(DictValueMismatchError) as error:
+        json_matcher.match(template, {"id": "43", "link": "/users/42", "raw": b"42"}, bindings=bindings)
+    assert error.value.path == "$.id"
+
+
+def test_dict_matcher_specialize_plan():
+    """Test the nodes of specialized plans and their caching per binding set."""
+    json_matcher = DictMatcher({"number": r"\d+", "word": r"[a-z]+"})
+    plan = json_matcher.compile({"user": "{number:user_id}", "link": "/{word:kind}/{number:user_id}", "name": "{word}"})
+
+    bound = json_matcher.specialize(plan, {"number": {"user_id": "4.2"}})
+    children = bound.root.children
+    assert children["user"].kind == "literal"
+    assert children["user"].value == "4.2"
+    assert children["link"].fields == [("word", "kind")]
+    assert children["link"].regex.match("/users/4.2")
+    assert not children["link"].regex.match("/users/402")
+    # Nodes without bound identifiers are shared with the original plan
+    assert children["name"] is plan.root.children["name"]
+    assert bound.bindings == {"number": {"user_id": "4.2"}}
+    assert bound.fields() == [("word", "kind")]
+
+    assert json_matcher.specialize(plan, {"number": {"user_id": "4.2"}}).root is bound.root
+    assert json_matcher.specialize(plan, {"number": {"user_id": "4.2", "other": "1"}}).root is bound.root
+    assert json_matcher.specialize(plan, {"number": {"user_id": "5"}}).root is not bound.root
+
+    compiled = json_matcher.compile({"user": "{number:user_id}"}, bindings={"number": {"user_id": "42"}})
+    assert json_matcher.match(compiled, {"user": "42"}) == {"number": {"user_id": "42"}, "word": {}}
+    assert compiled.from_data(compiled.to_data()).bindings == {"number": {"user_id": "42"}}
+    with pytest.raises(ValueError, match="conflicts"):
+        json_matcher.match(compiled, {"user": "42"}, bindings={"number": {"user_id": "43"}})
+    with pytest.raises(DictPatternTypeError):
+        json_matcher.specialize(plan, {"unknown": {"user_id": "42"}})
+
+
+def test_shared_subtrees_report_the_path_of_each_occurrence():
+    """Test that errors in subtrees shared by several occurrences have the path of the failing occurrence."""
+    matcher = DictMatcher({"number": r"\d+"})
+    template = {"items": [{"id": "{number:id}", "kind": "item"} for _ in range(1000)]}
+    actual = {"items": [{"id": "1", "kind": "item"} for _ in range(1000)]}
+    plan = matcher.compile(template)
+    assert plan.root.children["items"].items[0] is plan.root.children["items"].items[999]
+
+    actual["items"][742]["kind"] = "other"
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match(plan, actual)
+    assert exc_info.value.path == "$.items[742].kind"
+
+    actual["items"][742]["kind"] = "item"
+    actual["items"][901]["id"] = "2"
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        matcher.match(plan, actual)
+    assert exc_info.value.path == "$.items[901].id"
+
+    specialized = matcher.specialize(plan, {"number": {"id": "1"}})
+    assert specialized.root.children["items"].items[0] is specialized.root.children["items"].items[999]
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match(specialized, actual)
+    assert exc_info.value.path == "$.items[901].id"
@@ -0,0 +1,241 @@
+import copy
+import pickle
+import reprlib
+
+import pytest
+
+from dict_patterns.compiled import DictNode, ListNode, compile_plan
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.diff import DiffEntry, ValueDiff, excerpt
+from dict_patterns.exceptions import (
+    DictKeyMismatchError,
+    DictListLengthMismatchError,
+    DictPatternError,
+    DictPatternMatchError,
+    DictValueMismatchError,
+)
+from dict_patterns.sentinels import ANY, AnyValue, Unique
+
+PATTERNS = {"number": r"\d+", "string": r"[a-z]+"}
+
+
+def test_excerpt_keeps_short_values():
+    """Test that short values are quoted in full, strings without quotes."""
+    assert excerpt("user", 10) == "user"
+    assert excerpt(42, 10) == "42"
+    assert excerpt(None, 10) == "None"
+    assert excerpt([1, 2], 10) == "[1, 2]"
+
+
+def test_excerpt_truncates_long_values():
+    """Test that long values are cut, with the length of strings."""
+    assert excerpt("x" * 1000, 10) == "xxxxxxxxxx... (truncated, 1000 in total)"
+    assert excerpt(b"y" * 1000, 10) == "b'yyyyyyyy... (truncated, 1000 in total)"
+    assert excerpt(list(range(10_000)), 20) == "[0, 1, 2, 3, 4, 5, 6... (truncated)"
+
+
+def test_excerpt_does_not_render_large_containers():
+    """Test that containers are abbreviated rather than rendered in full."""
+    nested = {"items": [{"tags": ["a"] * 1000}] * 1000}
+
+    text = excerpt(nested, 10_000)
+
+    assert len(text) < 5000
+    assert "..." in text
+
+
+def test_excerpt_of_plan_nodes(monkeypatch):
+    """Test that plan nodes are quoted like their template values, without rebuilding them."""
+    template = {"b": [1, "{number:n}", AnyValue(int)], "a": Unique("x", "s"), "{string}": {"c": None}}
+    root = compile_plan(template, PATTERNS).root
+    expected = excerpt(template, 200)
+    monkeypatch.setattr(DictNode, "template", property(lambda node: pytest.fail("template rebuilt")))
+    monkeypatch.setattr(ListNode, "template", property(lambda node: pytest.fail("template rebuilt")))
+
+    assert excerpt(root, 200) == expected
+    assert excerpt(root, 20) == "{'b': [1, '{number:n... (truncated)"
+    # Keys are quoted in insertion order, like str() quotes them
+    assert expected == str(template)
+    assert expected == "{'b': [1, '{number:n}', AnyValue(int)], 'a': Unique('x', scope='s'), '{string}': {'c': None}}"
+    assert excerpt(root.children["b"].items[1], 200) == "{number:n}"
+
+
+def test_excerpt_leaves_reprlib_settings_alone():
+    """Test that excerpts use their own limits rather than changing the shared reprlib ones."""
+    maxstring = reprlib.aRepr.maxstring
+    long = excerpt(["x" * 100], 60)
+
+    assert excerpt(["x" * 100], 20) == "['xxxxxxx...xxxxxxxx... (truncated)"
+    assert excerpt(["x" * 100], 60) == long
+    assert reprlib.aRepr.maxstring == maxstring
+
+
+def test_value_diff_lists_only_differing_paths():
+    """Test that only the differing leaves of nested values are listed."""
+    template = {"id": 1, "items": [{"name": "a", "tags": ["x", "y"]}, {"name": "b"}], "meta": {"v": 1}}
+    actual = {"id": 1, "items": [{"name": "a", "tags": ["x", "z"]}, {"name": "b", "extra": True}], "owner": "me"}
+
+    diff = ValueDiff(template, actual)
+
+    assert list(diff) == [
+        DiffEntry("$.meta", "missing", {"v": 1}, None),
+        DiffEntry("$.owner", "unexpected", None, "me"),
+        DiffEntry("$.items[0].tags[1]", "changed", "y", "z"),
+        DiffEntry("$.items[1].extra", "unexpected", None, actual["items"][1]["extra"]),
+    ]
+    assert not diff.truncated
+
+
+def test_value_diff_of_lists_of_different_lengths():
+    """Test that missing and unexpected elements are listed by index."""
+    assert list(ValueDiff([1, 2, 3], [1, 5], "$.a")) == [
+        DiffEntry("$.a[2]", "missing", 3, None),
+        DiffEntry("$.a[1]", "changed", 2, 5),
+    ]
+    assert list(ValueDiff([1], [1, 2], "$.a")) == [DiffEntry("$.a[1]", "unexpected", None, 2)]
+
+
+def test_value_diff_of_equal_values_is_empty():
+    """Test that equal values have no differences."""
+    diff = ValueDiff({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]})
+
+    assert len(diff) == 0
+    assert str(diff) == ""
+
+
+def test_value_diff_is_bounded():
+    """Test that at most max_entries differences are listed."""
+    diff = ValueDiff(list(range(1000)), [-1] * 1000, max_entries=5)
+
+    assert len(diff) == 5
+    assert diff.truncated
+    assert str(diff).endswith("\n...")
+
+
+def test_value_diff_format_uses_excerpts():
+    """Test that formatted differences quote values in bounded excerpts."""
+    diff = ValueDiff({"a": "x" * 1000, "b": 1}, {"a": "y", "c": 2})
+
+    assert diff.format(limit=5).splitlines() == [
+        "$.b: missing (template: 1)",
+        "$.c: unexpected (actual: 2)",
+        "$.a: changed (template: xxxxx... (truncated, 1000 in total), actual: y)",
+    ]
+
+
+def test_value_diff_of_compiled_template_checks_patterns():
+    """Test that plan nodes are compared the way the matcher compares them."""
+    plan = compile_plan({"id": "{number:id}", "name": "{string}", "any": ANY, "tags": ["{string}"]}, PATTERNS)
+    actual = {"id": "12", "name": "BOB", "any": [1], "tags": ["ok", "x"]}
+
+    diff = ValueDiff(plan.root, actual, compiled=True)
+
+    assert list(diff) == [
+        DiffEntry("$.name", "changed", "{string}", "BOB"),
+        DiffEntry("$.tags[1]", "unexpected", None, "x"),
+    ]
+
+
+def test_value_mismatch_message_is_rendered_lazily():
+    """Test that the message of a mismatch is only rendered when read."""
+    rendered = []
+
+    class Value:
+        def __repr__(self):
+            rendered.append(self)
+            return "value"
+
+    error = DictValueMismatchError("$.a", "user", Value())
+
+    assert error.path == "$.a"
+    assert not rendered
+    assert str(error) == "Values at $.a do not match (template: user, actual: value)"
+    assert len(rendered) == 1
+
+
+def test_mismatch_message_is_bounded():
+    """Test that large values are quoted in excerpts while staying reachable as attributes."""
+    matcher = DictMatcher(PATTERNS)
+    template = {"data": {"items": list(range(10_000))}}
+    actual = {"data": "x" * 100_000}
+
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        matcher.match(template, actual)
+
+    error = exc_info.value
+    assert len(str(error)) < 2 * DictPatternError.max_value_length + 200
+    assert "(truncated, 100000 in total)" in str(error)
+    assert error.template_value == {"items": list(range(10_000))}
+    assert error.actual_value == "x" * 100_000
+
+
+def test_pattern_mismatch_message_is_bounded():
+    """Test that the string quoted by a pattern mismatch is an excerpt."""
+    matcher = DictMatcher(PATTERNS)
+
+    with pytest.raises(DictPatternMatchError) as exc_info:
+        matcher.match({"a": "{number}"}, {"a": "x" * 10_000})
+
+    assert len(str(exc_info.value)) < DictPatternError.max_value_length + 100
+    assert exc_info.value.actual == "x" * 10_000
+
+
+def test_key_mismatch_diff():
+    """Test that a key mismatch lists the missing and unexpected keys and the mismatching values."""
+    matcher = DictMatcher(PATTERNS)
+    template = {"user": {"id": "{number:id}", "name": "{string}", "role": "admin"}}
+    actual = {"user": {"id": "x", "name": "bob", "roles": ["admin"]}}
+
+    with pytest.raises(DictKeyMismatchError) as exc_info:
+        matcher.match(template, actual)
+
+    assert str(exc_info.value) == "Keys at $.user do not match"
+    assert exc_info.value.diff.format().splitlines() == [
+        "$.user.role: missing (template: admin)",
+        "$.user.roles: unexpected (actual: ['admin'])",
+        "$.user.id: changed (template: {number:id}, actual: x)",
+    ]
+
+
+def test_list_length_mismatch_diff():
+    """Test that a list length mismatch lists the missing elements."""
+    matcher = DictMatcher(PATTERNS)
+
+    with pytest.raises(DictListLengthMismatchError) as exc_info:
+        matcher.match({"a": ["{number}", "{number}", "x"]}, {"a": ["1", "y"]})
+
+    assert list(exc_info.value.diff) == [
+        DiffEntry("$.a[2]", "missing", "x", None),
+        DiffEntry("$.a[1]", "changed", "{number}", "y"),
+    ]
+
+
+def test_errors_with_diff_can_be_pickled():
+    """Test that pickled errors keep their values, without their plan nodes."""
+    matcher = DictMatcher(PATTERNS)
+
+    with pytest.raises(DictKeyMismatchError) as exc_info:
+        matcher.match({"a": {"b": "{number}"}}, {"a": {"c": "1"}})
+
+    restored = pickle.loads(pickle.dumps(exc_info.value))
+
+    assert str(restored) == "Keys at $.a do not match"
+    assert restored.template_value == {"b": "{number}"}
+    assert restored.actual_value == {"c": "1"}
+    assert [entry.path for entry in restored.diff] == ["$.a.b", "$.a.c"]
+
+
+def test_errors_keep_their_message_as_args():
+    """Test that the rendered message is the argument of errors, through pickling and copies."""
+    with pytest.raises(DictValueMismatchError) as exc_info:
+        DictMatcher(PATTERNS).match({"a": {"b": 1}}, {"a": {"b": 2}})
+    error = exc_info.value
+
+    assert error.args == ("Values at $.a.b do not match (template: 1, actual: 2)",)
+    assert pickle.loads(pickle.dumps(error)).args == error.args
+    assert copy.copy(error).args == error.args
+
+    error.message = "Another message"
+    assert error.args == ("Another message",)
+    error.args = ("Yet another message", 1)
+    assert str(error) == "Yet another message"
@@ -0,0 +1,63 @@
+import json
+
+from dict_patterns.compiled import compile_plan
+from dict_patterns.explain import CostEstimate, ExplainEntry
+from dict_patterns.sentinels import ANY, Unique
+
+PATTERNS = {"number": r"\d+", "word": r"[a-z]+"}
+
+
+def test_explain_entries_and_bindings():
+    """Test that every node is listed in match order, with the identifiers it binds and checks."""
+    template = {
+        "id": "{number:user_id}",
+        "name": "John",
+        "{word:field}": ["{number:user_id}-{word}", Unique("{number}")],
+        "blob": ANY,
+    }
+
+    explanation = compile_plan(template, PATTERNS).explain()
+
+    assert [(entry.path, entry.kind) for entry in explanation.entries] == [
+        ("$", "dict"),
+        ("$.id", "pattern"),
+        ("$.name", "literal"),
+        ("$.blob", "any"),
+        ("$.{word:field}", "key"),
+        ("$.{word:field}", "list"),
+        ("$.{word:field}[0]", "pattern"),
+        ("$.{word:field}[1]", "unique"),
+        ("$.{word:field}[1]", "pattern"),
+    ]
+    assert explanation.entries[1] == ExplainEntry(
+        "$.id", "pattern", r"^(\d+)$", (("number", "user_id"),), ("number:user_id",), ()
+    )
+    assert explanation.entries[6].source == r"^(\d+)\-([a-z]+)$"
+    assert explanation.entries[6].checks == ("number:user_id",)
+    assert explanation.bindings == {
+        "number:user_id": {"bound_at": "$.id", "checked_at": ["$.{word:field}[0]"]},
+        "word:field": {"bound_at": "$.{word:field}", "checked_at": []},
+    }
+
+
+def test_explain_cost_estimate():
+    """Test the static cost estimate."""
+    template = {"items": [{"id": "{number}", "tags": ["{word}", "{word}"]}] * 3, "total": "{number}"}
+
+    cost = compile_plan(template, PATTERNS).explain().cost
+
+    assert cost == CostEstimate(regex_count=2, regex_evaluations=10, nodes=18, depth=4)
+
+
+def test_explain_renderings():
+    """Test the text and JSON renderings."""
+    explanation = compile_plan({"id": "{number:id}", "raw": b"{number:id}"}, PATTERNS).explain()
+
+    text = str(explanation)
+    assert "$.raw  pattern  b'^(\\\\d+)$'  checks number:id (bound at $.id)" in text
+    assert text.endswith("Cost: 2 regexes, 2 regex evaluations, at most 3 values visited, depth 1")
+
+    data = json.loads(json.dumps(explanation.to_data()))
+    assert data["entries"][2]["source"] == "^(\\d+)$"
+    assert data["entries"][2]["checks"] == ["number:id"]
+    assert data["cost"]["nodes"] == 3
@@ -0,0 +1,132 @@
+import json
+import os
+
+import pytest
+
+from dict_patterns import compiled, loader
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.loader import TemplateLoader
+
+PATTERNS = {"number": r"\d+", "string": r"[a-zA-Z]+"}
+
+
+@pytest.fixture
+def template_file(tmp_path):
+    path = tmp_path / "templates" / "user.json"
+    path.parent.mkdir()
+    path.write_text(json.dumps({"id": "{number:user_id}", "name": "{string:name}"}))
+    return path
+
+
+def _fail_compile(*args, **kwargs):
+    raise AssertionError("The template should not be analysed")
+
+
+def test_load_without_cache(template_file):
+    """Test loading a template without a cache directory."""
+    template = TemplateLoader(PATTERNS).load(template_file)
+
+    values = DictMatcher(PATTERNS).match(template, {"id": "42", "name": "John"})
+    assert values == {"number": {"user_id": "42"}, "string": {"name": "John"}}
+
+
+def test_warm_start_skips_analysis(template_file, tmp_path, monkeypatch):
+    """Test that a cached plan is restored without analysing the template."""
+    cache_dir = tmp_path / "cache"
+    TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    monkeypatch.setattr(compiled, "compile_template", _fail_compile)
+    template = TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    values = DictMatcher(PATTERNS).match(template, {"id": "42", "name": "John"})
+    assert values == {"number": {"user_id": "42"}, "string": {"name": "John"}}
+
+
+def test_cache_invalidated_when_file_changes(template_file, tmp_path):
+    """Test that editing the template file invalidates the cached plan."""
+    cache_dir = tmp_path / "cache"
+    TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    template_file.write_text(json.dumps({"id": "{number:other_id}"}))
+    template = TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    assert template.template == {"id": "{number:other_id}"}
+    assert len(list(cache_dir.glob("*.json"))) == 2
+
+
+def test_cache_invalidated_when_handlers_change(template_file, tmp_path):
+    """Test that changing the pattern handlers invalidates the cached plan."""
+    cache_dir = tmp_path / "cache"
+    TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    other_patterns = {"number": r"[0-9]+", "string": r"[a-z]+"}
+    template = TemplateLoader(other_patterns, cache_dir=cache_dir).load(template_file)
+
+    assert template.root.children["name"].source == "^([a-z]+)$"
+    assert template.fingerprint == DictMatcher(other_patterns).fingerprint
+
+
+def test_corrupt_cache_entry_is_recompiled(template_file, tmp_path):
+    """Test that an unreadable cache entry is replaced by a fresh plan."""
+    cache_dir = tmp_path / "cache"
+    TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+    (cache_file,) = cache_dir.glob("*.json")
+    cache_file.write_text("{not json")
+
+    template = TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    assert template.template == {"id": "{number:user_id}", "name": "{string:name}"}
+    assert json.loads(cache_file.read_text())["plan"] == template.to_data()
+
+
+def test_load_directory(template_file, tmp_path):
+    """Test loading every template in a directory tree."""
+    nested = template_file.parent / "orders" / "get.json"
+    nested.parent.mkdir()
+    nested.write_text(json.dumps({"total": "{number}"}))
+
+    templates = TemplateLoader(PATTERNS, cache_dir=tmp_path / "cache").load_directory(template_file.parent)
+
+    assert sorted(templates) == ["orders/get", "user"]
+    assert templates["orders/get"].template == {"total": "{number}"}
+
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() == 0, reason="root ignores directory permissions")
+def test_read_only_cache_dir_is_skipped(template_file, tmp_path):
+    """Test that a cache directory that cannot be written does not make loading fail."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    cache_dir.chmod(0o500)
+    try:
+        template = TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+    finally:
+        cache_dir.chmod(0o700)
+
+    assert template.template == {"id": "{number:user_id}", "name": "{string:name}"}
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_unusable_cache_dir_is_skipped(template_file, tmp_path):
+    """Test that a cache path that is not a directory does not make loading fail."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("not a directory")
+
+    template = TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    assert template.template == {"id": "{number:user_id}", "name": "{string:name}"}
+    assert cache_dir.read_text() == "not a directory"
+
+
+def test_failed_cache_write_removes_temp_file(template_file, tmp_path, monkeypatch):
+    """Test that a cache entry that fails to be written leaves no temporary file behind."""
+    cache_dir = tmp_path / "cache"
+
+    def fail_replace(source, destination):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(loader.os, "replace", fail_replace)
+    template = TemplateLoader(PATTERNS, cache_dir=cache_dir).load(template_file)
+
+    assert template.template == {"id": "{number:user_id}", "name": "{string:name}"}
+    assert list(cache_dir.iterdir()) == []
@@ -1,7 +1,7 @@
 import pytest
 
 from dict_patterns.exceptions import DictPatternTypeError
-from dict_patterns.patterns import compile_template
+from dict_patterns.patterns import bind_template, compile_template
 
 
 def test_compile_template():
@@ -173,3 +173,45 @@ def test_different_pattern_names(pattern_name):
     assert fields == [(pattern_name, "video_id")]
     match = regex.match("1d408610-f129-47a8-a4c1-1a6e0ca2d16f/chunk_000001_000009.mp4")
     assert match is not None
+
+
+def test_compile_bytes_template():
+    """Test that bytes templates compile into bytes regexes with str field names."""
+    template = b"{uuid:1}/user/{int:user_id}"
+    pattern_handlers = {"uuid": r"[0-9a-f-]+", "int": r"\d+"}
+
+    regex, fields = compile_template(template, pattern_handlers)
+
+    assert fields == [("uuid", "1"), ("int", "user_id")]
+    assert isinstance(regex.pattern, bytes)
+    match = regex.match(b"1d408610-f129/user/42")
+    assert match is not None
+    assert match.group(2) == b"42"
+
+
+def test_compile_bytes_template_unknown_pattern():
+    """Test that unknown pattern types in bytes templates raise errors."""
+    with pytest.raises(DictPatternTypeError, match="Unknown pattern type: unknown"):
+        compile_template(b"{unknown:test}", {"uuid": r"[0-9a-f]+"})
+
+
+def test_compile_template_with_bound_values():
+    """Test that bound placeholders are matched as escaped literals and left out of the fields."""
+    pattern_handlers = {"string": r"[a-z]+", "number": r"\d+"}
+
+    regex, fields = compile_template("{string:name}/{number:id}", pattern_handlers, {("number", "id"): "4.2"})
+    assert fields == [("string", "name")]
+    assert regex.match("abc/4.2") is not None
+    assert regex.match("abc/402") is None
+
+    regex, fields = compile_template(b"{string:name}/{number:id}", pattern_handlers, {("number", "id"): "42"})
+    assert fields == [("string", "name")]
+    assert regex.match(b"abc/42") is not None
+
+
+def test_bind_template():
+    """Test that bound placeholders are substituted and the others kept."""
+    bound = {("number", "id"): "{x}", ("string", "name"): b"abc"}
+
+    assert bind_template("{string:name}/{number:id}/{number:other}", bound) == "abc/{x}/{number:other}"
+    assert bind_template(b"{number:id}", bound) == b"{x}"
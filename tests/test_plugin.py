@@ -1,5 +1,8 @@
 import pytest
 
+from dict_patterns.compiled import DictNode, compile_plan
+from dict_patterns.pytest_plugin import MatchDurations
+
 
 def test_plugin(dict_matcher):
     assert dict_matcher is not None
@@ -59,3 +62,89 @@ class TestWithPatternHandlers:
             "string": {"name": "John"},
             "number": {"age": "25"},
         }
+
+
+def test_durations_report(pytester):
+    """Test that --dict-patterns-durations reports matches by test and by template."""
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.fixture
+        def pattern_handlers():
+            return {"number": r"\\d+"}
+
+        def test_many(dict_match):
+            for i in range(5):
+                dict_match({"id": "{number:id}"}, {"id": str(i)})
+
+        def test_once(dict_matcher):
+            dict_matcher.match({"id": "{number:id}", "name": "x"}, {"id": "1", "name": "x"})
+        """
+    )
+
+    result = pytester.runpytest("-p", "no:cacheprovider", "--dict-patterns-durations=1")
+
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(
+        [
+            "*slowest 1 dict-patterns matches by test*",
+            "*s total *s compile *s match       ? calls  test_durations_report.py::test_*",
+            "*slowest 1 dict-patterns matches by template*",
+            "*s total *s compile *s match       ? calls  * {'id': '{number:id}'*",
+        ]
+    )
+    assert "by template" in result.stdout.str()
+
+
+def test_durations_with_bindings(pytester):
+    """Test that matches with bindings are recorded when durations are reported."""
+    pytester.makepyfile(
+        """
+        import pytest
+
+        from dict_patterns import DictValueMismatchError
+
+        @pytest.fixture
+        def pattern_handlers():
+            return {"number": r"\\d+"}
+
+        def test_bound(dict_matcher):
+            template, bindings = {"id": "{number:id}"}, {"number": {"id": "1"}}
+            assert dict_matcher.match(template, {"id": "1"}, bindings=bindings) == bindings
+            with pytest.raises(DictValueMismatchError):
+                dict_matcher.match(template, {"id": "2"}, bindings=bindings)
+        """
+    )
+
+    result = pytester.runpytest("-p", "no:cacheprovider", "--dict-patterns-durations=1")
+
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(
+        ["*s total *s compile *s match       2 calls  test_durations_with_bindings.py::test_bound"]
+    )
+
+
+def test_durations_identify_compiled_templates_once(monkeypatch):
+    """Test that compiled templates share the identity of their raw template and are only rebuilt once."""
+    template = {"id": "{number:id}"}
+    compiled = compile_plan(template, {"number": r"\d+"})
+    durations = MatchDurations()
+
+    durations.add("test_a", compiled, 0.0, 1.0)
+    monkeypatch.setattr(DictNode, "template", property(lambda node: pytest.fail("template rebuilt")))
+    durations.add("test_a", compiled, 0.0, 1.0)
+    durations.add("test_b", template, 0.0, 1.0)
+
+    assert list(durations.by_template.values()) == [[3, 0.0, 3.0]]
+    assert list(durations.template_labels.values()) == [f"{compiled.digest[:12]} {template!r}"]
+
+
+def test_durations_disabled(pytester):
+    """Test that nothing is reported without the option."""
+    pytester.makepyfile("def test_match(dict_match):\n    assert dict_match({'a': 1}, {'a': 1}) == {}\n")
+
+    result = pytester.runpytest("-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=1)
+    assert "dict-patterns matches" not in result.stdout.str()
@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import DictPatternTypeError
+from dict_patterns.loader import TemplateLoader
+from dict_patterns.registry import TemplateRegistry
+
+PATTERNS = {"number": r"\d+", "string": r"[a-zA-Z]+"}
+
+
+def _write(path, template, mtime_ns=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(template))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    _write(tmp_path / "user.json", {"id": "{number:user_id}"}, 1_000_000_000)
+    _write(tmp_path / "orders" / "get.json", {"name": "{string:name}"}, 1_000_000_000)
+    return tmp_path
+
+
+def test_registry_loads_directory(templates_dir):
+    """Test that templates are named after their relative path and loaded on creation."""
+    registry = TemplateRegistry(TemplateLoader(PATTERNS), templates_dir)
+
+    assert registry.names() == ["orders/get", "user"]
+    assert "user" in registry
+    assert registry.version == 2
+    template = registry.get("user")
+    assert template.path == templates_dir / "user.json"
+    assert DictMatcher(PATTERNS).match(template.plan, {"id": "42"}) == {"number": {"user_id": "42"}, "string": {}}
+
+
+def test_reload_only_changed_files(templates_dir):
+    """Test that reload compiles modified, added and removed files and bumps the version for each."""
+    registry = TemplateRegistry(TemplateLoader(PATTERNS), templates_dir)
+    user = registry.get("user")
+    assert registry.reload() == []
+
+    _write(templates_dir / "user.json", {"id": "{number:user_id}", "name": "{string:name}"}, 2_000_000_000)
+    _write(templates_dir / "new.json", {"id": "{number:id}"})
+    (templates_dir / "orders" / "get.json").unlink()
+
+    assert sorted(registry.reload()) == ["new", "orders/get", "user"]
+    assert registry.version == 5
+    assert registry.names() == ["new", "user"]
+    assert registry.get("user").version > user.version
+    assert registry.get("user").plan.fields() != user.plan.fields()
+
+
+def test_failed_reload_keeps_previous_version(templates_dir):
+    """Test that a template failing to compile keeps its previous plan and reports the error."""
+    reported = []
+    registry = TemplateRegistry(
+        TemplateLoader(PATTERNS), templates_dir, on_error=lambda name, error: reported.append((name, error))
+    )
+    previous = registry.get("user")
+
+    _write(templates_dir / "user.json", {"id": "{unknown:user_id}"}, 2_000_000_000)
+    assert registry.reload() == []
+    assert registry.get("user") is previous
+    assert isinstance(registry.errors["user"], DictPatternTypeError)
+    assert [name for name, _ in reported] == ["user"]
+
+    # The broken file is not compiled again until it changes
+    assert registry.reload() == []
+    assert len(reported) == 1
+
+    (templates_dir / "user.json").write_text("{not json")
+    os.utime(templates_dir / "user.json", ns=(3_000_000_000, 3_000_000_000))
+    registry.reload()
+    assert isinstance(registry.errors["user"], ValueError)
+
+    errors = registry.errors
+    _write(templates_dir / "user.json", {"id": "{number:user_id}"}, 4_000_000_000)
+    assert registry.reload() == ["user"]
+    assert "user" not in registry.errors
+    # The dictionary is replaced, so readers iterating the previous one are not disturbed
+    assert "user" in errors
+
+
+def test_failing_on_error_is_logged(templates_dir, caplog):
+    """Test that an exception raised by on_error is logged and the other templates are still reloaded."""
+
+    def on_error(name, error):
+        raise RuntimeError("callback failed")
+
+    registry = TemplateRegistry(TemplateLoader(PATTERNS), templates_dir, on_error=on_error)
+    _write(templates_dir / "user.json", {"id": "{unknown:user_id}"}, 2_000_000_000)
+    _write(templates_dir / "orders" / "get.json", {"name": "{number:name}"}, 2_000_000_000)
+
+    assert registry.reload() == ["orders/get"]
+    assert isinstance(registry.errors["user"], DictPatternTypeError)
+    assert "The on_error callback failed on the error of template user" in caplog.text
+
+
+def test_snapshot_is_consistent(templates_dir):
+    """Test that a snapshot is not modified by later reloads."""
+    registry = TemplateRegistry(TemplateLoader(PATTERNS), templates_dir)
+    snapshot = registry.snapshot()
+
+    _write(templates_dir / "user.json", {"id": "{string:user_id}"}, 2_000_000_000)
+    registry.reload()
+
+    assert snapshot["user"].path == registry.get("user").path
+    assert snapshot["user"] is not registry.get("user")
+    assert registry.snapshot()["user"] is registry.get("user")
+
+
+def test_background_polling(templates_dir):
+    """Test that the background thread picks up changes while matches run."""
+    registry = TemplateRegistry(TemplateLoader(PATTERNS), templates_dir, poll_interval=0.01)
+    matcher = DictMatcher(PATTERNS)
+    stop = threading.Event()
+    failures = []
+
+    def match_forever():
+        while not stop.is_set():
+            try:
+                matcher.match(registry.get("user").plan, {"id": "42"})
+            except Exception as error:  # noqa: BLE001
+                failures.append(error)
+
+    with registry:
+        thread = threading.Thread(target=match_forever)
+        thread.start()
+        _write(templates_dir / "user.json", {"id": "{number:customer_id}"}, 2_000_000_000)
+        deadline = time.monotonic() + 5
+        while registry.version < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stop.set()
+        thread.join()
+
+    assert registry.version == 3
+    assert failures == []
+    assert matcher.match(registry.get("user").plan, {"id": "42"}) == {"number": {"customer_id": "42"}, "string": {}}
+
+
+class _FlakyLoader(TemplateLoader):
+    """A loader failing unexpectedly on its first loads."""
+
+    def __init__(self, failures):
+        super().__init__(PATTERNS)
+        self.failures = failures
+
+    def load(self, path):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("unexpected failure")
+        return super().load(path)
+
+
+@pytest.mark.parametrize("report", [True, False])
+def test_background_polling_survives_errors(templates_dir, caplog, report):
+    """Test that an unexpected error of a poll is reported and the thread keeps polling."""
+    loader = _FlakyLoader(0)
+    reported = []
+    on_error = (lambda name, error: reported.append((name, error))) if report else None
+    registry = TemplateRegistry(loader, templates_dir, poll_interval=0.01, on_error=on_error)
+
+    with registry:
+        loader.failures = 2
+        _write(templates_dir / "user.json", {"id": "{number:customer_id}"}, 2_000_000_000)
+        deadline = time.monotonic() + 5
+        while registry.version < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert registry.version == 3
+    assert registry.errors == {}
+    if report:
+        assert [(name, type(error)) for name, error in reported] == [(None, RuntimeError)] * 2
+    else:
+        assert caplog.text.count("Reloading the templates of") == 2
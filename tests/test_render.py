@@ -0,0 +1,81 @@
+import pytest
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.render import TemplateRenderer
+from dict_patterns.sentinels import ANY, AnyValue
+
+PATTERNS = {"id": r"\d+", "name": r"[a-z]+"}
+
+
+def test_render_fills_placeholders():
+    """Test that whole and partial string placeholders are filled with their values."""
+    matcher = DictMatcher(PATTERNS)
+    renderer = TemplateRenderer(
+        matcher.compile({"id": "{id:user_id}", "url": "/users/{id:user_id}/{name:user_name}", "age": 30})
+    )
+
+    rendered = renderer.render({"id": {"user_id": 42}, "name": {"user_name": "john"}})
+
+    assert rendered == {"id": "42", "url": "/users/42/john", "age": 30}
+    assert list(rendered) == ["id", "url", "age"]
+
+
+def test_render_round_trip():
+    """Test that rendering the values of a match produces a document matching the template again."""
+    matcher = DictMatcher(PATTERNS)
+    template = {
+        "id": "{id:user_id}",
+        "{name:field}_id": "{id:user_id}",
+        "friends": [{"name": "{name:friend}", "blob": ANY, "tags": AnyValue(list)}, "static"],
+        "raw": b"user-{id:user_id}",
+        "meta": {"source": "import", "version": 2},
+    }
+    document = {
+        "id": "7",
+        "owner_id": "7",
+        "friends": [{"name": "ann", "blob": {"large": "value"}, "tags": ["x"]}, "static"],
+        "raw": b"user-7",
+        "meta": {"source": "import", "version": 2},
+    }
+    compiled = matcher.compile(template)
+    values = matcher.match(compiled, document)
+
+    rendered = TemplateRenderer(compiled).render(values)
+
+    assert rendered == {**document, "friends": [{"name": "ann", "blob": None, "tags": []}, "static"]}
+    assert matcher.match(compiled, rendered) == values
+
+
+def test_render_shares_static_subtrees():
+    """Test that subtrees without placeholders are built once."""
+    matcher = DictMatcher(PATTERNS)
+    renderer = TemplateRenderer(matcher.compile({"id": "{id:user_id}", "meta": {"tags": ["a", "b"]}}))
+
+    first = renderer.render({"id": {"user_id": "1"}})
+    second = renderer.render({"id": {"user_id": "2"}})
+
+    assert first["meta"] is second["meta"]
+    assert first is not second
+
+
+def test_render_missing_value():
+    """Test that placeholders without a value are reported with their path."""
+    matcher = DictMatcher(PATTERNS)
+    renderer = TemplateRenderer(matcher.compile({"items": [{"id": "{id:item_id}"}], "name": "{name}"}), {"name": "x"})
+
+    with pytest.raises(ValueError, match=r"No value for placeholder \{id:item_id\} at \$.items\[0\].id"):
+        renderer.render({"name": {}})
+
+
+def test_render_anonymous_placeholders():
+    """Test that placeholders without identifier are rendered from examples, and rejected up front without one."""
+    matcher = DictMatcher(PATTERNS)
+    compiled = matcher.compile({"name": "{name}", "url": "/users/{id:user_id}/{name}", "{name}": "{id}"})
+    values = matcher.match(compiled, {"name": "ann", "url": "/users/7/bob", "extra": "12"})
+
+    rendered = TemplateRenderer(compiled, examples={"name": "example", "id": "1"}).render(values)
+
+    assert rendered == {"name": "example", "url": "/users/7/example", "example": "1"}
+    assert matcher.match(compiled, rendered) == values
+    with pytest.raises(ValueError, match=r"Placeholder \{name\} at \$.name has no identifier and no example value"):
+        TemplateRenderer(compiled, examples={"id": "1"})
@@ -0,0 +1,133 @@
+import pytest
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import (
+    DictListLengthMismatchError,
+    DictPatternMatchError,
+    DictPatternValueInconsistencyError,
+)
+from dict_patterns.sampling import SamplingDictMatcher, sample_confidence
+
+PATTERNS = {"id": r"\d+", "name": r"[a-z]+"}
+
+
+def _document(count):
+    template = {"owner": "{id:owner}", "items": [{"owner": "{id:owner}", "name": "{name}"}] * count}
+    actual = {"owner": "7", "items": [{"owner": "7", "name": "abc"} for _ in range(count)]}
+    return template, actual
+
+
+def _matcher(**options):
+    options = {"head": 5, "tail": 5, "rate": 0.1, "seed": 1, "min_length": 100, **options}
+    return SamplingDictMatcher(PATTERNS, **options)
+
+
+def test_small_lists_are_checked_entirely():
+    """Test that lists shorter than min_length are matched like a DictMatcher does."""
+    template, actual = _document(99)
+    actual["items"][50]["name"] = "123"
+    matcher = _matcher()
+
+    with pytest.raises(DictPatternMatchError) as error:
+        matcher.match(template, actual)
+    assert error.value.path == "$.items[50].name"
+    assert matcher.samples == []
+
+
+def test_large_list_sample_report():
+    """Test that a large list is checked by sampling and reported."""
+    template, actual = _document(1010)
+    matcher = _matcher()
+
+    values = matcher.match(template, actual)
+
+    assert values == {"id": {"owner": "7"}, "name": {}}
+    [sample] = matcher.samples
+    assert sample.path == "$.items"
+    assert sample.length == 1010
+    assert sample.sampled == 100
+    assert sample.checked == 110
+    # 10 failing elements among 1000 are missed by a sample of 100 about one time out of three
+    assert sample.confidence == pytest.approx(0.653, abs=1e-3)
+
+
+def test_sample_is_reproducible():
+    """Test that the sample only depends on the seed and the list path."""
+    indices = _matcher().sample_indices("$.items", 1000)
+
+    assert indices == _matcher().sample_indices("$.items", 1000)
+    assert indices != _matcher(seed=2).sample_indices("$.items", 1000)
+    assert indices != _matcher().sample_indices("$.other", 1000)
+    assert indices[:5] == [0, 1, 2, 3, 4]
+    assert indices[-5:] == [995, 996, 997, 998, 999]
+    assert indices == sorted(set(indices))
+
+
+def test_head_tail_and_sampled_elements_are_checked():
+    """Test that failures are found in the head, the tail and the sampled elements, and skipped elsewhere."""
+    template, _ = _document(1000)
+    matcher = _matcher()
+    indices = set(matcher.sample_indices("$.items", 1000))
+    skipped = next(i for i in range(1000) if i not in indices)
+    sampled = next(i for i in sorted(indices) if i >= matcher.head)
+
+    for index in (0, 999, sampled):
+        _, actual = _document(1000)
+        actual["items"][index]["name"] = "123"
+        with pytest.raises(DictPatternMatchError) as error:
+            matcher.match(template, actual)
+        assert error.value.path == f"$.items[{index}].name"
+
+    _, actual = _document(1000)
+    actual["items"][skipped]["name"] = "123"
+    matcher.match(template, actual)
+    with pytest.raises(DictPatternMatchError):
+        DictMatcher(PATTERNS).match(template, actual)
+
+
+def test_consistency_across_sampled_elements():
+    """Test that identifiers bound by one sampled element are checked by the others."""
+    template = {"items": [{"owner": "{id:owner}"}] * 1000}
+    actual = {"items": [{"owner": "7"} for _ in range(1000)]}
+    actual["items"][999]["owner"] = "8"
+
+    with pytest.raises(DictPatternValueInconsistencyError) as error:
+        _matcher().match(template, actual)
+    assert error.value.path == "$.items[999].owner"
+
+
+def test_length_is_still_checked():
+    """Test that sampled lists must have the length of their template."""
+    template, actual = _document(1000)
+    actual["items"].pop()
+
+    with pytest.raises(DictListLengthMismatchError):
+        _matcher().match(template, actual)
+
+
+def test_match_sampled_returns_samples():
+    """Test that match_sampled returns the samples of its own call."""
+    template, actual = _document(500)
+    values, samples = _matcher().match_sampled(template, actual)
+
+    assert values["id"] == {"owner": "7"}
+    assert [sample.path for sample in samples] == ["$.items"]
+
+
+def test_sample_confidence():
+    """Test the confidence of random samples."""
+    assert sample_confidence(100, 100, 0.01) == 1.0
+    assert sample_confidence(100, 0, 0.01) == 0.0
+    # One failing element among 100, found by a sample of 50 one time out of two
+    assert sample_confidence(100, 50, 0.01) == pytest.approx(0.5)
+    assert sample_confidence(100_000, 1000, 0.01) > sample_confidence(100_000, 100, 0.01)
+
+
+def test_invalid_options():
+    """Test that invalid sampling options are rejected."""
+    with pytest.raises(ValueError, match="rate"):
+        SamplingDictMatcher(PATTERNS, rate=1.5)
+    with pytest.raises(ValueError, match="tolerance"):
+        SamplingDictMatcher(PATTERNS, tolerance=0)
+    with pytest.raises(ValueError, match="negative"):
+        SamplingDictMatcher(PATTERNS, head=-1)
@@ -0,0 +1,78 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import DictPatternMatchError
+from dict_patterns.scanner import scan_jsonl, split_ranges
+
+PATTERNS = {"id": r"\d+"}
+TEMPLATE = {"id": "{id:id}"}
+
+
+@pytest.fixture
+def capture(tmp_path):
+    lines = [json.dumps({"id": str(i)}) for i in range(200)]
+    lines[57] = json.dumps({"id": "x"})
+    lines[120] = ""
+    lines[150] = "{broken"
+    path = tmp_path / "capture.jsonl"
+    # No newline at the end of the last line
+    path.write_text("\n".join(lines))
+    return path
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        yield pool
+
+
+def test_split_ranges_are_aligned_to_lines(capture):
+    """Test that ranges cover the file and end after a newline."""
+    content = capture.read_bytes()
+    ranges = split_ranges(capture, chunk_size=100)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(content)
+    for (_, end), (start, _) in zip(ranges[:-1], ranges[1:], strict=True):
+        assert end == start
+        assert content[end - 1 : end] == b"\n"
+
+
+def test_scan_jsonl_line_numbers(capture, executor):
+    """Test that results come back in file order with their original line numbers."""
+    results = list(scan_jsonl(DictMatcher(PATTERNS), TEMPLATE, capture, chunk_size=300, executor=executor))
+
+    assert [line for line, _ in results] == [line for line in range(1, 201) if line != 121]
+    failures = {line: result.error for line, result in results if not result.ok}
+    assert list(failures) == [58, 151]
+    assert isinstance(failures[58], DictPatternMatchError)
+    assert isinstance(failures[151], json.JSONDecodeError)
+    assert dict(results)[200].values == {"id": {"id": "199"}}
+
+
+def test_scan_jsonl_stop_on_error(capture, executor):
+    """Test that the scan stops at the first failing line."""
+    results = list(
+        scan_jsonl(DictMatcher(PATTERNS), TEMPLATE, capture, stop_on_error=True, chunk_size=300, executor=executor)
+    )
+
+    assert len(results) == 58
+    assert results[-1][0] == 58
+
+
+def test_scan_jsonl_with_process_pool(capture):
+    """Test scanning with the default process pool."""
+    scan = scan_jsonl(DictMatcher(PATTERNS), TEMPLATE, capture, chunk_size=1000, max_workers=2)
+
+    assert sum(not result.ok for _, result in scan) == 2
+
+
+def test_scan_jsonl_empty_file(tmp_path, executor):
+    """Test that an empty file has no results."""
+    path = tmp_path / "empty.jsonl"
+    path.write_bytes(b"")
+
+    assert list(scan_jsonl(DictMatcher(PATTERNS), TEMPLATE, path, executor=executor)) == []
@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import (
+    DictPatternMatchError,
+    DictPatternTypeError,
+    DictPatternValueInconsistencyError,
+)
+from dict_patterns.session import MatchSession, SessionBinding
+from dict_patterns.sharding import ShardedDictMatcher
+
+PATTERNS = {"number": r"\d+", "string": r"[a-z]+"}
+
+CREATE = {"id": "{number:user_id}", "name": "{string:name}"}
+GET = {"user": {"id": "{number:user_id}", "name": "{string:name}", "team": "{number:team_id}"}}
+LIST = {"users": [{"id": "{number:user_id}"}, {"id": "{number}"}]}
+
+
+@pytest.fixture
+def session():
+    return MatchSession(DictMatcher(PATTERNS))
+
+
+def test_session_carries_bindings_across_documents(session):
+    """Test that identifiers bound by a document must match in the following ones."""
+    assert session.match(CREATE, {"id": "1", "name": "bob"}, document="create") == {
+        "number": {"user_id": "1"},
+        "string": {"name": "bob"},
+    }
+    assert session.match(GET, {"user": {"id": "1", "name": "bob", "team": "7"}}, document="get") == {
+        "number": {"team_id": "7"}
+    }
+    assert session.match(LIST, {"users": [{"id": "1"}, {"id": "2"}]}, document="list") == {}
+
+    assert session.values == {"number": {"user_id": "1", "team_id": "7"}, "string": {"name": "bob"}}
+    assert session.documents == ["create", "get", "list"]
+    assert session.binding("number", "team_id") == SessionBinding("7", "get", "$.user.team")
+    assert session.binding("number", "missing") is None
+
+
+def test_session_reports_the_document_that_bound_a_conflicting_value(session):
+    """Test that a conflict tells which earlier document bound the expected value, and where."""
+    session.match(CREATE, {"id": "1", "name": "bob"}, document="create")
+
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        session.match(LIST, {"users": [{"id": "2"}, {"id": "3"}]}, document="list")
+
+    error = exc_info.value
+    assert (error.pattern, error.identifier, error.expected_value, error.actual_value) == (
+        "number",
+        "user_id",
+        "1",
+        "2",
+    )
+    assert (error.first_document, error.first_path) == ("create", "$.id")
+    assert str(error).endswith("(expected: 1, actual: 2), first bound by document 'create' at $.id")
+
+
+def test_session_reports_conflicts_within_a_document(session):
+    """Test that a conflict with a value bound earlier in the same document names that document."""
+    template = {"a": "{number:x}", "b": "{number:x}"}
+
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        session.match(template, {"a": "1", "b": "2"})
+
+    assert (exc_info.value.first_document, exc_info.value.first_path) == (0, "$.a")
+
+
+def test_failed_document_binds_nothing(session):
+    """Test that the bindings of a document failing to match are discarded."""
+    session.match(CREATE, {"id": "1", "name": "bob"})
+
+    with pytest.raises(DictPatternMatchError):
+        session.match(GET, {"user": {"id": "1", "name": "bob", "team": "x"}})
+    with pytest.raises(DictPatternValueInconsistencyError):
+        session.match({"team": "{number:team_id}", "id": "{number:user_id}"}, {"team": "7", "id": "2"})
+
+    assert session.values == {"number": {"user_id": "1"}, "string": {"name": "bob"}}
+    assert list(session.bindings) == [("number", "user_id"), ("string", "name")]
+    assert session.documents == [0]
+    assert session.match(GET, {"user": {"id": "1", "name": "bob", "team": "8"}}) == {"number": {"team_id": "8"}}
+
+
+def test_checkpoint_rolls_back_failed_steps(session):
+    """Test that a checkpoint discards the bindings and documents of a failed step."""
+    session.match(CREATE, {"id": "1", "name": "bob"}, document="create")
+
+    with pytest.raises(DictPatternValueInconsistencyError), session.checkpoint():
+        session.match(GET, {"user": {"id": "1", "name": "bob", "team": "7"}}, document="get")
+        session.match({"team": "{number:team_id}"}, {"team": "8"}, document="team")
+
+    assert session.binding("number", "team_id") is None
+    assert session.documents == ["create"]
+
+    with session.checkpoint():
+        session.match(GET, {"user": {"id": "1", "name": "bob", "team": "8"}}, document="get")
+    assert session.binding("number", "team_id") == SessionBinding("8", "get", "$.user.team")
+
+
+def test_nested_checkpoints(session):
+    """Test that checkpoints can be nested and rolled back explicitly."""
+    outer = session.checkpoint()
+    session.match({"a": "{number:a}"}, {"a": "1"})
+    inner = session.checkpoint()
+    session.match({"b": "{number:b}"}, {"b": "2"})
+
+    inner.rollback()
+    assert session.values["number"] == {"a": "1"}
+    assert session.documents == [0]
+
+    outer.rollback()
+    assert session.values["number"] == {}
+    assert session.bindings == {}
+    assert session.documents == []
+
+
+def test_session_with_initial_bindings():
+    """Test that initial bindings are checked like values bound before the first document."""
+    session = MatchSession(DictMatcher(PATTERNS), {"number": {"user_id": "1"}})
+
+    assert session.binding("number", "user_id") == SessionBinding("1", None, None)
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        session.match(CREATE, {"id": "2", "name": "bob"})
+    assert "first bound" not in str(exc_info.value)
+
+    with pytest.raises(DictPatternTypeError):
+        MatchSession(DictMatcher(PATTERNS), {"unknown": {"x": "1"}})
+
+
+def test_session_with_specialized_template(session):
+    """Test that the bindings of a specialized template are bound by the document using it."""
+    plan = session.matcher.compile({"id": "{number:user_id}"}, {"number": {"team_id": "7"}})
+
+    session.match(plan, {"id": "1"}, document="bound")
+
+    assert session.binding("number", "team_id") == SessionBinding("7", "bound", "$")
+    with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+        session.match(session.matcher.compile({}, {"number": {"user_id": "2"}}), {})
+    assert exc_info.value.first_document == "bound"
+
+
+def test_session_with_sharded_matcher():
+    """Test that lists matched in shards bind values in the session."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        session = MatchSession(ShardedDictMatcher(PATTERNS, shard_size=2, executor=executor))
+        session.match({"owner": "{number:owner}"}, {"owner": "1"}, document="owner")
+
+        with pytest.raises(DictPatternValueInconsistencyError) as exc_info:
+            session.match(
+                {"items": [{"owner": "{number:owner}"}] * 4}, {"items": [{"owner": "1"}] * 3 + [{"owner": "2"}]}
+            )
+
+    assert exc_info.value.path == "$.items[3].owner"
+    assert exc_info.value.first_document == "owner"
@@ -0,0 +1,165 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import (
+    DictKeyMismatchError,
+    DictPatternError,
+    DictPatternMatchError,
+    DictPatternValueDuplicateError,
+    DictPatternValueInconsistencyError,
+)
+from dict_patterns.sentinels import Unique
+from dict_patterns.sharding import ShardedDictMatcher
+
+PATTERNS = {"id": r"\d+", "name": r"[a-z]+"}
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def _document(count):
+    template = {
+        "owner": "{id:owner}",
+        "items": [{"id": f"{{id:item_{i}}}", "owner": "{id:owner}", "name": "{name}"} for i in range(count)],
+        "total": "{id:total}",
+    }
+    actual = {
+        "owner": "7",
+        "items": [{"id": str(i), "owner": "7", "name": "abc"} for i in range(count)],
+        "total": str(count),
+    }
+    return template, actual
+
+
+def _outcome(matcher, template, actual):
+    try:
+        return matcher.match(template, actual), None
+    except DictPatternError as error:
+        return matcher.values, (type(error), error.path, str(error))
+
+
+def _assert_same_as_sequential(template, actual, executor):
+    expected = _outcome(DictMatcher(PATTERNS), template, actual)
+    sharded = _outcome(ShardedDictMatcher(PATTERNS, shard_size=10, executor=executor), template, actual)
+    assert sharded == expected
+    return expected
+
+
+def test_sharded_match_success(executor):
+    """Test that sharded matching captures the same values as a sequential run."""
+    template, actual = _document(95)
+
+    values, error = _assert_same_as_sequential(template, actual, executor)
+
+    assert error is None
+    assert values["id"]["item_94"] == "94"
+
+
+def test_sharded_match_conflict_across_shards(executor):
+    """Test that conflicts between shards are reported at the sequential path."""
+    template, actual = _document(95)
+    template["items"][30]["owner"] = "{id:late}"
+    template["items"][5]["owner"] = "{id:late}"
+    actual["items"][30]["owner"] = "8"
+
+    _, error = _assert_same_as_sequential(template, actual, executor)
+
+    assert error[0] is DictPatternValueInconsistencyError
+    assert error[1] == "$.items[30].owner"
+
+
+def test_sharded_match_conflict_with_prefix(executor):
+    """Test that conflicts with values bound before the list are detected."""
+    template, actual = _document(95)
+    actual["items"][47]["owner"] = "9"
+    actual["items"][80]["name"] = "123"
+
+    _, error = _assert_same_as_sequential(template, actual, executor)
+
+    assert error[1] == "$.items[47].owner"
+
+
+def test_sharded_match_conflict_before_shard_error(executor):
+    """Test that a cross-shard conflict wins over a later error of the same shard."""
+    template, actual = _document(95)
+    actual["items"][52]["owner"] = "9"
+    actual["items"][52]["name"] = "123"
+    actual["items"][55]["extra"] = "x"
+
+    _, error = _assert_same_as_sequential(template, actual, executor)
+
+    assert error[0] is DictPatternValueInconsistencyError
+    assert error[1] == "$.items[52].owner"
+
+
+def test_sharded_match_errors_inside_shards(executor):
+    """Test that errors raised inside shards are the sequential errors."""
+    template, actual = _document(95)
+    actual["items"][61]["name"] = "123"
+    actual["items"][88]["extra"] = "x"
+
+    _, error = _assert_same_as_sequential(template, actual, executor)
+    assert error[0] is DictPatternMatchError
+
+    actual["items"][61]["name"] = "abc"
+    _, error = _assert_same_as_sequential(template, actual, executor)
+    assert error[0] is DictKeyMismatchError
+    assert error[1] == "$.items[88]"
+
+
+def test_sharded_match_after_list(executor):
+    """Test that values bound inside shards are visible after the list."""
+    template, actual = _document(25)
+    template["total"] = "{id:item_3}"
+    actual["total"] = "4"
+
+    _, error = _assert_same_as_sequential(template, actual, executor)
+
+    assert error[0] is DictPatternValueInconsistencyError
+    assert error[1] == "$.total"
+
+
+def test_sharded_match_unique_across_shards(executor):
+    """Test that duplicates of Unique values are detected across shards."""
+    template, actual = _document(95)
+    for item in template["items"]:
+        item["name"] = Unique("{name}")
+    for i, item in enumerate(actual["items"]):
+        item["name"] = "".join("abcdefghij"[int(digit)] for digit in str(i))
+    actual["items"][72]["name"] = actual["items"][7]["name"]
+    actual["items"][90]["owner"] = "9"
+
+    _, error = _assert_same_as_sequential(template, actual, executor)
+
+    assert error[0] is DictPatternValueDuplicateError
+    assert error[1] == "$.items[72].name"
+
+
+def test_sharded_match_with_process_pool():
+    """Test sharded matching with the default process pool."""
+    template, actual = _document(40)
+    actual["items"][33]["owner"] = "8"
+    matcher = ShardedDictMatcher(PATTERNS, shard_size=10, max_workers=2)
+
+    with pytest.raises(DictPatternValueInconsistencyError, match="\\$\\.items\\[33\\]\\.owner\\.owner"):
+        matcher.match(template, actual)
+
+    actual["items"][33]["owner"] = "7"
+    assert matcher.match(template, actual)["id"]["item_39"] == "39"
+
+
+def test_errors_can_be_pickled():
+    """Test that errors keep their attributes when pickled."""
+    error = DictPatternValueInconsistencyError("$.a", "user_id", "1", "2")
+
+    restored = pickle.loads(pickle.dumps(error))
+
+    assert type(restored) is DictPatternValueInconsistencyError
+    assert str(restored) == str(error)
+    assert (restored.path, restored.identifier, restored.expected_value) == ("$.a", "user_id", "1")
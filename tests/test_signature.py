@@ -0,0 +1,196 @@
+import random
+
+import pytest
+
+from dict_patterns.batch import match_batch
+from dict_patterns.dict_matcher import DictMatcher
+from dict_patterns.exceptions import (
+    DictKeyMismatchError,
+    DictListLengthMismatchError,
+    DictPatternError,
+    DictPatternMatchError,
+    DictValueMismatchError,
+)
+from dict_patterns.sentinels import ANY, AnyValue, Unique
+from dict_patterns.signature import TemplateSignature
+
+PATTERNS = {"id": r"\d+"}
+TEMPLATE = {
+    "type": "order",
+    "id": "{id:order_id}",
+    "items": [{"sku": "{id}", "qty": 1}, {"sku": "{id}", "qty": 2}],
+    "meta": {"version": 2, "trace": AnyValue(dict)},
+}
+
+
+def _document():
+    return {
+        "type": "order",
+        "id": "1",
+        "items": [{"sku": "10", "qty": 1}, {"sku": "11", "qty": 2}],
+        "meta": {"version": 2, "trace": {}},
+    }
+
+
+def _full_match_error(document, partial_match=False):
+    try:
+        DictMatcher(PATTERNS).match(TEMPLATE, document, partial_match)
+    except DictPatternError as error:
+        return error
+    return None
+
+
+@pytest.fixture
+def signature():
+    return TemplateSignature(DictMatcher(PATTERNS).compile(TEMPLATE))
+
+
+def test_signature_accepts_matching_documents(signature):
+    """Test that matching documents pass every check."""
+    assert signature.check(_document()) is None
+    assert len(signature) == 13
+
+
+@pytest.mark.parametrize(
+    ("change", "error_type"),
+    [
+        (lambda document: document.update(type="user"), DictValueMismatchError),
+        (lambda document: document.pop("meta"), DictKeyMismatchError),
+        (lambda document: document["items"].pop(), DictListLengthMismatchError),
+        (lambda document: document.update(items={}), DictValueMismatchError),
+        (lambda document: document["items"][1].update(qty=3), DictValueMismatchError),
+        (lambda document: document["items"][0].update(sku=10), DictValueMismatchError),
+        (lambda document: document["meta"].update(trace=[]), DictValueMismatchError),
+    ],
+)
+def test_signature_returns_the_full_match_error(signature, change, error_type):
+    """Test that the signature rejects documents with the error of the full match."""
+    document = _document()
+    change(document)
+
+    error = signature.check(document)
+    expected = _full_match_error(document)
+
+    assert type(error) is type(expected) is error_type
+    assert str(error) == str(expected)
+
+
+@pytest.mark.parametrize("partial_match", [False, True])
+def test_signature_follows_matcher_order(partial_match):
+    """Test that the first failing check is the first difference the DictMatcher reports."""
+    matcher = DictMatcher(PATTERNS)
+    template = {"a": {"b": {"c": 1}, "d": [1, {"e": 2}]}, "z": 2}
+    signature = TemplateSignature(matcher.compile(template), partial_match)
+    documents = [
+        {"a": {"b": {"c": 9}, "d": [1, {"e": 2}]}, "z": 3},
+        {"a": {"b": {"c": 1}, "d": [1, {"e": 3}]}, "z": 3},
+        {"a": {"b": {}, "d": [1, {"e": 2}]}, "z": 3},
+        {"a": {"b": {"c": 1}}, "z": 3},
+    ]
+
+    for document in documents:
+        with pytest.raises(DictPatternError) as exc_info:
+            matcher.match(template, document, partial_match)
+        error = signature.check(document)
+        assert error.path == exc_info.value.path
+        assert str(error) == str(exc_info.value)
+
+
+def test_signature_partial_match():
+    """Test that partial signatures only require the template keys."""
+    signature = TemplateSignature(DictMatcher(PATTERNS).compile(TEMPLATE), partial_match=True)
+    document = {**_document(), "extra": True}
+
+    assert signature.check(document) is None
+    del document["id"]
+    assert str(signature.check(document)) == str(_full_match_error(document, partial_match=True))
+
+
+def test_signature_skips_regexes(signature):
+    """Test that patterns are only type checked."""
+    document = _document()
+    document["id"] = "not a number"
+
+    assert signature.check(document) is None
+    assert isinstance(_full_match_error(document), DictPatternMatchError)
+
+
+def test_signature_max_checks():
+    """Test that large templates only keep their first checks."""
+    signature = TemplateSignature(DictMatcher(PATTERNS).compile(TEMPLATE), max_checks=4)
+    document = _document()
+    document["items"][1]["qty"] = 3
+
+    assert len(signature) == 4
+    assert signature.check(document) is None
+
+
+def test_match_batch_quick_reject():
+    """Test that batches can reject documents with the signature before the full walk."""
+    documents = [_document() for _ in range(3)]
+    documents[1]["meta"]["version"] = 3
+    documents[2]["id"] = "x"
+
+    results = match_batch(DictMatcher(PATTERNS), TEMPLATE, documents, quick_reject=True)
+
+    assert results[0].ok
+    assert isinstance(results[1].error, DictValueMismatchError)
+    assert results[1].values == {"id": {"order_id": "1"}}
+    assert isinstance(results[2].error, DictPatternMatchError)
+
+
+def _random_template(rng, depth=0):
+    kind = rng.choice(["literal", "pattern", "any", "dict", "list"] if depth < 3 else ["literal", "pattern", "any"])
+    if kind == "literal":
+        return rng.choice([1, "lit", None, 2.5])
+    if kind == "pattern":
+        return rng.choice(["{id:y}", "{id}", Unique("{id}")])
+    if kind == "any":
+        return rng.choice([ANY, AnyValue(int), AnyValue(dict)])
+    if kind == "list":
+        return [_random_template(rng, depth + 1) for _ in range(rng.randrange(3))]
+    keys = rng.sample(["a", "b", "c", "d", "{id}"], rng.randrange(4))
+    return {key: _random_template(rng, depth + 1) for key in keys}
+
+
+def _random_document(rng, template):
+    """Return a document close to the template, with a few random changes."""
+    if rng.random() < 0.1:
+        return rng.choice([1, "5", "x", None, [], {}, [1], {"z": 1}])
+    if isinstance(template, dict):
+        document = {}
+        for key, value in template.items():
+            if rng.random() < 0.9:
+                document["7" if key == "{id}" else key] = _random_document(rng, value)
+        if rng.random() < 0.2:
+            document[rng.choice(["z", "9"])] = 1
+        return document
+    if isinstance(template, list):
+        items = [_random_document(rng, item) for item in template]
+        return items[: rng.randrange(len(items) + 1)] if rng.random() < 0.1 else items
+    if isinstance(template, (str, Unique)):
+        return rng.choice(["5", "5", "x", 5])
+    if template is ANY or isinstance(template, AnyValue):
+        return rng.choice([1, {}, "s"])
+    return template
+
+
+@pytest.mark.parametrize("partial_match", [False, True])
+def test_quick_reject_reports_the_full_match_error(partial_match):
+    """Test that batches with quick rejection report the error of the full match for random documents."""
+    rng = random.Random(2024)
+    matcher = DictMatcher(PATTERNS)
+
+    for _ in range(500):
+        template = _random_template(rng)
+        documents = [_random_document(rng, template) for _ in range(5)]
+        results = match_batch(matcher, template, documents, partial_match, quick_reject=True)
+        for document, result in zip(documents, results, strict=True):
+            try:
+                matcher.match(template, document, partial_match)
+            except DictPatternError as error:
+                assert type(result.error) is type(error)
+                assert result.error.path == error.path
+                assert str(result.error) == str(error)
+            else:
+                assert result.ok